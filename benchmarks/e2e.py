@@ -0,0 +1,278 @@
+"""
+Офлайн end-to-end бенчмарк цикла агента: issue -> PR -> review -> fix.
+GitHub и LLM — локальные заглушки (benchmarks.fake_servers), репозиторий —
+временный клон с bare origin. Отчёт: p50/p95 по стадиям, вызовы API и
+подпроцессы на прогон, пропускная способность.
+Запуск: python -m benchmarks.e2e --issues 10 --llm-latency 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import os
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from benchmarks.fake_servers import FakeGitHub, FakeLLM, FaultProfile
+
+REPO_NAME = "bench/repo"
+STAGES = ("issue", "review", "fix")
+# потолки на один прогон стадии (в среднем) без инъекции отказов: рост round trip'ов
+# или подпроцессов — регрессия. Первый прогон issue ещё создаёт 3 labels.
+BUDGETS: Dict[str, Dict[str, float]] = {
+    "issue": {"github": 9, "llm": 1, "subprocess": 9},
+    "review": {"github": 6, "llm": 0, "subprocess": 0},
+    "fix": {"github": 7, "llm": 1, "subprocess": 9},
+}
+
+
+@dataclass
+class BenchConfig:
+    issues: int = 5
+    llm_latency: float = 0.0
+    llm_failure_rate: float = 0.0
+    reply_bytes: int = 2000
+    github_latency: float = 0.0
+    github_failure_rate: float = 0.0
+    seed: int = 0
+    verbose: bool = False
+
+
+@dataclass
+class StageStats:
+    seconds: List[float] = field(default_factory=list)
+    errors: int = 0
+    # суммы по всем прогонам стадии
+    github: Counter = field(default_factory=Counter)
+    llm: int = 0
+    subprocess: float = 0
+    subprocess_seconds: float = 0.0
+
+    @property
+    def runs(self) -> int:
+        return len(self.seconds)
+
+    def per_run(self) -> Dict[str, float]:
+        n = max(1, self.runs)
+        return {
+            "github": sum(self.github.values()) / n,
+            "llm": self.llm / n,
+            "subprocess": self.subprocess / n,
+        }
+
+
+@dataclass
+class BenchReport:
+    config: BenchConfig
+    wall: float
+    stages: Dict[str, StageStats]
+    github_failures: int = 0
+    llm_failures: int = 0
+
+    @property
+    def cycles_per_minute(self) -> float:
+        return self.config.issues / self.wall * 60 if self.wall else 0.0
+
+    def over_budget(self) -> List[str]:
+        problems = []
+        for name, limits in BUDGETS.items():
+            stats = self.stages[name]
+            if not stats.runs:
+                continue
+            for metric, value in stats.per_run().items():
+                if value > limits[metric]:
+                    problems.append(f"{name}: {metric} {value:g}/run > budget {limits[metric]:g}")
+        return problems
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank перцентиль; на пустом списке — 0."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def _git(cwd: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def make_scratch_repo(root: Path) -> Path:
+    """Bare origin с веткой main и рабочий клон, из которого агент делает checkout/push."""
+    origin, work = root / "origin.git", root / "work"
+    _git(root, "init", "-q", "--bare", "-b", "main", str(origin))
+    _git(root, "clone", "-q", str(origin), str(work))
+    for key, value in (("user.name", "bench"), ("user.email", "bench@example.com")):
+        _git(work, "config", key, value)
+    (work / "bench").mkdir()
+    (work / "bench" / "__init__.py").write_text("")
+    (work / "README.md").write_text("# bench repo\n")
+    _git(work, "add", "-A")
+    _git(work, "commit", "-q", "-m", "init")
+    _git(work, "push", "-q", "origin", "HEAD:main")
+    return work
+
+
+@contextlib.contextmanager
+def bench_environment(github: FakeGitHub, llm: FakeLLM, scratch: Path) -> Iterator[None]:
+    """Env и endpoint'ы на заглушки; после прогона всё возвращается как было."""
+    from code_agent import llm_client
+    from core.config import get_settings
+
+    env = {
+        "GITHUB_API_URL": github.url,
+        "GITHUB_GRAPHQL_URL": f"{github.url}/graphql",
+        "GITHUB_HTTP_CACHE_DIR": str(scratch / "http-cache"),
+        "GITHUB_TOKEN": "bench-token",
+        "GITHUB_REPOSITORY": REPO_NAME,
+        "OPENAI_API_KEY": "bench-key",
+        "LOG_LEVEL": "WARNING",
+        "LLM_CACHE_DIR": "",
+        "TRACE_FILE": "",
+    }
+    saved = {key: os.environ.get(key) for key in [*env, "PR_NUMBER"]}
+    saved_endpoint = llm_client.OPENAI_ENDPOINT
+    os.environ.update(env)
+    llm_client.OPENAI_ENDPOINT = llm.endpoint
+    get_settings.cache_clear()
+    try:
+        yield
+    finally:
+        llm_client.OPENAI_ENDPOINT = saved_endpoint
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        get_settings.cache_clear()
+
+
+def run(config: BenchConfig) -> BenchReport:
+    """
+    Полный цикл на config.issues issues: run_issue_to_pr создаёт PR,
+    reviewer_agent.review.main его ревьюит, run_issue_to_pr с pr_number вносит правки.
+    Клиенты GitHub создаются заново на каждый прогон — как в GitHub Actions.
+    """
+    from code_agent.agent import run_issue_to_pr
+    from core.tracing import get_tracer
+    from reviewer_agent import review
+
+    tracer = get_tracer()
+    stages = {name: StageStats() for name in STAGES}
+    github = FakeGitHub(
+        REPO_NAME, FaultProfile(config.github_latency, config.github_failure_rate, config.seed)
+    )
+    llm = FakeLLM(
+        config.reply_bytes, FaultProfile(config.llm_latency, config.llm_failure_rate, config.seed)
+    )
+
+    with tempfile.TemporaryDirectory(prefix="code-agent-bench-") as tmp, github, llm:
+        scratch = Path(tmp)
+        work = make_scratch_repo(scratch)
+
+        def measure(stage: str, fn) -> None:
+            stats = stages[stage]
+            calls, llm_calls = github.snapshot(), sum(llm.snapshot().values())
+            totals = dict(tracer.totals)
+            output = io.StringIO()
+            started = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(output):
+                    fn()
+            except Exception as e:
+                stats.errors += 1
+                print(f"{stage} failed: {type(e).__name__}: {e}")
+            stats.seconds.append(time.perf_counter() - started)
+            if config.verbose:
+                print(output.getvalue())
+            stats.github += github.snapshot() - calls
+            stats.llm += sum(llm.snapshot().values()) - llm_calls
+            after = tracer.totals
+            stats.subprocess += after.get("subprocess.calls", 0) - totals.get("subprocess.calls", 0)
+            stats.subprocess_seconds += after.get("subprocess.seconds", 0) - totals.get(
+                "subprocess.seconds", 0
+            )
+
+        with bench_environment(github, llm, scratch):
+            started = time.perf_counter()
+            for i in range(config.issues):
+                number = str(100 + i)
+                kwargs: Dict[str, Any] = dict(
+                    issue_number=number,
+                    repo_name=REPO_NAME,
+                    api_token="bench-token",
+                    issue_title=f"Benchmark issue {number}",
+                    issue_body=f"Add generated module for issue {number}.",
+                    workdir=str(work),
+                )
+                measure("issue", lambda: run_issue_to_pr(**kwargs))
+                pr = github.pull_for_branch(f"agent/issue-{number}")
+                if pr is None:
+                    continue
+                os.environ["PR_NUMBER"] = str(pr.number)
+                measure("review", review.main)
+                measure("fix", lambda: run_issue_to_pr(**kwargs, pr_number=str(pr.number)))
+            wall = time.perf_counter() - started
+
+    return BenchReport(config, wall, stages, github.failures, llm.failures)
+
+
+def format_report(report: BenchReport) -> str:
+    lines = [
+        f"{'stage':<8} {'runs':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'github/run':>11} {'llm/run':>8} {'subproc/run':>12} {'subproc ms':>11}"
+    ]
+    for name, stats in report.stages.items():
+        per_run = stats.per_run()
+        lines.append(
+            f"{name:<8} {stats.runs:>5} {stats.errors:>4} "
+            f"{percentile(stats.seconds, 50) * 1000:9.1f} {percentile(stats.seconds, 95) * 1000:9.1f} "
+            f"{per_run['github']:11.1f} {per_run['llm']:8.1f} {per_run['subprocess']:12.1f} "
+            f"{stats.subprocess_seconds / max(1, stats.runs) * 1000:11.1f}"
+        )
+    lines.append("github calls per run:")
+    for name, stats in report.stages.items():
+        for route, n in sorted(stats.github.items()):
+            lines.append(f"  {name:<8} {route:<44} {n / max(1, stats.runs):5.1f}")
+    lines.append(
+        f"{report.config.issues} cycles in {report.wall:.2f} s "
+        f"({report.cycles_per_minute:.1f} cycles/min); injected failures: "
+        f"github {report.github_failures}, llm {report.llm_failures}"
+    )
+    return "\n".join(lines)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.e2e")
+    parser.add_argument("--issues", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds before first byte")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--reply-bytes", type=int, default=2000, help="size of generated file")
+    parser.add_argument("--github-latency", type=float, default=0.0)
+    parser.add_argument("--github-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="show agent output")
+    args = parser.parse_args(argv)
+
+    report = run(BenchConfig(**vars(args)))
+    print(format_report(report))
+    if args.llm_failure_rate or args.github_failure_rate:
+        # повторы после отказов законно добавляют вызовы — бюджеты не проверяем
+        return 0
+    problems = report.over_budget()
+    problems += [
+        f"{name}: {s.errors} failed run(s)" for name, s in report.stages.items() if s.errors
+    ]
+    for problem in problems:
+        print(f"OVER BUDGET {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
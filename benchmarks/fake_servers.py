@@ -0,0 +1,361 @@
+"""
+Локальные заглушки GitHub (REST + GraphQL) и chat/completions для офлайн-бенчмарка.
+Задержка, размер ответа и доля отказов настраиваются; каждый запрос учитывается
+по маршруту ("GET /repos/{repo}/pulls/{n}"), чтобы ловить лишние round trip'ы.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# логин, под которым GitHub Actions пишет комментарии
+BOT_LOGIN = "github-actions[bot]"
+
+
+@dataclass
+class FaultProfile:
+    latency: float = 0.0  # секунд до первого байта ответа
+    failure_rate: float = 0.0  # доля ответов 503 (Retry-After: 0)
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        self._random = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.failure_rate
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # буферизованный вывод: заголовки и тело уходят одним сегментом, без задержки Nagle/ACK
+    wbufsize = -1
+    server: "_Server"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw) if raw else None
+
+    def _send(self, status: int, payload: Any = None, headers: Optional[Dict[str, str]] = None):
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str) -> None:
+        stub = self.server.stub
+        path = self.path.split("?", 1)[0]
+        route = stub.route(method, path)
+        with stub.lock:
+            stub.calls[route] += 1
+        time.sleep(stub.faults.latency)
+        if stub.faults.should_fail():
+            with stub.lock:
+                stub.failures += 1
+            self._send(503, {"message": "injected failure"}, {"Retry-After": "0"})
+            return
+        stub.dispatch(self, method, path)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    stub: "_Stub"
+
+
+class _Stub:
+    """Общая часть заглушек: поток сервера, счётчики маршрутов, профиль отказов."""
+
+    # (регулярка пути, шаблон маршрута для счётчиков)
+    ROUTES: List[Tuple[str, str]] = []
+
+    def __init__(self, faults: Optional[FaultProfile] = None):
+        self.faults = faults or FaultProfile()
+        self.calls: Counter = Counter()
+        self.failures = 0
+        self.lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,))
+        self._thread.daemon = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def route(self, method: str, path: str) -> str:
+        for pattern, template in self.ROUTES:
+            if re.fullmatch(pattern, path):
+                return f"{method} {template}"
+        return f"{method} {path}"
+
+    def dispatch(self, handler: _Handler, method: str, path: str) -> None:
+        raise NotImplementedError
+
+    def snapshot(self) -> Counter:
+        with self.lock:
+            return Counter(self.calls)
+
+    def start(self) -> "_Stub":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+@dataclass
+class FakePull:
+    number: int
+    title: str
+    body: str
+    head: str
+    base: str
+    sha: str
+    labels: List[str] = field(default_factory=list)
+    comments: List[Dict[str, Any]] = field(default_factory=list)
+    reviews: List[str] = field(default_factory=list)
+
+
+class FakeGitHub(_Stub):
+    """
+    Минимум GitHub API, который трогают run_issue_to_pr и review_pr: labels
+    (с ETag и 304), pulls, комментарии, ревью и GraphQL-снимок PR.
+    CI на head-коммите всегда зелёный.
+    """
+
+    ROUTES = [
+        (r"/repos/[^/]+/[^/]+/labels", "/repos/{repo}/labels"),
+        (r"/repos/[^/]+/[^/]+/issues/\d+/labels", "/repos/{repo}/issues/{n}/labels"),
+        (r"/repos/[^/]+/[^/]+/issues/\d+/comments", "/repos/{repo}/issues/{n}/comments"),
+        (r"/repos/[^/]+/[^/]+/pulls", "/repos/{repo}/pulls"),
+        (r"/repos/[^/]+/[^/]+/pulls/\d+", "/repos/{repo}/pulls/{n}"),
+        (r"/repos/[^/]+/[^/]+/pulls/\d+/reviews", "/repos/{repo}/pulls/{n}/reviews"),
+        (r"/graphql", "/graphql"),
+    ]
+
+    def __init__(self, repo_name: str, faults: Optional[FaultProfile] = None):
+        super().__init__(faults)
+        self.repo_name = repo_name
+        self.labels: Dict[str, str] = {}
+        self.pulls: Dict[int, FakePull] = {}
+        self._next_number = 1
+
+    def pull_for_branch(self, branch: str) -> Optional[FakePull]:
+        with self.lock:
+            return next((p for p in self.pulls.values() if p.head == branch), None)
+
+    # --- JSON в форме ответов GitHub (ровно те поля, что читает PyGithub) ---
+
+    def _pull_json(self, pr: FakePull) -> Dict[str, Any]:
+        api = f"{self.url}/repos/{self.repo_name}"
+        return {
+            "number": pr.number,
+            "title": pr.title,
+            "body": pr.body,
+            "state": "open",
+            "url": f"{api}/pulls/{pr.number}",
+            "html_url": f"https://github.example/{self.repo_name}/pull/{pr.number}",
+            "issue_url": f"{api}/issues/{pr.number}",
+            "head": {"ref": pr.head, "sha": pr.sha, "label": f"owner:{pr.head}"},
+            "base": {"ref": pr.base},
+        }
+
+    def _snapshot_json(self, pr: FakePull) -> Dict[str, Any]:
+        check = {
+            "name": "ci",
+            "status": "COMPLETED",
+            "conclusion": "SUCCESS",
+            "title": "",
+            "summary": "",
+            "text": "",
+        }
+        commit = {
+            "oid": pr.sha,
+            "status": {"state": "SUCCESS", "contexts": [{"context": "ci", "state": "SUCCESS"}]},
+            "checkSuites": {"nodes": [{"checkRuns": {"nodes": [check]}}]},
+        }
+        comments = [
+            {"databaseId": c["id"], "body": c["body"], "author": {"login": BOT_LOGIN}}
+            for c in pr.comments[-50:]
+        ]
+        return {
+            "repository": {
+                "pullRequest": {
+                    "number": pr.number,
+                    "title": pr.title,
+                    "body": pr.body,
+                    "url": self._pull_json(pr)["html_url"],
+                    "headRefName": pr.head,
+                    "labels": {"nodes": [{"name": n} for n in pr.labels]},
+                    "files": {"totalCount": 1, "nodes": [{"path": "bench"}]},
+                    "commits": {"nodes": [{"commit": commit}]},
+                    "comments": {"nodes": comments},
+                }
+            }
+        }
+
+    def _get_conditional(self, handler: _Handler, payload: Any) -> None:
+        etag = '"' + hashlib.sha1(json.dumps(payload).encode("utf-8")).hexdigest() + '"'
+        if handler.headers.get("If-None-Match") == etag:
+            handler._send(304, None, {"ETag": etag})
+        else:
+            handler._send(200, payload, {"ETag": etag})
+
+    def dispatch(self, handler: _Handler, method: str, path: str) -> None:
+        parts = path.strip("/").split("/")
+        body = handler._body()
+        with self.lock:
+            reply = self._reply(method, path, parts, body)
+        if reply is None:
+            handler._send(404, {"message": f"Not Found: {method} {path}"})
+        elif method == "GET" and reply[0] == 200:
+            self._get_conditional(handler, reply[1])
+        else:
+            handler._send(*reply)
+
+    def _reply(
+        self, method: str, path: str, parts: List[str], body: Any
+    ) -> Optional[Tuple[int, Any]]:
+        if path == "/graphql":
+            pr = self.pulls.get(int(body["variables"]["number"]))
+            data = self._snapshot_json(pr) if pr else {"repository": {"pullRequest": None}}
+            return 200, {"data": data}
+        tail = parts[3:]  # после repos/{owner}/{name}
+        if tail == ["labels"]:
+            if method == "POST":
+                self.labels[body["name"]] = body.get("color", "")
+                return 201, {"name": body["name"]}
+            return 200, [{"name": n} for n in self.labels]
+        if tail == ["pulls"]:
+            if method == "POST":
+                number = self._next_number
+                self._next_number += 1
+                sha = hashlib.sha1(f"{body['head']}:{number}".encode()).hexdigest()
+                pr = FakePull(number, body["title"], body["body"], body["head"], body["base"], sha)
+                self.pulls[number] = pr
+                return 201, self._pull_json(pr)
+            return 200, [self._pull_json(p) for p in self.pulls.values()]
+        pr = self.pulls.get(int(tail[1])) if len(tail) > 1 and tail[1].isdigit() else None
+        if pr is None:
+            return None
+        if tail[0] == "pulls" and len(tail) == 2:
+            if method == "PATCH":
+                pr.body = body.get("body", pr.body)
+            return 200, self._pull_json(pr)
+        if tail[2:] == ["reviews"]:
+            pr.reviews.append(body.get("event", ""))
+            return 200, {"id": len(pr.reviews), "state": body.get("event", ""), "body": ""}
+        if tail[2:] == ["labels"]:
+            if method == "PUT":
+                pr.labels = list(body["labels"])
+            return 200, [{"name": n} for n in pr.labels]
+        if tail[2:] == ["comments"]:
+            comment = {
+                "id": 1000 + sum(len(p.comments) for p in self.pulls.values()),
+                "body": body["body"],
+                "user": {"login": BOT_LOGIN},
+            }
+            pr.comments.append(comment)
+            return 201, comment
+        return None
+
+
+class FakeLLM(_Stub):
+    """
+    chat/completions: на каждый запрос — JSON с одним новым Python-файлом
+    размером около reply_bytes; stream=True отдаётся SSE-чанками с блоком usage.
+    """
+
+    ROUTES = [(r"/v1/chat/completions", "/v1/chat/completions")]
+
+    def __init__(self, reply_bytes: int = 2000, faults: Optional[FaultProfile] = None):
+        super().__init__(faults)
+        self.reply_bytes = reply_bytes
+        self._replies = 0
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.url}/v1/chat/completions"
+
+    def reply_text(self) -> str:
+        with self.lock:
+            self._replies += 1
+            n = self._replies
+        lines = [f'"""Generated module {n}."""', ""]
+        size, i = 0, 0
+        while size < self.reply_bytes:
+            line = f'VALUE_{i} = "{"x" * 40}"'
+            lines.append(line)
+            size += len(line) + 1
+            i += 1
+        patch = {
+            "summary": f"Benchmark change {n}.",
+            "changes": [
+                {
+                    "path": f"bench/generated_{n}.py",
+                    "action": "create",
+                    "content": "\n".join(lines) + "\n",
+                }
+            ],
+        }
+        return json.dumps(patch)
+
+    def dispatch(self, handler: _Handler, method: str, path: str) -> None:
+        payload = handler._body()
+        content = self.reply_text()
+        prompt = sum(len(m["content"]) for m in payload["messages"]) // 4 + 1
+        usage = {"prompt_tokens": prompt, "completion_tokens": len(content) // 4 + 1}
+        if not payload.get("stream"):
+            reply = {"choices": [{"message": {"content": content}}], "usage": usage}
+            handler._send(200, reply)
+            return
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        events: List[Dict[str, Any]] = [
+            {"choices": [{"delta": {"content": content[i : i + 64]}}]}
+            for i in range(0, len(content), 64)
+        ]
+        events.append({"choices": [], "usage": usage})
+        lines = [f"data: {json.dumps(e)}\n\n" for e in events] + ["data: [DONE]\n\n"]
+        for line in lines:
+            data = line.encode("utf-8")
+            handler.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            handler.wfile.flush()
+        handler.wfile.write(b"0\r\n\r\n")
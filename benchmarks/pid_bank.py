@@ -0,0 +1,74 @@
+"""
+PIDBank против поштучных PIDController.update: контуров в секунду при N контурах на тик.
+Запуск: python -m benchmarks.pid_bank --loops 100 1000 10000 --ticks 200
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from pid_bank import PIDBank
+from pid_controller import PIDController
+
+DT = 0.01
+
+
+@dataclass
+class PIDBenchResult:
+    loops: int
+    ticks: int
+    scalar_per_second: float
+    bank_per_second: float
+
+    @property
+    def speedup(self) -> float:
+        return self.bank_per_second / self.scalar_per_second if self.scalar_per_second else 0.0
+
+
+def measure(loops: int, ticks: int, seed: int = 0) -> PIDBenchResult:
+    rng = np.random.default_rng(seed)
+    kp, ki, kd = rng.uniform(0.1, 2.0, (3, loops))
+    setpoints = rng.uniform(-5, 5, loops)
+    measurements = rng.uniform(-5, 5, (ticks, loops))
+
+    controllers = [PIDController(float(p), float(i), float(d)) for p, i, d in zip(kp, ki, kd)]
+    sp = setpoints.tolist()
+    rows = measurements.tolist()
+    started = time.perf_counter()
+    for row in rows:
+        for c, s, m in zip(controllers, sp, row):
+            c.update(s, m, DT)
+    scalar = time.perf_counter() - started
+
+    bank = PIDBank(kp, ki, kd)
+    out = np.empty(loops)
+    started = time.perf_counter()
+    for row in measurements:
+        bank.update(setpoints, row, DT, out=out)
+    vectorized = time.perf_counter() - started
+
+    total = loops * ticks
+    return PIDBenchResult(loops, ticks, total / scalar, total / vectorized)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.pid_bank")
+    parser.add_argument("--loops", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    print(f"{'loops':>7} {'scalar loops/s':>15} {'bank loops/s':>15} {'speedup':>8}")
+    for loops in args.loops:
+        r = measure(loops, args.ticks)
+        print(
+            f"{r.loops:>7} {r.scalar_per_second:15,.0f} {r.bank_per_second:15,.0f} "
+            f"{r.speedup:7.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
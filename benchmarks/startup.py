@@ -0,0 +1,80 @@
+"""
+Холодный старт CLI: `python -X importtime` по командам, которые запускаются
+в короткоживущих runner'ах. Запуск: python -m benchmarks.startup
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+# бюджет на импорт code_agent.cli (кумулятивно, по -X importtime) и на весь `--help`
+CLI_IMPORT_BUDGET_MS = 50.0
+CLI_HELP_BUDGET_MS = 400.0
+# эти пакеты не должны грузиться, пока команда их не использует
+HEAVY_MODULES = ("github", "pydantic", "pydantic_settings", "requests", "urllib3", "jwt")
+
+# название -> (аргументы интерпретатора, модуль, чьё кумулятивное время показываем)
+CASES = {
+    "import code_agent.cli": (["-c", "import code_agent.cli"], "code_agent.cli"),
+    "code-agent --help": (["-m", "code_agent.cli", "--help"], ""),
+    "import code_agent.agent": (["-c", "import code_agent.agent"], "code_agent.agent"),
+}
+
+
+@dataclass
+class StartupResult:
+    name: str
+    wall_ms: float
+    import_ms: Dict[str, float]
+
+    @property
+    def modules(self) -> List[str]:
+        return list(self.import_ms)
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """Строки `import time: self | cumulative | module` -> {module: cumulative ms}."""
+    result: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        result[name.strip()] = int(cumulative) / 1000
+    return result
+
+
+def measure(name: str, args: Sequence[str], runs: int = 5) -> StartupResult:
+    """Медиана wall-time по runs запускам; importtime — из последнего."""
+    walls = []
+    stderr = ""
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", *args], capture_output=True, text=True
+        )
+        walls.append((time.perf_counter() - started) * 1000)
+        stderr = proc.stderr
+    return StartupResult(name, statistics.median(walls), parse_importtime(stderr))
+
+
+def heavy_imports(result: StartupResult) -> List[str]:
+    return sorted({m for m in result.modules if m.split(".")[0] in HEAVY_MODULES and "." not in m})
+
+
+def main() -> int:
+    print(f"{'case':<28} {'wall ms':>9} {'import ms':>10}  heavy modules")
+    for name, (args, module) in CASES.items():
+        result = measure(name, args)
+        top = f"{result.import_ms[module]:10.1f}" if module else f"{'-':>10}"
+        print(f"{name:<28} {result.wall_ms:9.1f} {top}  {', '.join(heavy_imports(result))}")
+    print(
+        f"budgets: import code_agent.cli < {CLI_IMPORT_BUDGET_MS} ms, --help < {CLI_HELP_BUDGET_MS} ms"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
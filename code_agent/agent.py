@@ -1,27 +1,47 @@
 import json
-import subprocess
+import os
+import time
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 from github import Github
 
-from code_agent.llm_client import yandexgpt_complete
-
-LABEL_REVIEW_REQUESTED = "ai-review-requested"
-LABEL_CHANGES_REQUESTED = "ai-changes-requested"
-LABEL_APPROVED = "ai-approved"
-
-
-def run(cmd: str):
-    print(f"> {cmd}")
-    subprocess.run(cmd, shell=True, check=True)
-
-
-def ensure_label(repo, name: str, color: str = "ededed"):
-    try:
-        repo.get_label(name)
-    except Exception:
-        repo.create_label(name=name, color=color)
+from code_agent.formatting import format_paths
+from code_agent.git_repo import GitRepo
+from code_agent.json_stream import IncrementalJSONScanner
+from code_agent.llm_client import PendingCache, yandexgpt_complete
+from code_agent.patch_validator import (  # noqa: F401  (реэкспорт для совместимости)
+    ALLOWED_ACTIONS,
+    PROTECTED_PREFIXES,
+    Finding,
+    PlaceholderFound,
+    StreamValidator,
+    check_streamed_change,
+    describe,
+    is_safe_relative_path,
+    placeholder_paths,
+    raise_for_fatal,
+    validate_changes,
+)
+from code_agent.patching import PatchError, apply_patch_change
+from code_agent.repo_index import RepoIndex
+from code_agent.token_budget import CI_SHARE, budget_for_model, compact_failures, plan_prompt
+from code_agent.verify import verify_changes
+from core.config import get_settings
+from core.github_data import fetch_pr_snapshot
+from core.github_rest import GitHubREST, github_client
+from core.labels import (  # noqa: F401  (LABEL_* реэкспортируются для совместимости)
+    LABEL_APPROVED,
+    LABEL_CHANGES_REQUESTED,
+    LABEL_REVIEW_REQUESTED,
+    apply_transition,
+    ensure_review_labels,
+)
+from core.pr_comments import find_last_reviewer_comment
+from core.tracing import span, traced
+
+# сколько раз чиним изменения по результатам локальной проверки до push
+VERIFY_REPAIR_ROUNDS = 2
 
 
 def get_existing_pr(repo, head_full: str, base: str = "main"):
@@ -31,14 +51,6 @@ def get_existing_pr(repo, head_full: str, base: str = "main"):
     return None
 
 
-def is_safe_relative_path(path: str) -> bool:
-    p = Path(path)
-    return not p.is_absolute() and ".." not in p.parts
-
-
-ALLOWED_ACTIONS = {"create", "update", "delete"}
-
-
 def extract_json(text: str) -> str:
     text = (text or "").strip()
     if not text:
@@ -64,28 +76,20 @@ def extract_json(text: str) -> str:
     return ""
 
 
-def get_last_reviewer_comment(pr) -> str:
+def get_last_reviewer_comment(pr, repo_name: str) -> str:
     """
     Берём последний комментарий бота github-actions со словами 'AI Reviewer report' (если есть).
+    Комментарии читаются с конца до первого совпадения, без выгрузки всей истории.
     """
-    comments = list(pr.get_issue_comments())
-    comments.reverse()
-    for c in comments:
-        body = c.body or ""
-        if c.user and c.user.login == "github-actions[bot]" and "AI Reviewer report" in body:
-            return body
-    return ""
+    return find_last_reviewer_comment(pr, repo_name)
 
 
 def get_ci_failures(repo, pr) -> List[Tuple[str, str]]:
     """
     Возвращает список (check_name, details_text) только для упавших checks на последнем коммите PR.
     """
-    commits = list(pr.get_commits())
-    if not commits:
-        return []
-    last_sha = commits[-1].sha
-    commit = repo.get_commit(last_sha)
+    # head SHA уже есть в объекте PR — список коммитов не нужен
+    commit = repo.get_commit(pr.head.sha)
 
     failures: List[Tuple[str, str]] = []
     try:
@@ -103,12 +107,9 @@ def get_ci_failures(repo, pr) -> List[Tuple[str, str]]:
             title = out.get("title") or ""
             summary = out.get("summary") or ""
             text = out.get("text") or ""
+            # полный текст: в промпт он попадёт уже сжатым (token_budget.compact_failures)
             details = "\n".join([title, summary, text]).strip()
 
-            # ограничим размер, чтобы не спалить токены
-            if len(details) > 4000:
-                details = details[:4000] + "\n...(truncated)..."
-
             if not details:
                 details = f"{name} failed (no output text available)."
 
@@ -117,6 +118,222 @@ def get_ci_failures(repo, pr) -> List[Tuple[str, str]]:
     return failures
 
 
+def merge_changes(base: List[dict], fixes: List[dict], paths: List[str]) -> List[dict]:
+    """
+    Заменяет в base все изменения для paths на исправленные: на месте первого изменения
+    пути встают все его исправления (у пути их может быть несколько — patch поверх
+    create), остальные старые изменения этого пути выбрасываются.
+    Изменения по другим путям из ответа починки игнорируются: исправные файлы не трогаем.
+    """
+    wanted = set(paths)
+    fixed: Dict[str, List[dict]] = {}
+    for ch in fixes:
+        if ch.get("path") in wanted:
+            fixed.setdefault(ch["path"], []).append(ch)
+    merged: List[dict] = []
+    for ch in base:
+        if ch["path"] not in wanted:
+            merged.append(ch)
+        else:
+            merged += fixed.pop(ch["path"], [])
+    for rest in fixed.values():
+        merged += rest
+    return merged
+
+
+def placeholder_repair_prompt(
+    *, changes: List[dict], findings: List[Finding], issue_title: str, context: str
+) -> str:
+    """Промпт починки: только файлы с заглушками, их прошлый вариант и строки с заглушками."""
+    bad = placeholder_paths(findings)
+    previous = json.dumps([ch for ch in changes if ch["path"] in bad], ensure_ascii=False)
+    return f"""
+    В твоём ответе заглушки в файлах: {bad}.
+    Строки с заглушками:
+    {describe(findings)}
+
+    Твой прошлый вариант этих изменений:
+    {previous}
+
+    Остальные изменения уже приняты — не присылай их.
+    Перепиши только эти файлы БЕЗ плейсхолдеров ("...", "…", "TODO", "TBD", "<...>", "[...]").
+
+    Верни ТОЛЬКО валидный JSON формата:
+    {{"summary": "...", "changes":[{{"path":"...", "action":"update|create|delete", "content":"..."}},
+    {{"path":"...", "action":"patch", "hunks":[{{"search":"...", "replace":"..."}}]}}]}}
+
+    Задача: {issue_title}
+    {context}
+    """
+
+
+def generate_patch(
+    *,
+    system: str,
+    user: str,
+    issue_title: str,
+    issue_body: str,
+    max_tokens: Optional[int] = None,
+    repair_context: str = "",
+    cache: Optional[PendingCache] = None,
+) -> Dict[str, Any]:
+    """
+    Запрашивает у модели JSON с изменениями (стримингом, с проверкой changes[] по мере
+    генерации). Файлы с заглушками перезапрашиваются точечно: исправные изменения
+    сохраняются, раунды починки ограничены числом и временем (Settings).
+    max_tokens — бюджет ответа; по умолчанию из Settings для текущей модели.
+    repair_context — замечания ревьюера/CI, которые нужны и при починке.
+    cache — при Settings.llm_cache_agent ответы модели копятся в нём; вызывающий
+    делает cache.commit(), когда изменения применились, — неудачный ответ не кэшируется.
+    """
+    max_tokens = max_tokens or budget_for_model().output_tokens
+    settings = get_settings()
+    # None — правило llm_client (только temperature=0); флаг включает кэш и для агента
+    use_cache = True if settings.llm_cache_agent and cache is not None else None
+    # стримим ответ: фатальные ошибки обрывают поток, заглушки копятся до конца ответа
+    validator = StreamValidator(abort_on_placeholder=False)
+    scanner = IncrementalJSONScanner(on_item=validator.on_item)
+    raw = yandexgpt_complete(
+        system=system,
+        user=user,
+        temperature=0.2,
+        max_tokens=max_tokens,
+        use_cache=use_cache,
+        cache_pending=cache,
+        stream=True,
+        on_delta=scanner.feed,
+    )
+
+    json_text = scanner.result() or extract_json(raw)
+    if not json_text:
+        raise RuntimeError(f"LLM did not return JSON. Raw (first 200): {raw[:200]!r}")
+
+    patch = json.loads(json_text)
+    changes = patch.get("changes")
+    if not isinstance(changes, list) or not changes:
+        raise RuntimeError(f"LLM returned no changes. Raw: {raw}")
+
+    # элементы, проверенные во время стрима, второй раз не сканируем
+    with span("validate"):
+        findings = validator.findings + validate_changes(changes[validator.checked :])
+    raise_for_fatal(findings)
+
+    deadline = time.monotonic() + settings.llm_repair_deadline
+    rounds = 0
+    while findings:
+        bad = placeholder_paths(findings)
+        if rounds >= settings.llm_repair_max_rounds or time.monotonic() > deadline:
+            raise RuntimeError(
+                f"Placeholders left after {rounds} repair round(s):\n{describe(findings)}"
+            )
+        rounds += 1
+        print(f"Placeholder repair round {rounds}: {bad}")
+        raw_fix = yandexgpt_complete(
+            system=system,
+            user=placeholder_repair_prompt(
+                changes=changes,
+                findings=findings,
+                issue_title=issue_title,
+                context=repair_context or issue_body,
+            ),
+            temperature=0.2,
+            max_tokens=max_tokens,
+            use_cache=use_cache,
+            cache_pending=cache,
+        )
+        json_fix = extract_json(raw_fix)
+        if not json_fix:
+            raise RuntimeError("LLM repair did not return JSON")
+        fixes = [ch for ch in json.loads(json_fix).get("changes", []) if ch.get("path") in bad]
+        # ответ починки проходит ту же проверку; файл, который модель не вернула, остаётся плохим
+        returned = {ch["path"] for ch in fixes}
+        left = [f for f in findings if f.path not in returned]
+        findings = validate_changes(fixes)
+        raise_for_fatal(findings)
+        findings += left
+        changes = merge_changes(changes, fixes, bad)
+
+    patch["changes"] = changes
+    return cast(Dict[str, Any], patch)
+
+
+def apply_changes(changes: List[dict], root: str = ".") -> None:
+    """
+    Применяет changes к рабочему дереву root. changes должны прийти из generate_patch:
+    пути, действия и заглушки там уже проверены patch_validator'ом.
+    Все новые содержимые сначала считаются в памяти: если хоть один hunk отклонён,
+    на диск не пишется ничего и дерево остаётся чистым.
+    """
+    planned: Dict[Path, Optional[str]] = {}  # None — удалить файл
+    for ch in changes:
+        path = ch["path"]
+        action = ch["action"]
+        p = Path(root) / path
+
+        if action == "delete":
+            planned[p] = None
+            continue
+
+        if action == "patch":
+            # patch поверх предыдущего изменения того же файла видит уже новое содержимое
+            current = planned[p] if p in planned else None
+            if p not in planned and p.is_file():
+                current = p.read_text(encoding="utf-8")
+            if current is None:
+                raise RuntimeError(f"Cannot patch missing file: {path}")
+            try:
+                planned[p] = apply_patch_change(current, ch)
+            except PatchError as e:
+                raise RuntimeError(f"Rejected patch from LLM: {e}") from e
+        else:
+            planned[p] = ch["content"]
+
+    for p, content in planned.items():
+        if content is None:
+            if p.exists():
+                p.unlink()
+            continue
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(content, encoding="utf-8")
+
+
+def verify_repair_prompt(
+    *,
+    issue_title: str,
+    issue_body: str,
+    failures: List[Tuple[str, str]],
+    paths: List[str],
+    root: str = ".",
+) -> str:
+    files = []
+    for path in paths:
+        p = Path(root) / path
+        if p.is_file():
+            files.append(f"----- FILE: {path} -----\n{p.read_text(encoding='utf-8')}")
+    files_block = "\n\n".join(files)
+    return f"""
+    Твои изменения применены, но локальная проверка (pytest/mypy) упала.
+    Исправь ошибки, не ломая то, что уже сделано.
+
+    Ошибки:
+    {compact_failures(failures, int(budget_for_model().input_tokens * CI_SHARE))}
+
+    Текущее содержимое изменённых файлов:
+    {files_block}
+
+    Задача:
+    TITLE: {issue_title}
+    BODY:
+    {issue_body}
+
+    Верни ТОЛЬКО валидный JSON формата:
+    {{"summary": "...", "changes":[{{"path":"...", "action":"update|create|delete", "content":"..."}},
+    {{"path":"...", "action":"patch", "hunks":[{{"search":"...", "replace":"..."}}]}}]}}
+    Запрещено использовать заглушки: "...", "…", "TODO", "TBD", "<...>", "[...]".
+    """
+
+
+@traced("run_issue_to_pr", attrs=("issue_number", "pr_number"))
 def run_issue_to_pr(
     *,
     issue_number: str,
@@ -126,6 +343,11 @@ def run_issue_to_pr(
     issue_title: str = "",
     issue_body: str = "",
     pr_number: str = "",
+    verify: bool = False,
+    workdir: str = ".",
+    git_env: Optional[Dict[str, str]] = None,
+    gh: Optional[Github] = None,
+    rest: Optional[GitHubREST] = None,
 ):
     """
     Главная бизнес-логика code-agent:
@@ -133,13 +355,17 @@ def run_issue_to_pr(
     - делает коммит (с маркерным файлом пока)
     - создает/обновляет PR
     - ставит ai-review-requested
+    verify=True — перед коммитом гоняет pytest/mypy локально и чинит ошибки в том же процессе.
+    workdir — рабочее дерево репозитория (процесс не делает chdir);
+    git_env — окружение git (токен для fetch/push, см. git_repo.token_auth_env);
+    gh/rest — уже прогретые клиенты долгоживущего воркера, иначе создаются новые.
     """
-    gh = Github(api_token)
+    gh = gh or github_client(api_token)
     repo = gh.get_repo(repo_name)
 
-    ensure_label(repo, LABEL_REVIEW_REQUESTED, "cfd3d7")
-    ensure_label(repo, LABEL_CHANGES_REQUESTED, "fbca04")
-    ensure_label(repo, LABEL_APPROVED, "0e8a16")
+    # чтения labels идут условными GET: неизменившиеся ответы (304) не тратят лимит
+    rest = rest or GitHubREST(api_token)
+    ensure_review_labels(rest, repo_name)
 
     # --- ITERATION MODE: если пришли из PR Fix, у нас есть PR_NUMBER ---
     pr = None
@@ -151,31 +377,60 @@ def run_issue_to_pr(
         issue_title = issue_title or pr.title or ""
         issue_body = issue_body or (pr.body or "")
 
-        # checkout нужной ветки
-    if pr is not None:
-        run(f"git fetch origin {branch}")
-        run(f"git checkout {branch} || git checkout -b {branch} origin/{branch}")
-        run(f"git pull --rebase origin {branch}")
-    else:
-        run(f"git checkout {base_branch}")
-        run(f"git pull origin {base_branch}")
-        run(f"git checkout -B {branch}")
-
-    reviewer_comment = ""
-    ci_failures = []
-
-    if pr is not None:
-        reviewer_comment = get_last_reviewer_comment(pr)
-        ci_failures = get_ci_failures(repo, pr)
-
-    ci_block = ""
-    if ci_failures:
-        parts = []
-        for name, details in ci_failures:
-            parts.append(f"## CHECK FAILED: {name}\n{details}")
-        ci_block = "\n\n".join(parts)
+    with span("checkout"):
+        # checkout нужной ветки: fetch только её и `checkout -B` от свежего origin
+        git = GitRepo(workdir, env=git_env)
+        fetch_depth = int(os.environ.get("AGENT_FETCH_DEPTH") or 0) or None
+        if pr is not None:
+            git.checkout_from_remote(branch, branch, depth=fetch_depth)
+        else:
+            git.checkout_from_remote(branch, base_branch, depth=fetch_depth)
+
+    with span("context"):
+        reviewer_comment = ""
+        ci_failures = []
+
+        if pr is not None:
+            # один GraphQL-запрос вместо пагинации комментариев/коммитов; REST — запасной путь
+            snapshot = fetch_pr_snapshot(api_token, repo_name, pr.number)
+            if snapshot is not None:
+                reviewer_comment = snapshot.last_reviewer_comment
+                ci_failures = snapshot.ci_failures()
+            else:
+                reviewer_comment = get_last_reviewer_comment(pr, repo_name)
+                ci_failures = get_ci_failures(repo, pr)
+
+        # --- бюджет токенов: секции промпта сжимаются под вход модели, ответу — свой лимит ---
+        budget = budget_for_model()
+        plan = plan_prompt(
+            budget,
+            issue_body=issue_body,
+            reviewer_comment=reviewer_comment,
+            ci_failures=ci_failures,
+        )
+        issue_body, reviewer_comment, ci_block = (
+            plan.issue_body,
+            plan.reviewer_comment,
+            plan.ci_block,
+        )
+
+        # --- контекст репозитория: релевантные файлы в оставшейся части бюджета ---
+        index = RepoIndex(workdir).refresh()
+        repo_context = index.pack(
+            "\n".join([issue_title, issue_body, reviewer_comment, ci_block]),
+            plan.context_tokens,
+            exclude=PROTECTED_PREFIXES,
+        )
+        print(
+            f"Repo index: {len(index.entries)} files, {index.reindexed} reindexed; "
+            f"budget {budget.model}: input {budget.input_tokens}, output {budget.output_tokens}"
+        )
 
     system = "Ты агент-разработчик. Верни только валидный JSON без пояснений."
+    # что нужно помнить и при точечной починке заглушек
+    repair_context = "\n\n".join(
+        part for part in (issue_body, reviewer_comment, ci_block) if part.strip()
+    )
 
     user = f"""
     Задача (Issue/PR контекст):
@@ -190,6 +445,9 @@ def run_issue_to_pr(
     Ошибки CI (если есть):
     {ci_block}
 
+    Текущее содержимое релевантных файлов репозитория:
+    {repo_context}
+
     Сгенерируй изменения, чтобы:
     - выполнить требования задачи
     - исправить замечания ревьюера
@@ -199,7 +457,8 @@ def run_issue_to_pr(
     {{
     "summary": "что сделано (1-3 предложения)",
     "changes": [
-        {{"path":"...", "action":"create|update|delete", "content":"полный новый контент файла для create/update"}}
+        {{"path":"...", "action":"create|update|delete", "content":"полный новый контент файла для create/update"}},
+        {{"path":"...", "action":"patch", "hunks":[{{"search":"точный фрагмент из файла", "replace":"новый фрагмент"}}]}}
     ]
     }}
 
@@ -210,121 +469,90 @@ def run_issue_to_pr(
     - Не изменяй файлы внутри папок code_agent/ и reviewer_agent/.
     - Для Python-кода сразу соблюдай стиль, совместимый с ruff и black.
     - Если CI упал — приоритет исправить CI.
+    - Для существующих файлов предпочитай action "patch": search — фрагмент, который встречается
+      в файле ровно один раз (дословно, с отступами), replace — его замена.
+      Полный content присылай только для новых файлов или полной переписи.
     """
 
-    raw = yandexgpt_complete(system=system, user=user, temperature=0.2, max_tokens=2200)
-    json_text = extract_json(raw)
-    if not json_text:
-        raise RuntimeError(f"LLM did not return JSON. Raw (first 200): {raw[:200]!r}")
-
-    patch = json.loads(json_text)
-    summary = (patch.get("summary") or "").strip()
-    changes = patch.get("changes") or []
-    if not changes:
-        raise RuntimeError("LLM returned no changes")
-
-    def contains_placeholders(s: str) -> bool:
-        bad = ["...", "…", "TODO", "TBD", "<...>", "[...]"]
-        s_up = s.upper()
-        return any(b in s for b in bad) or any(b in s_up for b in ["TODO", "TBD"])
-
-    # проверяем все create/update content
-    bad_files = []
-    for ch in patch.get("changes", []):
-        action = ch.get("action")
-        path = ch.get("path", "unknown")
-
-        if action not in ALLOWED_ACTIONS:
-            raise RuntimeError(f"Unsupported action from LLM: {action}")
-
-        if not is_safe_relative_path(path):
-            raise RuntimeError(f"Unsafe path from LLM: {path}")
-
-        if action in ("create", "update"):
-            content = ch.get("content", "")
-            if contains_placeholders(content):
-                bad_files.append(path)
-
-    if bad_files:
-        # повторный запрос: "перепиши без заглушек"
-        repair_user = f"""
-    Ты вернул заглушки в файлах: {bad_files}.
-    Нужно переписать контент БЕЗ плейсхолдеров ("...", "…", "TODO", "TBD", "<...>", "[...]").
-
-    Верни ТОЛЬКО валидный JSON формата:
-    {{"summary": "...", "changes":[{{"path":"...", "action":"update|create|delete", "content":"..."}}]}}
-
-    Задача:
-    TITLE: {issue_title}
-    BODY:
-    {issue_body}
-    """
-        raw3 = yandexgpt_complete(
-            system=system, user=repair_user, temperature=0.2, max_tokens=2200
-        ).strip()
-        json_text3 = extract_json(raw3)
-        if not json_text3:
-            raise RuntimeError("LLM retry did not return JSON")
-        patch = json.loads(json_text3)
+    # ответы модели попадут в кэш, только если изменения применились
+    llm_cache = PendingCache()
+    with span("generate"):
+        patch = generate_patch(
+            system=system,
+            user=user,
+            issue_title=issue_title,
+            issue_body=issue_body,
+            max_tokens=budget.output_tokens,
+            repair_context=repair_context,
+            cache=llm_cache,
+        )
 
     summary = patch.get("summary", "").strip()
-    changes = patch.get("changes", [])
-    if not isinstance(changes, list) or not changes:
-        raise RuntimeError(f"LLM returned no changes. Raw: {raw}")
+    changes = patch["changes"]
 
     # --- применяем изменения ---
-    for ch in changes:
-        path = ch["path"]
-        action = ch["action"]
-
-        if action not in ALLOWED_ACTIONS:
-            raise RuntimeError(f"Unsupported action from LLM: {action}")
-        if not is_safe_relative_path(path):
-            raise RuntimeError(f"Unsafe path from LLM: {path}")
-
-        p = Path(path)
-
-        if action == "delete":
-            if p.exists():
-                p.unlink()
-            continue
-
-        content = ch.get("content")
-        if content is None:
-            raise RuntimeError(f"Missing content for {action} {path}")
-        if contains_placeholders(content):
-            raise RuntimeError(f"Refusing to write placeholder content for {path}")
-
-        if path.startswith("code_agent/") or path.startswith("reviewer_agent/"):
-            raise RuntimeError(f"Refusing to modify agent internals directly: {path}")
-        p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(content, encoding="utf-8")
-
-    # --- автофикс стиля и линтера перед коммитом ---
-    try:
-        run("python -m ruff check . --fix")
-    except Exception as e:
-        print(f"ruff --fix failed: {e}")
-
-    try:
-        run("python -m black .")
-    except Exception as e:
-        print(f"black failed: {e}")
-
-    run("git config user.name 'code-agent'")
-    run("git config user.email 'code-agent@users.noreply.github.com'")
-
-    run("git add -A")
-
-    result = subprocess.run("git diff --cached --quiet", shell=True)
-    has_changes = result.returncode != 0
-
-    if not has_changes:
+    with span("apply"):
+        apply_changes(changes, root=workdir)
+    llm_cache.commit()
+
+    # --- автофикс стиля и линтера: только изменённые Python-файлы ---
+    with span("format"):
+        format_paths((ch["path"] for ch in changes if ch["action"] != "delete"), root=workdir)
+
+    changed_paths = {ch["path"] for ch in changes}
+
+    # --- локальная проверка: ошибки чиним здесь же, не дожидаясь CI ---
+    with span("verify", enabled=verify):
+        if verify:
+            failures = verify_changes(changed_paths, root=workdir)
+            rounds = 0
+            while failures and rounds < VERIFY_REPAIR_ROUNDS:
+                rounds += 1
+                print(
+                    f"Local verification failed: {[n for n, _ in failures]}, repair round {rounds}"
+                )
+                repair = generate_patch(
+                    system=system,
+                    user=verify_repair_prompt(
+                        issue_title=issue_title,
+                        issue_body=issue_body,
+                        failures=failures,
+                        paths=sorted(changed_paths),
+                        root=workdir,
+                    ),
+                    issue_title=issue_title,
+                    issue_body=issue_body,
+                    max_tokens=budget.output_tokens,
+                    repair_context=repair_context,
+                    cache=llm_cache,
+                )
+                summary = repair.get("summary", "").strip() or summary
+                apply_changes(repair["changes"], root=workdir)
+                llm_cache.commit()
+                format_paths(
+                    (ch["path"] for ch in repair["changes"] if ch["action"] != "delete"),
+                    root=workdir,
+                )
+                changed_paths |= {ch["path"] for ch in repair["changes"]}
+                failures = verify_changes(changed_paths, root=workdir)
+            if failures:
+                print("Local verification still failing; pushing anyway, CI will report details.")
+            else:
+                print("Local verification passed.")
+
+    # индексируем только файлы из changes, а не весь репозиторий
+    git.stage(changed_paths)
+
+    if not git.has_staged_changes():
         print("No staged changes. Exiting without commit/push.")
+        print(git.timings_report())
         return
 
-    run(f"git commit -m 'chore: agent update for issue #{issue_number}'")
-    run(f"git push origin {branch}")
+    with span("commit"):
+        git.commit(f"chore: agent update for issue #{issue_number}")
+    with span("push"):
+        git.push(branch)
+    print(git.timings_report())
 
     pr_title = f"Auto-fix for issue #{issue_number}"
     pr_body = (
@@ -341,34 +569,24 @@ def run_issue_to_pr(
     owner = repo_name.split("/")[0]
     head_full = f"{owner}:{branch}"
 
-    pr = get_existing_pr(repo, head_full=head_full, base=base_branch)
-    if pr is None:
-        pr = repo.create_pull(
-            title=pr_title,
-            body=pr_body,
-            head=branch,
-            base=base_branch,
-        )
-        print("PR created:", pr.html_url)
-    else:
-        pr.edit(body=pr_body)
-        print("PR already exists:", pr.html_url)
-
-        # --- labels: после любых изменений всегда запрашиваем новое ревью ---
-    labels_now = {label.name for label in pr.get_labels()}
-
-    # если были запрошены изменения — мы сделали новую попытку
-    if LABEL_CHANGES_REQUESTED in labels_now:
-        pr.remove_from_labels(LABEL_CHANGES_REQUESTED)
-
-    # если вдруг был approved — новая попытка отменяет approved
-    if LABEL_APPROVED in labels_now:
-        pr.remove_from_labels(LABEL_APPROVED)
-
-    # пересчитываем после removals
-    labels_now = {label.name for label in pr.get_labels()}
-    if LABEL_REVIEW_REQUESTED not in labels_now:
-        pr.add_to_labels(LABEL_REVIEW_REQUESTED)
+    with span("pr"):
+        pr = get_existing_pr(repo, head_full=head_full, base=base_branch)
+        if pr is None:
+            pr = repo.create_pull(
+                title=pr_title,
+                body=pr_body,
+                head=branch,
+                base=base_branch,
+            )
+            print("PR created:", pr.html_url)
+        else:
+            pr.edit(body=pr_body)
+            print("PR already exists:", pr.html_url)
+
+    # --- labels: новая попытка всегда запрашивает новое ревью ---
+    # (снимает changes-requested/approved и ставит review-requested одним PUT)
+    with span("labels"):
+        apply_transition(rest, repo_name, pr.number, "submit")
 
     pr.create_issue_comment(
         "🤖 Code Agent: изменения отправлены, запрашиваю AI review (`ai-review-requested`)."
@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from github import Github
+
+from code_agent.agent import run_issue_to_pr
+from code_agent.git_repo import GitRepo
+from core.github_rest import GitHubREST, github_client
+
+
+@dataclass
+class IssueResult:
+    number: str
+    seconds: float
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+
+def parse_issue_list(value: str) -> List[str]:
+    """'3,5,10-12' -> ['3', '5', '10', '11', '12'] без повторов, в исходном порядке."""
+    numbers: List[str] = []
+    for part in value.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            numbers += [str(n) for n in range(int(start), int(end) + 1)]
+        else:
+            numbers.append(str(int(part)))
+    return list(dict.fromkeys(numbers))
+
+
+def query_issues(gh: Github, repo_name: str, query: str) -> List[str]:
+    """Открытые issues репозитория по поисковому запросу GitHub, например 'label:backfill'."""
+    found = gh.search_issues(f"repo:{repo_name} is:issue is:open {query}")
+    return [str(issue.number) for issue in found]
+
+
+def format_report(results: List[IssueResult], wall: float) -> str:
+    lines = ["batch results:"]
+    for r in results:
+        status = "ok" if r.ok else f"FAILED: {r.error}"
+        lines.append(f"  #{r.number:<8} {r.seconds:8.1f} s  {status}")
+    done = sum(1 for r in results if r.ok)
+    busy = sum(r.seconds for r in results)
+    per_minute = len(results) / wall * 60 if wall else 0.0
+    lines.append(
+        f"  {done}/{len(results)} succeeded in {wall:.1f} s wall "
+        f"({per_minute:.1f} issues/min, {busy / wall if wall else 0.0:.1f}x vs serial)"
+    )
+    return "\n".join(lines)
+
+
+def run_batch(
+    *,
+    issues: List[str],
+    repo_name: str,
+    api_token: str,
+    base_branch: str = "main",
+    workers: int = 4,
+    verify: bool = False,
+    root: str = ".",
+    runner: Callable[..., Any] = run_issue_to_pr,
+    gh: Optional[Github] = None,
+) -> List[IssueResult]:
+    """
+    Прогоняет run_issue_to_pr по нескольким issues параллельно.
+    Каждая issue работает в своём git worktree во временной директории, поэтому
+    checkout'ы не мешают друг другу; ожидание LLM одной issue перекрывается
+    git/GitHub I/O других. Клиенты GitHub общие на весь batch.
+    """
+    gh = gh or github_client(api_token)
+    rest = GitHubREST(api_token)
+    repo = gh.get_repo(repo_name)
+    main_repo = GitRepo(root)
+    tmp = tempfile.mkdtemp(prefix="code-agent-batch-")
+    # `git worktree add/remove` правят общий .git/worktrees — по одному за раз
+    worktree_lock = threading.Lock()
+
+    def process(number: str) -> IssueResult:
+        started = time.perf_counter()
+        path = os.path.join(tmp, f"issue-{number}")
+        try:
+            with worktree_lock:
+                main_repo.add_worktree(path)
+            issue = repo.get_issue(int(number))
+            runner(
+                issue_number=number,
+                repo_name=repo_name,
+                api_token=api_token,
+                base_branch=base_branch,
+                issue_title=issue.title or "",
+                issue_body=issue.body or "",
+                verify=verify,
+                workdir=path,
+                gh=gh,
+                rest=rest,
+            )
+            return IssueResult(number, time.perf_counter() - started)
+        except Exception as e:
+            print(f"Issue #{number} failed: {type(e).__name__}: {e}")
+            return IssueResult(number, time.perf_counter() - started, f"{type(e).__name__}: {e}")
+        finally:
+            with worktree_lock:
+                main_repo.remove_worktree(path)
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = list(pool.map(process, issues))
+    finally:
+        main_repo.git("worktree", "prune", step="worktree prune", check=False)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(format_report(results, time.perf_counter() - started))
+    return results
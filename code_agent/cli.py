@@ -1,7 +1,8 @@
 import argparse
 import os
 
-from code_agent.agent import run_issue_to_pr
+# тяжёлые модули (PyGithub, pydantic, агент) импортируются только в ветке нужной
+# команды: `--help` и ошибки аргументов не должны платить за их загрузку
 
 
 def env_or(value: str | None, env_name: str, required: bool = True) -> str:
@@ -30,19 +31,65 @@ def build_parser() -> argparse.ArgumentParser:
     run.add_argument("--issue-body", dest="issue_body", default="", help="Issue body")
 
     run.add_argument("--pr", dest="pr_number", help="Pull request number for iteration mode")
+    run.add_argument(
+        "--verify",
+        action="store_true",
+        help="Run affected tests and mypy locally before pushing (env: AGENT_VERIFY=1)",
+    )
 
     run.add_argument(
         "--api-token",
         dest="api_token",
         help="Token used for GitHub API (fallback env: GH_API_TOKEN then GITHUB_TOKEN)",
     )
+
+    batch = sub.add_parser("run-batch", help="Run several issues concurrently")
+    batch.add_argument("--issues", help="Issue numbers: 3,5,10-12")
+    batch.add_argument("--query", help="GitHub search qualifiers, e.g. 'label:backfill'")
+    batch.add_argument("--repo", dest="repo_name", help="owner/repo")
+    batch.add_argument("--base", dest="base_branch", default="main", help="Base branch")
+    batch.add_argument("--workers", type=int, default=4, help="Concurrent issues (default: 4)")
+    batch.add_argument("--verify", action="store_true", help="Same as run --verify")
+    batch.add_argument("--api-token", dest="api_token", help="Same as run --api-token")
+
+    serve = sub.add_parser("serve", help="Run a persistent worker that processes queued jobs")
+    serve.add_argument("--queue", help="SQLite queue path (env: AGENT_QUEUE)")
+    serve.add_argument("--workers", type=int, default=2, help="Concurrent jobs (default: 2)")
+    serve.add_argument("--workdir", help="Workspaces directory (env: AGENT_WORKDIR)")
+    serve.add_argument(
+        "--metrics-port", type=int, default=0, help="Serve GET /metrics on this port (0: off)"
+    )
+    serve.add_argument("--poll-interval", type=float, default=1.0, help="Queue poll seconds")
+    serve.add_argument("--once", action="store_true", help="Exit when the queue is drained")
+    serve.add_argument("--verify", action="store_true", help="Same as run --verify")
+    serve.add_argument("--api-token", dest="api_token", help="Same as run --api-token")
+
+    enqueue = sub.add_parser("enqueue", help="Queue a job or replay webhook payloads from disk")
+    enqueue.add_argument("--queue", help="SQLite queue path (env: AGENT_QUEUE)")
+    enqueue.add_argument("--event", help="Webhook event name, e.g. issues or pull_request")
+    enqueue.add_argument("--payload", nargs="*", default=[], help="Webhook payload JSON file(s)")
+    enqueue.add_argument("--kind", choices=["issue", "fix", "review"], help="Job kind")
+    enqueue.add_argument("--repo", dest="repo_name", help="owner/repo")
+    enqueue.add_argument("--issue", dest="issue_number", help="Issue number")
+    enqueue.add_argument("--pr", dest="pr_number", help="Pull request number")
     return p
 
 
+def api_token_from(args: argparse.Namespace) -> str:
+    api_token = (
+        args.api_token or os.environ.get("GH_API_TOKEN") or os.environ.get("GITHUB_TOKEN", "")
+    )
+    if not api_token:
+        raise SystemExit("Missing api token: provide --api-token or set GH_API_TOKEN/GITHUB_TOKEN")
+    return api_token
+
+
 def main(argv: list[str] | None = None) -> int:
     args = build_parser().parse_args(argv)
 
     if args.command == "run":
+        from code_agent.agent import run_issue_to_pr
+
         issue_number = env_or(args.issue_number, "ISSUE_NUMBER")
         repo_name = env_or(args.repo_name, "GITHUB_REPOSITORY")
         base_branch = args.base_branch
@@ -50,14 +97,7 @@ def main(argv: list[str] | None = None) -> int:
         issue_title = args.issue_title or os.environ.get("ISSUE_TITLE", "")
         issue_body = args.issue_body or os.environ.get("ISSUE_BODY", "")
 
-        api_token = (
-            args.api_token or os.environ.get("GH_API_TOKEN") or os.environ.get("GITHUB_TOKEN", "")
-        )
-
-        if not api_token:
-            raise SystemExit(
-                "Missing api token: provide --api-token or set GH_API_TOKEN/GITHUB_TOKEN"
-            )
+        api_token = api_token_from(args)
 
         pr_number = args.pr_number or os.environ.get("PR_NUMBER", "")
 
@@ -69,9 +109,87 @@ def main(argv: list[str] | None = None) -> int:
             issue_title=issue_title,
             issue_body=issue_body,
             pr_number=pr_number,
+            verify=args.verify or os.environ.get("AGENT_VERIFY", "") == "1",
         )
         return 0
 
+    if args.command == "run-batch":
+        from code_agent.batch import parse_issue_list, query_issues, run_batch
+        from core.github_rest import github_client
+
+        if not args.issues and not args.query:
+            raise SystemExit("run-batch needs --issues or --query")
+        repo_name = env_or(args.repo_name, "GITHUB_REPOSITORY")
+        api_token = api_token_from(args)
+        gh = github_client(api_token)
+        issues = parse_issue_list(args.issues or "")
+        if args.query:
+            issues += [n for n in query_issues(gh, repo_name, args.query) if n not in issues]
+        if not issues:
+            print("No issues matched.")
+            return 0
+
+        results = run_batch(
+            issues=issues,
+            repo_name=repo_name,
+            api_token=api_token,
+            base_branch=args.base_branch,
+            workers=args.workers,
+            verify=args.verify or os.environ.get("AGENT_VERIFY", "") == "1",
+            gh=gh,
+        )
+        return 0 if all(r.ok for r in results) else 1
+
+    if args.command == "serve":
+        from code_agent.daemon import AgentDaemon, start_metrics_server
+        from code_agent.job_queue import JobQueue
+
+        daemon = AgentDaemon(
+            JobQueue(args.queue),
+            api_token_from(args),
+            workers=args.workers,
+            workdir=args.workdir,
+            verify=args.verify or os.environ.get("AGENT_VERIFY", "") == "1",
+        )
+        if args.metrics_port:
+            start_metrics_server(daemon, args.metrics_port)
+            print(f"Metrics: http://127.0.0.1:{args.metrics_port}/metrics")
+        try:
+            daemon.serve(poll_interval=args.poll_interval, once=args.once)
+        except KeyboardInterrupt:
+            daemon.stop()
+        return 0
+
+    if args.command == "enqueue":
+        import json
+
+        from code_agent.job_queue import JobQueue, job_from_event
+
+        queue = JobQueue(args.queue)
+        jobs = []
+        for path in args.payload:
+            if not args.event:
+                raise SystemExit("--event is required with --payload")
+            with open(path, encoding="utf-8") as f:
+                job = job_from_event(args.event, json.load(f))
+            if job is None:
+                print(f"{path}: event ignored")
+            else:
+                jobs.append(job)
+        if args.kind:
+            payload = {"issue_number": args.issue_number or "", "pr_number": args.pr_number or ""}
+            jobs.append(
+                {
+                    "kind": args.kind,
+                    "repo": env_or(args.repo_name, "GITHUB_REPOSITORY"),
+                    "payload": {k: v for k, v in payload.items() if v},
+                }
+            )
+        for job in jobs:
+            job_id = queue.enqueue(job["kind"], job["repo"], job["payload"])
+            print(f"Queued job {job_id}: {job['kind']} {job['repo']} {job['payload']}")
+        return 0
+
     return 1
 
 
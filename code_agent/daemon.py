@@ -0,0 +1,237 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional
+
+from code_agent.agent import run_issue_to_pr
+from code_agent.git_repo import GitRepo, token_auth_env
+from code_agent.job_queue import Job, JobQueue
+from core.github_rest import GitHubREST, github_client
+
+DEFAULT_WORKDIR = "~/.cache/code-agent/workspaces"
+# без токена в URL: он передаётся git через env (token_auth_env)
+CLONE_URL = "https://github.com/{repo}.git"
+LATENCY_SAMPLES = 1000
+
+
+def _percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return float(ordered[min(len(ordered) - 1, int(q * len(ordered)))])
+
+
+class DaemonMetrics:
+    """Счётчики и задержки задач (ожидание в очереди и выполнение) для /metrics."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.done = 0
+        self.failed = 0
+        self.running = 0
+        self.wait: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.run: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def started(self, job: Job) -> None:
+        with self._lock:
+            self.running += 1
+            self.wait.append(job.started_at - job.enqueued_at)
+
+    def finished(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.running -= 1
+            self.run.append(seconds)
+            if ok:
+                self.done += 1
+            else:
+                self.failed += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            wait, run = list(self.wait), list(self.run)
+            return {
+                "running": self.running,
+                "done": self.done,
+                "failed": self.failed,
+                "queue_wait_p50": _percentile(wait, 0.5),
+                "queue_wait_p95": _percentile(wait, 0.95),
+                "job_latency_p50": _percentile(run, 0.5),
+                "job_latency_p95": _percentile(run, 0.95),
+            }
+
+
+class AgentDaemon:
+    """
+    Постоянный воркер вместо отдельного runner'а на каждое событие:
+    клиенты GitHub и пул соединений LLM (keep-alive, кэш ответов) создаются один раз,
+    задачи из JobQueue выполняются параллельно в workers потоках.
+    Одна ветка — одна задача за раз (lock_key в очереди), клон репозитория — под
+    блокировкой репозитория; каждая ветка работает в своём рабочем дереве.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        token: str,
+        *,
+        workers: int = 2,
+        workdir: Optional[str] = None,
+        clone_url: str = CLONE_URL,
+        verify: bool = False,
+        handlers: Optional[Dict[str, Callable[[Job], Any]]] = None,
+    ):
+        self.queue = queue
+        self.token = token
+        self.workers = workers
+        self.workdir = Path(
+            os.path.expanduser(workdir or os.environ.get("AGENT_WORKDIR") or DEFAULT_WORKDIR)
+        )
+        self.clone_url = clone_url
+        self.verify = verify
+        self.git_env = token_auth_env(token)
+        self.gh = github_client(token)
+        self.rest = GitHubREST(token)
+        self.metrics = DaemonMetrics()
+        self.handlers = handlers or {
+            "issue": self._run_code_agent,
+            "fix": self._run_code_agent,
+            "review": self._run_review,
+        }
+        self._repo_locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._slots = threading.Semaphore(workers)
+        self._stop = threading.Event()
+
+    def _repo_lock(self, repo: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._repo_locks.setdefault(repo, threading.Lock())
+
+    def workspace(self, job: Job) -> str:
+        """
+        Рабочее дерево ветки: clone с --reference на общий bare-клон репозитория,
+        чтобы объекты скачивались один раз, а refs у веток были независимы.
+        Дерево переиспользуется между задачами ветки, поэтому перед каждой задачей
+        сбрасывается: упавшая задача могла оставить правки, и checkout следующей не прошёл бы.
+        """
+        repo_dir = self.workdir / job.repo.replace("/", "__")
+        seed = repo_dir / "seed.git"
+        url = self.clone_url.format(repo=job.repo)
+        with self._repo_lock(job.repo):
+            if not seed.exists():
+                repo_dir.mkdir(parents=True, exist_ok=True)
+                GitRepo(str(repo_dir), env=self.git_env).git(
+                    "clone", "--bare", "--quiet", url, seed.name
+                )
+
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", job.lock_key.split("#", 1)[1])
+        tree = repo_dir / slug
+        if tree.exists():
+            GitRepo(str(tree)).discard_changes()
+        else:
+            GitRepo(str(repo_dir), env=self.git_env).git(
+                "clone", "--quiet", "--no-checkout", "--reference", str(seed), url, slug
+            )
+        return str(tree)
+
+    def _run_code_agent(self, job: Job) -> None:
+        p = job.payload
+        run_issue_to_pr(
+            issue_number=p.get("issue_number") or p.get("pr_number") or "",
+            repo_name=job.repo,
+            api_token=self.token,
+            base_branch=p.get("base_branch") or "main",
+            issue_title=p.get("issue_title") or "",
+            issue_body=p.get("issue_body") or "",
+            pr_number=p.get("pr_number") or "",
+            verify=self.verify,
+            workdir=self.workspace(job),
+            git_env=self.git_env,
+            gh=self.gh,
+            rest=self.rest,
+        )
+
+    def _run_review(self, job: Job) -> None:
+        # импорт здесь: reviewer нужен только задачам review
+        from reviewer_agent.review import review_pr
+
+        # воркер не держит слот, пока идёт CI: завершение check suite придёт webhook'ом
+        # и поставит ревью в очередь заново (job_from_event)
+        review_pr(
+            self.token,
+            job.repo,
+            int(job.payload["pr_number"]),
+            gh=self.gh,
+            rest=self.rest,
+            ci_timeout=0,
+        )
+
+    def _execute(self, job: Job) -> None:
+        self.metrics.started(job)
+        started = time.perf_counter()
+        error = ""
+        try:
+            self.handlers[job.kind](job)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"Job {job.id} ({job.kind} {job.lock_key}) failed: {error}")
+        finally:
+            seconds = time.perf_counter() - started
+            self.queue.finish(job.id, error)
+            self.metrics.finished(seconds, ok=not error)
+            self._slots.release()
+            print(f"Job {job.id} ({job.kind} {job.lock_key}) finished in {seconds:.1f}s")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def serve(self, poll_interval: float = 1.0, once: bool = False) -> None:
+        """
+        Главный цикл: берёт задачи, пока есть свободные потоки.
+        once=True — выйти, когда очередь опустеет (для тестов и разовых прогонов).
+        """
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"Re-queued {recovered} interrupted job(s)")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while not self._stop.is_set():
+                self._slots.acquire()
+                job = self.queue.claim()
+                if job is None:
+                    self._slots.release()
+                    if once and self.metrics.running == 0 and not self.queue.depth().get("queued"):
+                        break
+                    self._stop.wait(poll_interval)
+                    continue
+                pool.submit(self._execute, job)
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        return {"queue": self.queue.depth(), **self.metrics.snapshot()}
+
+
+def start_metrics_server(daemon: AgentDaemon, port: int, host: str = "127.0.0.1"):
+    """GET /metrics — глубина очереди и задержки задач в JSON."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = json.dumps(daemon.metrics_snapshot()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from core.labels import LABEL_CHANGES_REQUESTED, LABEL_REVIEW_REQUESTED
+
+DEFAULT_QUEUE_PATH = "~/.cache/code-agent/queue.sqlite3"
+JOB_KINDS = ("issue", "fix", "review")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    lock_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    error TEXT NOT NULL DEFAULT '',
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    repo: str
+    lock_key: str
+    payload: Dict[str, Any]
+    enqueued_at: float
+    started_at: float = 0.0
+
+
+def lock_key_for(kind: str, repo: str, payload: Dict[str, Any]) -> str:
+    """
+    Ключ блокировки — ветка: задача по issue, правка PR и ревью одной ветки
+    не выполняются одновременно.
+    """
+    if kind == "issue":
+        return f"{repo}#agent/issue-{payload['issue_number']}"
+    branch = payload.get("branch") or f"pr-{payload['pr_number']}"
+    return f"{repo}#{branch}"
+
+
+def job_from_event(event: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Webhook GitHub -> описание задачи (kind, repo, payload) — те же события,
+    на которые подписаны workflow. None — событие агентам не интересно.
+    """
+    repo = (payload.get("repository") or {}).get("full_name") or ""
+    action = payload.get("action") or ""
+    label = (payload.get("label") or {}).get("name") or ""
+
+    if event == "issues" and action == "opened" and "pull_request" not in payload["issue"]:
+        issue = payload["issue"]
+        return {
+            "kind": "issue",
+            "repo": repo,
+            "payload": {
+                "issue_number": str(issue["number"]),
+                "issue_title": issue.get("title") or "",
+                "issue_body": issue.get("body") or "",
+            },
+        }
+
+    if event in ("pull_request", "pull_request_target"):
+        pr = payload["pull_request"]
+        job_payload = {"pr_number": str(pr["number"]), "branch": pr["head"]["ref"]}
+        if action == "labeled" and label == LABEL_CHANGES_REQUESTED:
+            job_payload.update(issue_title=pr.get("title") or "", issue_body=pr.get("body") or "")
+            return {"kind": "fix", "repo": repo, "payload": job_payload}
+        if action in ("opened", "synchronize", "reopened") or (
+            action == "labeled" and label == LABEL_REVIEW_REQUESTED
+        ):
+            return {"kind": "review", "repo": repo, "payload": job_payload}
+
+    # CI завершился — ревью, отложенное из-за pending, получает вердикт сразу
+    # (ветка агента открыта ровно в одном PR, берём первый)
+    prs = (payload.get("check_suite") or {}).get("pull_requests") or []
+    if event == "check_suite" and action == "completed" and prs:
+        job_payload = {"pr_number": str(prs[0]["number"]), "branch": prs[0]["head"]["ref"]}
+        return {"kind": "review", "repo": repo, "payload": job_payload}
+    return None
+
+
+class JobQueue:
+    """
+    Очередь задач агента в SQLite (stdlib): переживает перезапуск воркера,
+    несколько процессов могут брать задачи из одного файла.
+    Задача не выдаётся, пока по её ветке выполняется другая (lock_key).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        path = path or os.environ.get("AGENT_QUEUE") or DEFAULT_QUEUE_PATH
+        self.path = Path(os.path.expanduser(path))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # соединение на операцию: воркеры живут в разных потоках
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def enqueue(self, kind: str, repo: str, payload: Dict[str, Any]) -> int:
+        """
+        Ставит задачу в очередь. Если такая же задача по той же ветке ещё ждёт —
+        возвращает её id: пачка webhook'ов (labeled + synchronize) даёт один запуск.
+        """
+        if kind not in JOB_KINDS:
+            raise RuntimeError(f"Unknown job kind: {kind}")
+        key = lock_key_for(kind, repo, payload)
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' AND kind = ? AND lock_key = ?",
+                (kind, key),
+            ).fetchone()
+            if row:
+                db.execute(
+                    "UPDATE jobs SET payload = ? WHERE id = ?", (json.dumps(payload), row[0])
+                )
+                db.execute("COMMIT")
+                return int(row[0])
+            cur = db.execute(
+                "INSERT INTO jobs (kind, repo, lock_key, payload, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, repo, key, json.dumps(payload), time.time()),
+            )
+            db.execute("COMMIT")
+            return int(cur.lastrowid or 0)
+
+    def claim(self) -> Optional[Job]:
+        """Самая старая задача, ветка которой сейчас свободна; помечается running."""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("""
+                SELECT id, kind, repo, lock_key, payload, enqueued_at FROM jobs
+                WHERE status = 'queued' AND lock_key NOT IN
+                    (SELECT lock_key FROM jobs WHERE status = 'running')
+                ORDER BY id LIMIT 1
+                """).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            started = time.time()
+            db.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (started, row[0])
+            )
+            db.execute("COMMIT")
+        return Job(row[0], row[1], row[2], row[3], json.loads(row[4]), row[5], started)
+
+    def finish(self, job_id: int, error: str = "") -> None:
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                ("failed" if error else "done", error[:2000], time.time(), job_id),
+            )
+
+    def recover(self) -> int:
+        """После падения воркера незавершённые задачи возвращаются в очередь."""
+        with self._connect() as db:
+            cur = db.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+            return cur.rowcount
+
+    def depth(self) -> Dict[str, int]:
+        with self._connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
@@ -0,0 +1,99 @@
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+_KEY_BEFORE_VALUE = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*$')
+
+ItemCallback = Callable[[str, Dict[str, Any]], None]
+
+
+class IncrementalJSONScanner:
+    """
+    Инкрементальная версия extract_json: текст модели подаётся кусками через feed(),
+    сканер отслеживает глубину скобок (с учётом строк и escape-последовательностей)
+    и находит первый JSON-объект верхнего уровня.
+
+    Как только внутри корневого объекта закрывается очередной элемент-объект массива
+    (например, запись в "changes"), вызывается on_item(ключ_массива, элемент) —
+    не дожидаясь конца ответа. Исключение из on_item прерывает feed().
+    """
+
+    def __init__(self, on_item: Optional[ItemCallback] = None):
+        self.on_item = on_item
+        self._buf = ""
+        self._pos = 0
+        self._root_start = -1
+        self._root_end = -1
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._array_key = ""
+        self._item_start = -1
+
+    @property
+    def done(self) -> bool:
+        return self._root_end != -1
+
+    def feed(self, chunk: str) -> None:
+        if self.done or not chunk:
+            return
+        self._buf += chunk
+        buf = self._buf
+        i = self._pos
+
+        while i < len(buf):
+            char = buf[i]
+
+            if self._root_start == -1:
+                if char == "{":
+                    self._root_start = i
+                    self._stack.append("{")
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if char == "[" and len(self._stack) == 1:
+                    match = _KEY_BEFORE_VALUE.search(buf, self._root_start, i)
+                    self._array_key = match.group(1) if match else ""
+                if char == "{" and self._stack == ["{", "["]:
+                    self._item_start = i
+                self._stack.append(char)
+            elif char in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    self._root_end = i + 1
+                    self._pos = i + 1
+                    return
+                if char == "}" and self._stack == ["{", "["] and self._item_start != -1:
+                    item_text = buf[self._item_start : i + 1]
+                    self._item_start = -1
+                    self._pos = i + 1
+                    self._emit(item_text)
+            i += 1
+
+        self._pos = i
+
+    def _emit(self, item_text: str) -> None:
+        if self.on_item is None:
+            return
+        try:
+            item = json.loads(item_text)
+        except ValueError:
+            return
+        if isinstance(item, dict):
+            self.on_item(self._array_key, item)
+
+    def result(self) -> str:
+        """Текст завершённого корневого объекта или "" если он ещё не закрыт."""
+        if not self.done:
+            return ""
+        return self._buf[self._root_start : self._root_end]
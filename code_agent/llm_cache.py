@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+STATS_FILE = "stats.json"
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+    bytes_stored: int = 0
+    evictions: int = 0
+    expired: int = 0
+
+
+def cache_key(
+    *,
+    endpoint: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    messages: List[Dict[str, Any]],
+) -> str:
+    """sha256 от всего, что влияет на ответ модели."""
+    material = json.dumps(
+        {
+            "endpoint": endpoint,
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": messages,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    Content-addressed кэш ответов модели на диске: один файл <key>.json на ответ.
+    Размер ограничен max_bytes (вытесняем давно не читанные — mtime обновляется при hit),
+    записи старше ttl секунд считаются промахом.
+    Статистика накапливается в stats.json, чтобы видеть эффект между запусками CI.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 50 * 1024 * 1024, ttl: float = 7 * 86400):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = self._load_stats()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _load_stats(self) -> CacheStats:
+        try:
+            data = json.loads((self.directory / STATS_FILE).read_text(encoding="utf-8"))
+            return CacheStats(
+                **{k: int(v) for k, v in data.items() if k in CacheStats.__annotations__}
+            )
+        except (OSError, ValueError, TypeError):
+            return CacheStats()
+
+    def _save_stats(self) -> None:
+        tmp = self.directory / f"{STATS_FILE}.tmp"
+        tmp.write_text(json.dumps(asdict(self.stats)), encoding="utf-8")
+        os.replace(tmp, self.directory / STATS_FILE)
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        with self._lock:
+            try:
+                raw = path.read_bytes()
+                entry = json.loads(raw)
+            except (OSError, ValueError):
+                self.stats.misses += 1
+                self._save_stats()
+                return None
+
+            if time.time() - float(entry.get("created_at", 0)) > self.ttl:
+                path.unlink(missing_ok=True)
+                self.stats.expired += 1
+                self.stats.misses += 1
+                self._save_stats()
+                return None
+
+            os.utime(path)  # отмечаем использование для LRU
+            self.stats.hits += 1
+            self.stats.bytes_saved += len(raw)
+            self._save_stats()
+            return str(entry["text"])
+
+    def put(self, key: str, text: str) -> None:
+        data = json.dumps({"created_at": time.time(), "text": text}, ensure_ascii=False)
+        raw = data.encode("utf-8")
+        if len(raw) > self.max_bytes:
+            return
+
+        with self._lock:
+            path = self._path(key)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(raw)
+            os.replace(tmp, path)
+            self.stats.bytes_stored += len(raw)
+            self._evict()
+            self._save_stats()
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for path in self.directory.glob("*.json"):
+            if path.name == STATS_FILE:
+                continue
+            st = path.stat()
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.stats.evictions += 1
+
+    def size_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.directory.glob("*.json") if p.name != STATS_FILE)
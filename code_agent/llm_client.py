@@ -1,24 +1,152 @@
+import asyncio
+import contextlib
 import json
 import os
-import urllib.error
-import urllib.request
-from typing import Any, Dict, Optional, cast
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, cast
+
+from code_agent.llm_cache import CacheStats, CompletionCache, cache_key
+from code_agent.retry import (
+    LLMHTTPError,
+    RetryPolicy,
+    bucket_for,
+    call_with_retry,
+    parse_retry_after,
+)
+from core.config import get_settings
+from core.http_pool import ConnectionPool, PoolStats, get_default_pool
+from core.tracing import count, span
 
 OPENAI_ENDPOINT = "https://api.vsegpt.ru/v1/chat/completions"
 
 
+def resolve_model(model: Optional[str] = None) -> str:
+    """Модель вызова: аргумент, затем env OPENAI_MODEL, затем Settings."""
+    return model or os.environ.get("OPENAI_MODEL") or get_settings().openai_model
+
+
 def _post_json(
-    url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: int = 60
+    url: str,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    timeout: int = 60,
+    pool: Optional[ConnectionPool] = None,
 ) -> Dict[str, Any]:
+    """
+    POST JSON через общий keep-alive пул: повторные вызовы к тому же endpoint
+    не платят за DNS + TCP + TLS handshake.
+    """
     data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data, headers=headers, method="POST")
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            raw = resp.read().decode("utf-8")
-        return cast(Dict[str, Any], json.loads(raw))
-    except urllib.error.HTTPError as e:
-        body = e.read().decode("utf-8", errors="replace")
-        raise RuntimeError(f"OpenAI HTTPError {e.code}: {body}") from e
+    pool = pool or get_default_pool()
+    resp = pool.request("POST", url, body=data, headers=headers, timeout=timeout)
+    if resp.status >= 400:
+        body = resp.body.decode("utf-8", errors="replace")
+        raise LLMHTTPError(resp.status, body, parse_retry_after(resp.headers.get("retry-after")))
+    return cast(Dict[str, Any], json.loads(resp.body.decode("utf-8")))
+
+
+def _post_stream(
+    url: str,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    on_delta: Optional[Callable[[str], None]] = None,
+    timeout: int = 60,
+    pool: Optional[ConnectionPool] = None,
+    usage: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    POST с "stream": true и чтение server-sent events.
+    Каждый кусок choices[0].delta.content сразу отдаётся в on_delta;
+    исключение из on_delta обрывает чтение (соединение при этом закрывается).
+    usage — сюда копируется блок usage, если сервер его прислал.
+    """
+    data = json.dumps({**payload, "stream": True}).encode("utf-8")
+    pool = pool or get_default_pool()
+    parts: List[str] = []
+    with pool.stream(
+        "POST", url, body=data, headers={**headers, "Accept": "text/event-stream"}, timeout=timeout
+    ) as resp:
+        if resp.status >= 400:
+            body = resp.read().decode("utf-8", errors="replace")
+            raise LLMHTTPError(resp.status, body, parse_retry_after(resp.getheader("Retry-After")))
+
+        for raw_line in resp:
+            line = raw_line.decode("utf-8").strip()
+            if not line.startswith("data:"):
+                continue
+            event = line[len("data:") :].strip()
+            if event == "[DONE]":
+                resp.read()  # дочитываем хвост, чтобы соединение вернулось в пул
+                break
+            try:
+                chunk = json.loads(event)
+                if usage is not None and chunk.get("usage"):
+                    usage.update(chunk["usage"])
+                # финальный чанк с usage приходит с пустым choices
+                if not chunk["choices"] and "usage" in chunk:
+                    continue
+                delta = chunk["choices"][0].get("delta") or {}
+            except (ValueError, KeyError, IndexError) as e:
+                raise RuntimeError(f"Unexpected OpenAI stream event: {event[:200]}") from e
+            piece = delta.get("content") or ""
+            if piece:
+                parts.append(piece)
+                if on_delta is not None:
+                    on_delta(piece)
+    return "".join(parts)
+
+
+def pool_stats() -> PoolStats:
+    """Счётчики общего пула: сколько соединений создано, переиспользовано, вытеснено."""
+    return get_default_pool().stats
+
+
+_caches: Dict[str, CompletionCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache() -> Optional[CompletionCache]:
+    """
+    Кэш ответов включается явно через env LLM_CACHE_DIR
+    (размер — LLM_CACHE_MAX_MB, срок жизни — LLM_CACHE_TTL_HOURS).
+    """
+    directory = os.environ.get("LLM_CACHE_DIR", "")
+    if not directory:
+        return None
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = CompletionCache(
+                directory,
+                max_bytes=int(float(os.environ.get("LLM_CACHE_MAX_MB", "50")) * 1024 * 1024),
+                ttl=float(os.environ.get("LLM_CACHE_TTL_HOURS", "168")) * 3600,
+            )
+            _caches[directory] = cache
+        return cache
+
+
+def cache_stats() -> Optional[CacheStats]:
+    cache = get_cache()
+    return cache.stats if cache else None
+
+
+@dataclass
+class PendingCache:
+    """
+    Ответы, которые попадут в кэш только после commit() — например, когда изменения
+    из ответа применились. Неудачный ответ не закэшируется, и повторный запуск
+    получит новую выборку модели.
+    """
+
+    entries: List[Tuple[str, str]] = field(default_factory=list)
+
+    def commit(self) -> None:
+        cache = get_cache()
+        if cache is not None:
+            for key, text in self.entries:
+                cache.put(key, text)
+        self.entries.clear()
 
 
 def openai_complete(
@@ -29,14 +157,67 @@ def openai_complete(
     max_tokens: int = 1200,
     model: Optional[str] = None,
     api_key: Optional[str] = None,
+    use_cache: Optional[bool] = None,
+    cache_pending: Optional[PendingCache] = None,
+    stream: bool = False,
+    on_delta: Optional[Callable[[str], None]] = None,
+) -> str:
+    """
+    То же, что _complete, внутри span'а "llm": время запроса, число запросов,
+    попадания в кэш и токены prompt/completion из usage.
+    """
+    with span("llm", model=resolve_model(model), stream=stream):
+        return _complete(
+            system=system,
+            user=user,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            model=model,
+            api_key=api_key,
+            use_cache=use_cache,
+            cache_pending=cache_pending,
+            stream=stream,
+            on_delta=on_delta,
+        )
+
+
+def _record_usage(usage: Dict[str, Any], messages: List[Dict[str, str]], text: str) -> None:
+    """Токены из usage ответа; если сервер его не прислал — локальная оценка."""
+    if usage.get("prompt_tokens") is None:
+        count("llm.usage_estimated")
+        usage = {
+            "prompt_tokens": sum(len(m["content"]) for m in messages) // 4 + 1,
+            "completion_tokens": len(text) // 4 + 1,
+        }
+    count("llm.prompt_tokens", int(usage.get("prompt_tokens") or 0))
+    count("llm.completion_tokens", int(usage.get("completion_tokens") or 0))
+
+
+def _complete(
+    *,
+    system: str,
+    user: str,
+    temperature: float = 0.2,
+    max_tokens: int = 1200,
+    model: Optional[str] = None,
+    api_key: Optional[str] = None,
+    use_cache: Optional[bool] = None,
+    cache_pending: Optional[PendingCache] = None,
+    stream: bool = False,
+    on_delta: Optional[Callable[[str], None]] = None,
 ) -> str:
     """
     Возвращает текст ответа модели.
     Использует env:
-      OPENAI_API_KEY, OPENAI_MODEL
+      OPENAI_API_KEY, OPENAI_MODEL, LLM_CACHE_DIR
+    use_cache=None — кэшируем только детерминированные вызовы (temperature=0).
+    cache_pending — новый ответ не пишется в кэш сразу, а откладывается до commit().
+    stream=True — ответ читается через SSE, куски текста по мере генерации
+    отдаются в on_delta (при попадании в кэш on_delta получает весь текст разом).
     """
     api_key = api_key or os.environ.get("OPENAI_API_KEY", "")
-    model = model or os.environ.get("OPENAI_MODEL", "gpt-4.1-mini")
+    settings = get_settings()
+    model = resolve_model(model)
 
     if not api_key:
         raise RuntimeError("Missing OPENAI_API_KEY")
@@ -46,21 +227,132 @@ def openai_complete(
         "Content-Type": "application/json",
     }
 
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
     payload = {
         "model": model,
         "temperature": temperature,
         "max_completion_tokens": max_tokens,
-        "messages": [
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ],
+        "messages": messages,
     }
 
-    resp = _post_json(OPENAI_ENDPOINT, headers, payload)
-    try:
-        return str(resp["choices"][0]["message"]["content"])
-    except Exception as e:
-        raise RuntimeError(f"Unexpected OpenAI response shape: {resp}") from e
+    cache = get_cache()
+    if use_cache is None:
+        use_cache = temperature == 0
+    key = ""
+    if cache is not None and use_cache:
+        key = cache_key(
+            endpoint=OPENAI_ENDPOINT,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            messages=messages,
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            count("llm.cache_hits")
+            if on_delta is not None:
+                on_delta(cached)
+            return cached
+
+    policy = RetryPolicy(
+        max_retries=settings.llm_max_retries,
+        backoff_base=settings.llm_backoff_base,
+        backoff_max=settings.llm_backoff_max,
+        deadline=settings.llm_retry_deadline,
+    )
+    bucket = bucket_for(
+        model, settings.llm_rate_limits.get(model, settings.llm_requests_per_minute)
+    )
+
+    count("llm.requests")
+    usage: Dict[str, Any] = {}
+    if stream:
+        delivered = False
+
+        def forward(piece: str) -> None:
+            nonlocal delivered
+            delivered = True
+            if on_delta is not None:
+                on_delta(piece)
+
+        # после первого отданного куска повторять запрос нельзя — вызывающий уже его видел
+        text = call_with_retry(
+            lambda: _post_stream(OPENAI_ENDPOINT, headers, payload, forward, usage=usage),
+            policy,
+            bucket=bucket,
+            can_retry=lambda: not delivered,
+        )
+    else:
+        resp = call_with_retry(
+            lambda: _post_json(OPENAI_ENDPOINT, headers, payload), policy, bucket=bucket
+        )
+        try:
+            text = str(resp["choices"][0]["message"]["content"])
+        except Exception as e:
+            raise RuntimeError(f"Unexpected OpenAI response shape: {resp}") from e
+        usage = resp.get("usage") or {}
+        if on_delta is not None:
+            on_delta(text)
+
+    _record_usage(usage, messages, text)
+    if key and cache is not None:
+        if cache_pending is not None:
+            cache_pending.entries.append((key, text))
+        else:
+            cache.put(key, text)
+    return text
+
+
+async def aopenai_complete(
+    *,
+    system: str,
+    user: str,
+    temperature: float = 0.2,
+    max_tokens: int = 1200,
+    model: Optional[str] = None,
+    api_key: Optional[str] = None,
+    use_cache: Optional[bool] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> str:
+    """
+    Асинхронный вариант openai_complete: блокирующий вызов уходит в поток,
+    event loop свободен для GitHub API и других запросов.
+    semaphore ограничивает число одновременных запросов к модели.
+    """
+    async with semaphore or contextlib.nullcontext():
+        return await asyncio.to_thread(
+            openai_complete,
+            system=system,
+            user=user,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            model=model,
+            api_key=api_key,
+            use_cache=use_cache,
+        )
+
+
+async def agather_complete(prompts: Sequence[Dict[str, Any]], *, concurrency: int = 4) -> List[str]:
+    """
+    Отправляет N промптов (kwargs для openai_complete) параллельно, не больше
+    concurrency одновременно. Ответы возвращаются в порядке prompts.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be >= 1")
+    semaphore = asyncio.Semaphore(concurrency)
+    return list(
+        await asyncio.gather(
+            *(aopenai_complete(**prompt, semaphore=semaphore) for prompt in prompts)
+        )
+    )
+
+
+def complete_many(prompts: Sequence[Dict[str, Any]], *, concurrency: int = 4) -> List[str]:
+    """Синхронная обёртка над agather_complete для кода без event loop."""
+    return asyncio.run(agather_complete(prompts, concurrency=concurrency))
 
 
 # Временная совместимость со старым кодом, чтобы не ломать agent.py сразу.
@@ -73,6 +365,10 @@ def yandexgpt_complete(
     model: Optional[str] = None,
     iam_token: Optional[str] = None,
     folder_id: Optional[str] = None,
+    use_cache: Optional[bool] = None,
+    cache_pending: Optional[PendingCache] = None,
+    stream: bool = False,
+    on_delta: Optional[Callable[[str], None]] = None,
 ) -> str:
     return openai_complete(
         system=system,
@@ -81,4 +377,8 @@ def yandexgpt_complete(
         max_tokens=max_tokens,
         model=model,
         api_key=iam_token,
+        use_cache=use_cache,
+        cache_pending=cache_pending,
+        stream=stream,
+        on_delta=on_delta,
     )
@@ -0,0 +1,132 @@
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from code_agent.patching import added_text
+
+ALLOWED_ACTIONS = {"create", "update", "delete", "patch"}
+# агенту запрещено править собственные внутренности
+PROTECTED_PREFIXES = ("code_agent/", "reviewer_agent/")
+
+# одна регулярка вместо серии поисков подстрок и upper()-копии текста:
+# "..." покрывает и "<...>", "[...]"; TODO/TBD — в любом регистре
+PLACEHOLDER_RE = re.compile(r"\.\.\.|…|TODO|TBD", re.IGNORECASE)
+
+
+class PlaceholderFound(RuntimeError):
+    """Модель начала писать заглушку — поток ответа прерывается досрочно."""
+
+    def __init__(self, path: str, findings: Sequence["Finding"] = ()):
+        super().__init__(f"Placeholder content in {path}")
+        self.path = path
+        self.findings = list(findings)
+
+
+@dataclass(frozen=True)
+class Finding:
+    path: str
+    kind: str  # placeholder | action | path | protected | content
+    message: str
+    line: int = 0
+
+    @property
+    def fatal(self) -> bool:
+        """Заглушки чинятся повторным запросом, остальное — отказ от всего ответа."""
+        return self.kind != "placeholder"
+
+
+def is_safe_relative_path(path: str) -> bool:
+    p = Path(path)
+    return not p.is_absolute() and ".." not in p.parts
+
+
+def find_placeholders(text: str) -> List[Tuple[int, str]]:
+    """(номер строки, строка) для каждой строки с заглушкой — один проход по тексту."""
+    found: List[Tuple[int, str]] = []
+    line_no, line_start, last_line = 1, 0, 0
+    for match in PLACEHOLDER_RE.finditer(text):
+        line_no += text.count("\n", line_start, match.start())
+        line_start = match.start()
+        if line_no == last_line:
+            continue
+        begin = text.rfind("\n", 0, match.start()) + 1
+        end = text.find("\n", match.end())
+        found.append((line_no, text[begin : end if end != -1 else len(text)].strip()))
+        last_line = line_no
+    return found
+
+
+def validate_change(ch: Dict[str, Any]) -> List[Finding]:
+    action = ch.get("action")
+    path = ch.get("path", "unknown")
+    if action not in ALLOWED_ACTIONS:
+        return [Finding(path, "action", f"Unsupported action from LLM: {action}")]
+    if not is_safe_relative_path(path):
+        return [Finding(path, "path", f"Unsafe path from LLM: {path}")]
+    if path.startswith(PROTECTED_PREFIXES):
+        return [Finding(path, "protected", f"Refusing to modify agent internals directly: {path}")]
+    if action in ("create", "update") and ch.get("content") is None:
+        return [Finding(path, "content", f"Missing content for {action} {path}")]
+    return [
+        Finding(path, "placeholder", f"Placeholder in {path}:{line}: {snippet}", line)
+        for line, snippet in find_placeholders(added_text(ch))
+    ]
+
+
+def validate_changes(changes: Iterable[Dict[str, Any]]) -> List[Finding]:
+    return [finding for ch in changes for finding in validate_change(ch)]
+
+
+def raise_for_fatal(findings: Iterable[Finding]) -> None:
+    for finding in findings:
+        if finding.fatal:
+            raise RuntimeError(finding.message)
+
+
+def placeholder_paths(findings: Iterable[Finding]) -> List[str]:
+    return list(dict.fromkeys(f.path for f in findings if f.kind == "placeholder"))
+
+
+def describe(findings: Iterable[Finding]) -> str:
+    """Находки для промпта повторного запроса: путь, строка и сама строка."""
+    return "\n".join(f"- {f.message}" for f in findings)
+
+
+def check_streamed_change(key: str, ch: Dict[str, Any]) -> None:
+    """
+    Проверка элемента changes[] сразу после того, как он пришёл из потока:
+    небезопасный путь или неизвестное действие обрывают генерацию,
+    заглушки — тоже, чтобы сразу перейти к повторному запросу.
+    """
+    if key != "changes":
+        return
+    findings = validate_change(ch)
+    raise_for_fatal(findings)
+    if findings:
+        raise PlaceholderFound(ch.get("path", "unknown"), findings)
+
+
+class StreamValidator:
+    """
+    Проверяет элементы changes[] по мере прихода из потока (IncrementalJSONScanner).
+    Проверенные элементы считаются: после разбора ответа их не нужно проверять снова.
+    abort_on_placeholder=False — заглушки копятся в findings, а поток дочитывается,
+    чтобы исправные изменения не пришлось генерировать заново.
+    """
+
+    def __init__(self, abort_on_placeholder: bool = True) -> None:
+        self.abort_on_placeholder = abort_on_placeholder
+        self.checked = 0
+        self.findings: List[Finding] = []
+
+    def on_item(self, key: str, ch: Dict[str, Any]) -> None:
+        if key != "changes":
+            return
+        if self.abort_on_placeholder:
+            check_streamed_change(key, ch)
+        else:
+            findings = validate_change(ch)
+            raise_for_fatal(findings)
+            self.findings += findings
+        self.checked += 1
@@ -0,0 +1,124 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchError(RuntimeError):
+    """Хунк не применяется к текущему содержимому файла."""
+
+
+def apply_search_replace(text: str, hunks: List[Dict[str, Any]], path: str = "") -> str:
+    """
+    Хунки вида {"search": "...", "replace": "..."} применяются по очереди.
+    search должен встречаться в файле ровно один раз — иначе правка неоднозначна.
+    """
+    for index, hunk in enumerate(hunks):
+        search = hunk.get("search")
+        replace = hunk.get("replace")
+        if not isinstance(search, str) or not isinstance(replace, str) or not search:
+            raise PatchError(f"{path}: hunk #{index} must have non-empty 'search' and 'replace'")
+        count = text.count(search)
+        if count != 1:
+            found = "not found" if count == 0 else f"found {count} times"
+            raise PatchError(f"{path}: hunk #{index} search text {found}")
+        text = text.replace(search, replace, 1)
+    return text
+
+
+def _parse_unified_diff(diff: str, path: str) -> List[Tuple[int, List[str], List[str]]]:
+    hunks: List[Tuple[int, List[str], List[str]]] = []
+    current: Optional[Tuple[int, List[str], List[str]]] = None
+    for line in diff.splitlines():
+        header = _HUNK_HEADER.match(line)
+        if header:
+            current = (int(header.group(1)), [], [])
+            hunks.append(current)
+            continue
+        if current is None:
+            # заголовки diff --git / index / --- / +++ до первого хунка
+            continue
+        if line.startswith("\\"):
+            continue
+        tag, body = (line[:1], line[1:]) if line else (" ", "")
+        if tag == " ":
+            current[1].append(body)
+            current[2].append(body)
+        elif tag == "-":
+            current[1].append(body)
+        elif tag == "+":
+            current[2].append(body)
+        else:
+            raise PatchError(f"{path}: malformed diff line: {line[:80]!r}")
+
+    if not hunks:
+        raise PatchError(f"{path}: diff has no hunks")
+    return hunks
+
+
+def _find_block(lines: List[str], block: List[str], hint: int, start: int) -> int:
+    size = len(block)
+    if lines[hint : hint + size] == block and hint >= start:
+        return hint
+    if not block:
+        return max(hint, start)
+    first = block[0]
+    matches = [
+        i
+        for i in range(start, len(lines) - size + 1)
+        if lines[i] == first and lines[i : i + size] == block
+    ]
+    if len(matches) == 1:
+        return matches[0]
+    return -1
+
+
+def apply_unified_diff(text: str, diff: str, path: str = "") -> str:
+    """
+    Применяет unified diff. Хунк ищется по номеру строки из заголовка, а если
+    файл сдвинулся — по уникальному совпадению контекста; иначе PatchError.
+    """
+    lines = text.splitlines()
+    ends_with_newline = text.endswith("\n") or not text
+    result: List[str] = []
+    cursor = 0
+
+    for index, (old_start, old, new) in enumerate(_parse_unified_diff(diff, path)):
+        hint = old_start - 1 if old else old_start
+        pos = _find_block(lines, old, max(hint, 0), cursor)
+        if pos == -1:
+            raise PatchError(f"{path}: hunk #{index} (line {old_start}) does not match the file")
+        result.extend(lines[cursor:pos])
+        result.extend(new)
+        cursor = pos + len(old)
+
+    result.extend(lines[cursor:])
+    out = "\n".join(result)
+    if ends_with_newline and result:
+        out += "\n"
+    return out
+
+
+def apply_patch_change(text: str, change: Dict[str, Any]) -> str:
+    path = change.get("path", "")
+    if change.get("diff"):
+        return apply_unified_diff(text, change["diff"], path)
+    if change.get("hunks"):
+        return apply_search_replace(text, change["hunks"], path)
+    raise PatchError(f"{path}: patch needs 'diff' or 'hunks'")
+
+
+def added_text(change: Dict[str, Any]) -> str:
+    """Текст, который правка добавляет в файл, — его и проверяем на заглушки."""
+    action = change.get("action")
+    if action in ("create", "update"):
+        return str(change.get("content") or "")
+    if action != "patch":
+        return ""
+    if change.get("diff"):
+        return "\n".join(
+            line[1:]
+            for line in str(change["diff"]).splitlines()
+            if line.startswith("+") and not line.startswith("+++")
+        )
+    return "\n".join(str(h.get("replace") or "") for h in change.get("hunks") or [])
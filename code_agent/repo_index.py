@@ -0,0 +1,184 @@
+import ast
+import json
+import re
+import subprocess
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from code_agent.token_budget import estimate_tokens
+
+INDEX_FILE = "code-agent-index.json"
+MAX_FILE_BYTES = 200_000
+INDEX_VERSION = 1
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+_PATH_LIKE = re.compile(r"[\w./-]+\.\w+")
+_STOP_WORDS = {"the", "and", "for", "with", "that", "this", "from", "not", "none", "self"}
+
+
+def python_symbols(source: str) -> List[str]:
+    """Функции, классы и методы модуля (Class.method) через ast."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+
+    symbols: List[str] = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append(node.name)
+        elif isinstance(node, ast.ClassDef):
+            symbols.append(node.name)
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    symbols.append(f"{node.name}.{item.name}")
+        elif isinstance(node, ast.Assign):
+            symbols.extend(t.id for t in node.targets if isinstance(t, ast.Name) and t.id.isupper())
+    return symbols
+
+
+def query_terms(text: str) -> Set[str]:
+    terms: Set[str] = set()
+    for word in _WORD.findall(text):
+        word = word.lower()
+        if word in _STOP_WORDS:
+            continue
+        terms.add(word)
+        terms.update(part for part in word.split("_") if len(part) > 2)
+    return terms
+
+
+@dataclass
+class FileEntry:
+    path: str
+    blob: str
+    size: int
+    tokens: int
+    symbols: List[str] = field(default_factory=list)
+
+
+class RepoIndex:
+    """
+    Индекс файлов репозитория: список из `git ls-files -s`, символы Python-модулей
+    и оценка токенов. Записи кэшируются в .git/ по SHA блоба, поэтому повторная
+    индексация перечитывает только изменившиеся файлы.
+    """
+
+    def __init__(self, root: str = "."):
+        self.root = Path(root)
+        self.entries: Dict[str, FileEntry] = {}
+        self.reindexed = 0
+
+    def _git(self, *args: str) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=self.root, check=True, capture_output=True, text=True
+        ).stdout
+
+    def _cache_path(self) -> Path:
+        git_dir = Path(self._git("rev-parse", "--git-dir").strip())
+        if not git_dir.is_absolute():
+            git_dir = self.root / git_dir
+        return git_dir / INDEX_FILE
+
+    def _load_cache(self, path: Path) -> Dict[str, FileEntry]:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != INDEX_VERSION:
+            return {}
+        return {e["path"]: FileEntry(**e) for e in data.get("files", [])}
+
+    def _index_file(self, path: str, blob: str) -> Optional[FileEntry]:
+        full = self.root / path
+        try:
+            if full.stat().st_size > MAX_FILE_BYTES:
+                return FileEntry(path, blob, full.stat().st_size, MAX_FILE_BYTES // 4)
+            text = full.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            return None
+        symbols = python_symbols(text) if path.endswith(".py") else []
+        return FileEntry(path, blob, len(text), estimate_tokens(text), symbols)
+
+    def refresh(self) -> "RepoIndex":
+        cache_path = self._cache_path()
+        cached = self._load_cache(cache_path)
+        entries: Dict[str, FileEntry] = {}
+
+        for record in self._git("ls-files", "-s", "-z").split("\0"):
+            if not record:
+                continue
+            meta, path = record.split("\t", 1)
+            _mode, blob, _stage = meta.split()
+            old = cached.get(path)
+            if old is not None and old.blob == blob:
+                entries[path] = old
+                continue
+            entry = self._index_file(path, blob)
+            if entry is not None:
+                entries[path] = entry
+                self.reindexed += 1
+
+        self.entries = entries
+        cache_path.write_text(
+            json.dumps({"version": INDEX_VERSION, "files": [asdict(e) for e in entries.values()]}),
+            encoding="utf-8",
+        )
+        return self
+
+    def rank(self, query: str, exclude: Iterable[str] = ()) -> List[Tuple[int, FileEntry]]:
+        """
+        Оценка релевантности: явное упоминание пути (например, в traceback) весит больше
+        всего, затем совпадение имён символов и частей пути с терминами запроса.
+        """
+        terms = query_terms(query)
+        mentioned = set(_PATH_LIKE.findall(query))
+        excluded = tuple(exclude)
+
+        ranked: List[Tuple[int, FileEntry]] = []
+        for entry in self.entries.values():
+            if excluded and entry.path.startswith(excluded):
+                continue
+            score = 0
+            if entry.path in mentioned or any(m.endswith("/" + entry.path) for m in mentioned):
+                score += 10
+            elif Path(entry.path).name in mentioned:
+                score += 6
+            path_terms = query_terms(entry.path.replace("/", " ").replace(".", " "))
+            score += 2 * len(terms & path_terms)
+            for symbol in entry.symbols:
+                if symbol.split(".")[-1].lower() in terms:
+                    score += 3
+            if score:
+                ranked.append((score, entry))
+
+        ranked.sort(key=lambda item: (-item[0], item[1].tokens))
+        return ranked
+
+    def pack(self, query: str, token_budget: int, exclude: Iterable[str] = ()) -> str:
+        """
+        Самые релевантные файлы целиком, пока помещаются в token_budget;
+        не поместившиеся — только списком символов.
+        """
+        blocks: List[str] = []
+        remaining = token_budget
+        for _score, entry in self.rank(query, exclude):
+            if remaining <= 0:
+                break
+            if entry.tokens <= remaining and entry.size <= MAX_FILE_BYTES:
+                try:
+                    text = (self.root / entry.path).read_text(encoding="utf-8")
+                except (OSError, UnicodeDecodeError):
+                    continue
+                blocks.append(f"----- FILE: {entry.path} -----\n{text}")
+                remaining -= entry.tokens
+            elif entry.symbols:
+                outline = f"----- FILE (outline only): {entry.path} -----\n" + "\n".join(
+                    entry.symbols
+                )
+                cost = estimate_tokens(outline)
+                if cost <= remaining:
+                    blocks.append(outline)
+                    remaining -= cost
+        return "\n\n".join(blocks)
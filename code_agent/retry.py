@@ -0,0 +1,130 @@
+import email.utils
+import http.client
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+RETRY_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMHTTPError(RuntimeError):
+    """HTTP-ошибка от LLM API; несёт статус и Retry-After для планировщика повторов."""
+
+    def __init__(self, status: int, body: str, retry_after: Optional[float] = None):
+        super().__init__(f"OpenAI HTTPError {status}: {body}")
+        self.status = status
+        self.body = body
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After бывает числом секунд или HTTP-датой."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, LLMHTTPError):
+        return exc.status in RETRY_STATUSES
+    return isinstance(exc, (OSError, http.client.HTTPException))
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 4
+    backoff_base: float = 1.0
+    backoff_max: float = 30.0
+    deadline: float = 120.0
+
+    def backoff(self, attempt: int) -> float:
+        """Экспоненциальная задержка с full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2**attempt)))
+
+
+class TokenBucket:
+    """Token bucket: rate запросов в секунду, всплеск до capacity."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Забирает токен и возвращает, сколько секунд нужно подождать до его появления."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket_for(model: str, requests_per_minute: float) -> Optional[TokenBucket]:
+    if requests_per_minute <= 0:
+        return None
+    with _buckets_lock:
+        bucket = _buckets.get(model)
+        if bucket is None or bucket.rate != requests_per_minute / 60:
+            bucket = TokenBucket(requests_per_minute / 60)
+            _buckets[model] = bucket
+        return bucket
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    policy: RetryPolicy,
+    *,
+    bucket: Optional[TokenBucket] = None,
+    can_retry: Callable[[], bool] = lambda: True,
+    sleep: Callable[[float], None] = time.sleep,
+) -> T:
+    """
+    Вызывает fn, повторяя при временных ошибках (сеть, 429, 5xx) с backoff,
+    но не дольше policy.deadline секунд суммарно. Retry-After сервера имеет приоритет
+    над собственной задержкой. can_retry=False запрещает повтор (например, если
+    поток ответа уже частично отдан вызывающему).
+    """
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        if bucket is not None:
+            wait = bucket.reserve()
+            if time.monotonic() - started + wait > policy.deadline:
+                raise RuntimeError("LLM rate limit: request does not fit into the deadline")
+            if wait > 0:
+                sleep(wait)
+
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= policy.max_retries or not is_retryable(e) or not can_retry():
+                raise
+            retry_after = e.retry_after if isinstance(e, LLMHTTPError) else None
+            delay = retry_after if retry_after is not None else policy.backoff(attempt)
+            if time.monotonic() - started + delay > policy.deadline:
+                raise
+            print(f"LLM call failed ({str(e)[:200]}); retry {attempt + 1} in {delay:.1f}s")
+            sleep(delay)
+            attempt += 1
@@ -0,0 +1,135 @@
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from code_agent.llm_client import resolve_model
+from core.config import get_settings
+
+# шаблон user-промпта (правила, формат JSON) без подставленных секций
+PROMPT_OVERHEAD_TOKENS = 800
+# доли входного бюджета на секции; всё, что они не израсходовали, уходит контексту репо
+ISSUE_SHARE = 0.2
+REVIEW_SHARE = 0.15
+CI_SHARE = 0.25
+
+_TIMESTAMP = re.compile(r"^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(\.\d+)?Z ")
+_ANSI = re.compile(r"\x1b\[[0-9;]*m")
+_TRACEBACK_START = "Traceback (most recent call last):"
+# строки, ради которых лог вообще читают: ошибки pytest/mypy/ruff/black и итоги
+_ERROR_LINE = re.compile(
+    r"^(E\s{2,}|_{3,} .* _{3,}$)|\b(FAILED|ERROR)\b"
+    r"|^\S+?:\d+(:\d+)?: "
+    r"|\b(\w+Error|\w+Exception|error|would reformat)\b"
+    r"|\b\d+ (failed|errors?)\b"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка без токенизатора: ~4 символа на токен."""
+    return len(text) // 4 + 1
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    limit = max(0, tokens) * 4
+    if len(text) <= limit:
+        return text
+    return text[:limit] + "\n(truncated)"
+
+
+@dataclass
+class TokenBudget:
+    model: str
+    input_tokens: int
+    output_tokens: int
+
+
+def budget_for_model(model: Optional[str] = None) -> TokenBudget:
+    """
+    Вход/выход для модели из Settings: выход — llm_output_tokens[model] или
+    llm_max_output_tokens, вход — сколько помещается в окно модели после выхода,
+    но не больше llm_max_input_tokens (латентность и стоимость).
+    """
+    settings = get_settings()
+    model = resolve_model(model)
+    window = settings.llm_context_windows.get(model, settings.llm_context_window)
+    output = settings.llm_output_tokens.get(model, settings.llm_max_output_tokens)
+    output = min(output, window // 2)
+    return TokenBudget(model, min(settings.llm_max_input_tokens, window - output), output)
+
+
+def _normalize(line: str) -> str:
+    return _ANSI.sub("", _TIMESTAMP.sub("", line)).rstrip()
+
+
+def compact_log(text: str, max_tokens: int) -> str:
+    """
+    Сжимает вывод CI: убирает таймстемпы и ANSI, схлопывает повторяющиеся строки,
+    оставляет traceback'и и строки с ошибками. Если ошибок не нашлось — хвост лога.
+    """
+    lines = [_normalize(line) for line in text.splitlines()]
+    lines = [line for line in lines if line.strip()]
+    counts = Counter(lines)
+
+    kept: List[str] = []
+    seen = set()
+    in_traceback = False
+    for line in lines:
+        if line.startswith(_TRACEBACK_START):
+            in_traceback = True
+        relevant = in_traceback or bool(_ERROR_LINE.search(line))
+        # traceback заканчивается строкой исключения без отступа
+        if in_traceback and not line.startswith((" ", _TRACEBACK_START)):
+            in_traceback = False
+        if not relevant or line in seen:
+            continue
+        seen.add(line)
+        repeats = counts[line]
+        kept.append(f"{line}  [x{repeats}]" if repeats > 1 else line)
+
+    if not kept:
+        kept = list(dict.fromkeys(lines))[-40:]
+
+    result = "\n".join(kept)
+    if estimate_tokens(result) <= max_tokens:
+        return result
+    # ошибки в конце лога обычно итоговые — при нехватке места важнее хвост
+    limit = max(0, max_tokens) * 4
+    return "(truncated)\n" + result[-limit:]
+
+
+def compact_failures(failures: Sequence[Tuple[str, str]], max_tokens: int) -> str:
+    """Упавшие checks блоками «## CHECK FAILED: name», бюджет делится между ними поровну."""
+    if not failures:
+        return ""
+    per_check = max_tokens // len(failures)
+    return "\n\n".join(
+        f"## CHECK FAILED: {name}\n{compact_log(details, per_check)}" for name, details in failures
+    )
+
+
+@dataclass
+class PromptPlan:
+    issue_body: str
+    reviewer_comment: str
+    ci_block: str
+    context_tokens: int
+
+
+def plan_prompt(
+    budget: TokenBudget,
+    *,
+    issue_body: str,
+    reviewer_comment: str,
+    ci_failures: Sequence[Tuple[str, str]],
+) -> PromptPlan:
+    """
+    Раскладывает входной бюджет по секциям промпта: issue, замечания ревьюера,
+    сжатый лог CI; остаток — под файлы репозитория (RepoIndex.pack).
+    """
+    available = budget.input_tokens - PROMPT_OVERHEAD_TOKENS
+    issue_body = truncate_to_tokens(issue_body, int(available * ISSUE_SHARE))
+    reviewer_comment = truncate_to_tokens(reviewer_comment, int(available * REVIEW_SHARE))
+    ci_block = compact_failures(ci_failures, int(available * CI_SHARE))
+    used = sum(estimate_tokens(s) for s in (issue_body, reviewer_comment, ci_block))
+    return PromptPlan(issue_body, reviewer_comment, ci_block, max(0, available - used))
@@ -0,0 +1,104 @@
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from core.tracing import record_subprocess, wrap
+
+MAX_DETAILS = 4000
+# pytest: 5 — тесты не собраны, это не ошибка изменений
+PYTEST_NO_TESTS = 5
+
+
+def _is_test_file(path: Path) -> bool:
+    return path.suffix == ".py" and (path.name.startswith("test_") or path.stem.endswith("_test"))
+
+
+def affected_tests(changed: Iterable[str], root: str = ".", tests_dir: str = "tests") -> List[str]:
+    """
+    Тесты, которые стоит прогнать для изменённых модулей: изменённые тест-файлы,
+    tests/test_<module>.py и тесты, импортирующие изменённый модуль.
+    """
+    base = Path(root)
+    modules = []
+    selected = set()
+    for path in changed:
+        p = Path(path)
+        if p.suffix != ".py":
+            continue
+        if _is_test_file(p) and (base / p).is_file():
+            selected.add(p.as_posix())
+            continue
+        dotted = ".".join(p.with_suffix("").parts)
+        modules.append((p.stem, dotted))
+
+    if not modules:
+        return sorted(selected)
+
+    patterns = [
+        re.compile(rf"^\s*(from|import)\s+{re.escape(dotted)}\b", re.MULTILINE)
+        for _, dotted in modules
+    ]
+    names = {f"test_{stem}.py" for stem, _ in modules}
+    for test_file in (base / tests_dir).rglob("*.py") if (base / tests_dir).is_dir() else []:
+        if not _is_test_file(test_file):
+            continue
+        rel = test_file.relative_to(base).as_posix()
+        if test_file.name in names:
+            selected.add(rel)
+            continue
+        text = test_file.read_text(encoding="utf-8", errors="replace")
+        if any(pattern.search(text) for pattern in patterns):
+            selected.add(rel)
+    return sorted(selected)
+
+
+def _run_check(name: str, args: List[str], root: str, timeout: float) -> Optional[Tuple[str, str]]:
+    print(f"> {' '.join(args)}")
+    started = time.perf_counter()
+    try:
+        result = subprocess.run(
+            [sys.executable, "-m", *args], cwd=root, capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return name, f"{name} timed out after {timeout:.0f}s"
+    finally:
+        record_subprocess(started)
+
+    output = (result.stdout + result.stderr).strip()
+    if result.returncode == 0 or (args[0] == "pytest" and result.returncode == PYTEST_NO_TESTS):
+        return None
+    if f"No module named {args[0]}" in output:
+        print(f"{name} skipped: {args[0]} is not installed")
+        return None
+    if len(output) > MAX_DETAILS:
+        output = "...(truncated)...\n" + output[-MAX_DETAILS:]
+    return name, output or f"{name} failed with exit code {result.returncode}"
+
+
+def verify_changes(
+    changed: Iterable[str], root: str = ".", timeout: float = 300
+) -> List[Tuple[str, str]]:
+    """
+    Локальная проверка перед коммитом: pytest по затронутым тестам и mypy по изменённым
+    модулям, параллельно. Возвращает упавшие проверки в формате get_ci_failures.
+    """
+    changed = [p for p in changed if (Path(root) / p).is_file()]
+    checks: List[Tuple[str, List[str]]] = []
+    tests = affected_tests(changed, root)
+    if tests:
+        checks.append(("local pytest", ["pytest", "-q", "-x", *tests]))
+    modules = [p for p in changed if p.endswith(".py")]
+    if modules:
+        checks.append(("local mypy", ["mypy", *modules]))
+    if not checks:
+        return []
+
+    with ThreadPoolExecutor(max_workers=len(checks)) as pool:
+        results = list(
+            pool.map(wrap(lambda check: _run_check(check[0], check[1], root, timeout)), checks)
+        )
+    return [r for r in results if r is not None]
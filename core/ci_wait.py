@@ -0,0 +1,86 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Collection, Dict, List, Tuple
+
+from core.github_data import CheckRunInfo, evaluate_ci
+from core.github_rest import GitHubREST
+
+
+@dataclass
+class CIResult:
+    state: str  # success | failed | pending (вышло время) | superseded (в PR новый push)
+    head_sha: str
+    details: List[str] = field(default_factory=list)
+    polls: int = 0
+
+
+def check_runs_from_rest(payload: Dict[str, Any]) -> List[CheckRunInfo]:
+    runs = []
+    for run in payload.get("check_runs") or []:
+        output = run.get("output") or {}
+        runs.append(
+            CheckRunInfo(
+                name=run.get("name") or "unknown-check",
+                status=(run.get("status") or "").lower(),
+                conclusion=(run.get("conclusion") or "").lower(),
+                title=output.get("title") or "",
+                summary=output.get("summary") or "",
+                text=output.get("text") or "",
+            )
+        )
+    return runs
+
+
+def fetch_ci(
+    rest: GitHubREST, repo_name: str, sha: str, ignore: Collection[str] = ()
+) -> Tuple[str, List[str]]:
+    """
+    Check runs и combined status коммита двумя условными GET: пока CI не сдвинулся,
+    GitHub отвечает 304, и опрос не тратит лимит запросов.
+    """
+    runs = rest.get(f"repos/{repo_name}/commits/{sha}/check-runs", {"per_page": 100})
+    combined = rest.get(f"repos/{repo_name}/commits/{sha}/status")
+    statuses = [
+        (s.get("context") or "unknown", (s.get("state") or "").lower())
+        for s in combined.get("statuses") or []
+    ]
+    state = (combined.get("state") or "pending").lower()
+    return evaluate_ci(check_runs_from_rest(runs), state, statuses, ignore)
+
+
+def wait_for_ci(
+    rest: GitHubREST,
+    repo_name: str,
+    pr_number: int,
+    head_sha: str,
+    *,
+    timeout: float,
+    interval: float = 5.0,
+    max_interval: float = 30.0,
+    ignore: Collection[str] = (),
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> CIResult:
+    """
+    Ждёт, пока CI head-коммита PR завершится: опрос с удвоением паузы от interval
+    до max_interval, но не дольше timeout секунд. Если в PR запушили новый коммит —
+    superseded: вердикт по нему выдаст ревью, запущенное этим push.
+    ignore — check runs, которые не ждём (например, job самого ревьюера).
+    """
+    deadline = clock() + timeout
+    delay = interval
+    result = CIResult("pending", head_sha, ["CI не завершился за отведённое время."])
+    while clock() < deadline:
+        sleep(min(delay, max(0.0, deadline - clock())))
+        delay = min(max_interval, delay * 2)
+        result.polls += 1
+
+        current = rest.get(f"repos/{repo_name}/pulls/{pr_number}")["head"]["sha"]
+        if current != head_sha:
+            return CIResult("superseded", current, [f"head moved to {current[:7]}"], result.polls)
+
+        state, details = fetch_ci(rest, repo_name, head_sha, ignore)
+        print(f"CI poll {result.polls}: {state} {details}")
+        if state != "pending":
+            return CIResult(state, head_sha, details, result.polls)
+    return result
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Any
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -13,7 +16,40 @@ class Settings(BaseSettings):
     openai_api_key: str | None = None
     openai_model: str = "gpt-4.1-mini"
 
+    # повторы LLM-запросов: backoff с jitter, Retry-After, общий дедлайн (сек)
+    llm_max_retries: int = 4
+    llm_backoff_base: float = 1.0
+    llm_backoff_max: float = 30.0
+    llm_retry_deadline: float = 120.0
+    # лимит запросов в минуту (0 — без лимита) и переопределения по моделям,
+    # например LLM_RATE_LIMITS='{"openai/gpt-4o-mini": 30}'
+    llm_requests_per_minute: float = 0
+    llm_rate_limits: dict[str, float] = {}
+
+    # бюджет токенов: окно модели, потолок промпта и ответ модели;
+    # переопределения по моделям, например LLM_OUTPUT_TOKENS='{"openai/gpt-4o-mini": 8000}'
+    llm_context_window: int = 128000
+    llm_max_input_tokens: int = 12000
+    llm_max_output_tokens: int = 4096
+    llm_context_windows: dict[str, int] = {}
+    llm_output_tokens: dict[str, int] = {}
+
+    # генерация изменений агентом читает/пишет кэш ответов (LLM_CACHE_DIR), хотя
+    # temperature > 0: повтор workflow с тем же промптом не платит за запрос заново
+    llm_cache_agent: bool = False
+
+    # точечная починка заглушек: не больше раундов и секунд на все раунды
+    llm_repair_max_rounds: int = 2
+    llm_repair_deadline: float = 180.0
+
+    # ожидание CI ревьюером: 0 — выйти при pending (следующее событие запустит ревью снова)
+    review_ci_timeout: float = 0.0
+    review_ci_poll_interval: float = 5.0
+    review_ci_poll_max_interval: float = 30.0
+
     log_level: str = "INFO"
+    # выгрузка трейсинга стадий: *.json — Chrome trace, иначе JSON lines
+    trace_file: str | None = None
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -21,4 +57,14 @@ class Settings(BaseSettings):
     )
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Settings читаются (env, .env) при первом обращении, а не при импорте модуля."""
+    return Settings()
+
+
+def __getattr__(name: str) -> Any:
+    # совместимость: `from core.config import settings` по-прежнему работает
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
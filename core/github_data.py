@@ -0,0 +1,226 @@
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Collection, Dict, List, Optional, Sequence, Tuple
+
+from core.http_pool import ConnectionPool, get_default_pool
+from core.tracing import count
+
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+# REST отдаёт login "github-actions[bot]", GraphQL — "github-actions"
+BOT_LOGINS = {"github-actions[bot]", "github-actions"}
+REVIEWER_MARKER = "AI Reviewer report"
+FAILED_CONCLUSIONS = ("failure", "cancelled", "timed_out", "action_required")
+
+PR_SNAPSHOT_QUERY = """
+query($owner: String!, $name: String!, $number: Int!) {
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) {
+      number title body url headRefName
+      labels(first: 50) { nodes { name } }
+      files(first: 100) { totalCount nodes { path } }
+      commits(last: 1) {
+        nodes {
+          commit {
+            oid
+            status { state contexts { context state } }
+            checkSuites(first: 20) {
+              nodes {
+                checkRuns(first: 50) {
+                  nodes { name status conclusion title summary text }
+                }
+              }
+            }
+          }
+        }
+      }
+      comments(last: 50) { nodes { databaseId body author { login } } }
+    }
+  }
+}
+"""
+
+
+@dataclass
+class CheckRunInfo:
+    name: str
+    status: str
+    conclusion: str
+    title: str = ""
+    summary: str = ""
+    text: str = ""
+
+
+@dataclass
+class PRSnapshot:
+    """Всё, что агентам нужно прочитать о PR, одним GraphQL-запросом."""
+
+    number: int
+    title: str
+    body: str
+    html_url: str
+    head_ref: str
+    head_sha: str
+    labels: List[str] = field(default_factory=list)
+    files: List[str] = field(default_factory=list)
+    files_total: int = 0
+    check_runs: List[CheckRunInfo] = field(default_factory=list)
+    combined_state: str = "pending"
+    statuses: List[Tuple[str, str]] = field(default_factory=list)
+    last_reviewer_comment: str = ""
+
+    def ci_failures(self) -> List[Tuple[str, str]]:
+        """Упавшие check runs на head-коммите — как code_agent.agent.get_ci_failures."""
+        failures: List[Tuple[str, str]] = []
+        for cr in self.check_runs:
+            if cr.conclusion not in FAILED_CONCLUSIONS:
+                continue
+            details = "\n".join([cr.title, cr.summary, cr.text]).strip()
+            if not details:
+                details = f"{cr.name} failed (no output text available)."
+            failures.append((cr.name, details))
+        return failures
+
+    def ci_status(self, ignore: Collection[str] = ()) -> Tuple[str, List[str]]:
+        """CI head-коммита по check runs и статусам — как reviewer_agent.review.get_ci_status."""
+        if not self.head_sha:
+            return "missing", ["Нет коммитов в PR — CI проверить невозможно."]
+        return evaluate_ci(self.check_runs, self.combined_state, self.statuses, ignore)
+
+
+def evaluate_ci(
+    check_runs: Sequence[CheckRunInfo],
+    combined_state: str,
+    statuses: Sequence[Tuple[str, str]],
+    ignore: Collection[str] = (),
+) -> Tuple[str, List[str]]:
+    """
+    success / pending / failed по check runs (GitHub Actions и другие приложения)
+    и commit statuses. Combined status учитывается, только если статусы вообще есть:
+    у репозитория только с Actions он навсегда "pending".
+    Упавшая проверка — сразу failed, не дожидаясь остальных.
+    ignore — имена check runs, которые не ждём (job самого ревьюера).
+    """
+    check_runs = [cr for cr in check_runs if cr.name not in ignore]
+    details: List[str] = []
+    if statuses and combined_state not in ("success", "pending"):
+        details.append(f"combined status: {combined_state}")
+        details += [f"{ctx}: {st}" for ctx, st in statuses if st != "success"]
+    details += [
+        f"{cr.name}: {cr.conclusion}" for cr in check_runs if cr.conclusion in FAILED_CONCLUSIONS
+    ]
+    if details:
+        return "failed", details
+
+    running = [cr.name for cr in check_runs if cr.status != "completed"]
+    running += [ctx for ctx, st in statuses if st == "pending"]
+    if running:
+        return "pending", [f"CI ещё выполняется: {', '.join(running)}."]
+    if not check_runs and not statuses:
+        return "pending", ["CI ещё выполняется."]
+    return "success", []
+
+
+def _lower(value: Optional[str]) -> str:
+    return (value or "").lower()
+
+
+def parse_pr_snapshot(data: Dict[str, Any]) -> PRSnapshot:
+    pr = data["repository"]["pullRequest"]
+    if pr is None:
+        raise RuntimeError("Pull request not found")
+
+    commits = pr["commits"]["nodes"]
+    commit = commits[-1]["commit"] if commits else {}
+
+    check_runs = []
+    for suite in (commit.get("checkSuites") or {}).get("nodes") or []:
+        for run in (suite.get("checkRuns") or {}).get("nodes") or []:
+            check_runs.append(
+                CheckRunInfo(
+                    name=run.get("name") or "unknown-check",
+                    status=_lower(run.get("status")),
+                    conclusion=_lower(run.get("conclusion")),
+                    title=run.get("title") or "",
+                    summary=run.get("summary") or "",
+                    text=run.get("text") or "",
+                )
+            )
+
+    status = commit.get("status")
+    # как в REST: без статусов combined state считается pending
+    combined_state = _lower(status["state"]) if status else "pending"
+    statuses = [
+        (c.get("context") or "unknown", _lower(c.get("state")))
+        for c in (status or {}).get("contexts") or []
+    ]
+
+    last_comment = ""
+    for comment in reversed(pr["comments"]["nodes"]):
+        login = (comment.get("author") or {}).get("login") or ""
+        body = comment.get("body") or ""
+        if login in BOT_LOGINS and REVIEWER_MARKER in body:
+            last_comment = body
+            break
+
+    return PRSnapshot(
+        number=pr["number"],
+        title=pr.get("title") or "",
+        body=pr.get("body") or "",
+        html_url=pr.get("url") or "",
+        head_ref=pr.get("headRefName") or "",
+        head_sha=commit.get("oid") or "",
+        labels=[label["name"] for label in pr["labels"]["nodes"]],
+        files=[f["path"] for f in pr["files"]["nodes"]],
+        files_total=pr["files"]["totalCount"],
+        check_runs=check_runs,
+        combined_state=combined_state,
+        statuses=statuses,
+        last_reviewer_comment=last_comment,
+    )
+
+
+def graphql(
+    token: str,
+    query: str,
+    variables: Dict[str, Any],
+    url: str = GITHUB_GRAPHQL_URL,
+    pool: Optional[ConnectionPool] = None,
+) -> Dict[str, Any]:
+    pool = pool or get_default_pool()
+    count("github.graphql")
+    resp = pool.request(
+        "POST",
+        url,
+        body=json.dumps({"query": query, "variables": variables}).encode("utf-8"),
+        headers={
+            "Authorization": f"bearer {token}",
+            "Content-Type": "application/json",
+            "User-Agent": "code-agent",
+        },
+    )
+    if resp.status >= 400:
+        raise RuntimeError(f"GitHub GraphQL HTTP {resp.status}: {resp.body[:300]!r}")
+    payload = json.loads(resp.body.decode("utf-8"))
+    if payload.get("errors"):
+        raise RuntimeError(f"GitHub GraphQL errors: {payload['errors']}")
+    data: Dict[str, Any] = payload["data"]
+    return data
+
+
+def fetch_pr_snapshot(
+    token: str, repo_name: str, pr_number: int, url: Optional[str] = None
+) -> Optional[PRSnapshot]:
+    """
+    Head SHA, labels, файлы, check runs, статусы и последний отчёт ревьюера одним запросом.
+    None — если GraphQL недоступен; тогда вызывающий идёт по REST.
+    """
+    owner, name = repo_name.split("/", 1)
+    url = url or os.environ.get("GITHUB_GRAPHQL_URL") or GITHUB_GRAPHQL_URL
+    variables = {"owner": owner, "name": name, "number": pr_number}
+    try:
+        data = graphql(token, PR_SNAPSHOT_QUERY, variables, url)
+        return parse_pr_snapshot(data)
+    except Exception as e:
+        print(f"GraphQL snapshot failed, falling back to REST: {e}")
+        return None
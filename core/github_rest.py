@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import threading
+import urllib.parse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from core.http_pool import ConnectionPool, get_default_pool
+from core.tracing import count
+
+if TYPE_CHECKING:
+    from github import Github
+
+GITHUB_API_URL = "https://api.github.com"
+DEFAULT_CACHE_DIR = "~/.cache/code-agent/github-http"
+
+
+class GitHubAPIError(RuntimeError):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"GitHub API {status}: {message}")
+        self.status = status
+
+
+@dataclass
+class RESTStats:
+    requests: int = 0
+    not_modified: int = 0
+    writes: int = 0
+
+
+class ETagCache:
+    """
+    Постоянный кэш GET-ответов по URL: ETag + тело.
+    Файлы лежат в директории (в CI её сохраняет actions/cache между запусками).
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(os.path.expanduser(directory))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            entry: Dict[str, Any] = json.loads(self._path(url).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, url: str, etag: str, body: Any) -> None:
+        path = self._path(url)
+        tmp = path.with_suffix(".tmp")
+        with self._lock:
+            tmp.write_text(json.dumps({"url": url, "etag": etag, "body": body}), encoding="utf-8")
+            os.replace(tmp, path)
+
+
+class GitHubREST:
+    """
+    Тонкий REST-клиент GitHub поверх keep-alive пула.
+    GET идёт условно (If-None-Match): неизменившийся ресурс возвращает 304,
+    который не расходует лимит 5000 запросов/час, а тело берётся из ETagCache.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        base_url: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        pool: Optional[ConnectionPool] = None,
+    ):
+        self.token = token
+        self.base_url = (base_url or os.environ.get("GITHUB_API_URL") or GITHUB_API_URL).rstrip("/")
+        self.cache = ETagCache(
+            cache_dir or os.environ.get("GITHUB_HTTP_CACHE_DIR") or DEFAULT_CACHE_DIR
+        )
+        self.pool = pool or get_default_pool()
+        self.stats = RESTStats()
+
+    def _url(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        if params:
+            url += "?" + urllib.parse.urlencode(sorted(params.items()))
+        return url
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"token {self.token}",
+            "Accept": "application/vnd.github+json",
+            "User-Agent": "code-agent",
+        }
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        url = self._url(path, params)
+        headers = self._headers()
+        cached = self.cache.get(url)
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+
+        resp = self.pool.request("GET", url, headers=headers)
+        self.stats.requests += 1
+        count("github.rest")
+        if resp.status == 304 and cached:
+            self.stats.not_modified += 1
+            count("github.not_modified")
+            return cached["body"]
+        if resp.status >= 400:
+            raise GitHubAPIError(resp.status, resp.body.decode("utf-8", errors="replace")[:300])
+
+        body = json.loads(resp.body.decode("utf-8")) if resp.body else None
+        etag = resp.headers.get("etag")
+        if etag:
+            self.cache.put(url, etag, body)
+        return body
+
+    def request(self, method: str, path: str, payload: Any = None) -> Any:
+        headers = self._headers()
+        data = None
+        if payload is not None:
+            data = json.dumps(payload).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        resp = self.pool.request(method, self._url(path), body=data, headers=headers)
+        self.stats.requests += 1
+        self.stats.writes += 1
+        count("github.rest")
+        if resp.status >= 400:
+            raise GitHubAPIError(resp.status, resp.body.decode("utf-8", errors="replace")[:300])
+        return json.loads(resp.body.decode("utf-8")) if resp.body else None
+
+
+def github_client(token: str) -> "Github":
+    """
+    PyGithub-клиент на тот же API, что и GitHubREST: env GITHUB_API_URL
+    (GitHub Enterprise, локальные стенды бенчмарка). Импорт PyGithub — при первом вызове.
+    Каждый его HTTP-запрос считается в трейсинге (github.pygithub), как и запросы GitHubREST.
+    lazy=True: get_repo/get_pull не делают GET, пока не понадобится поле, которого нет.
+    """
+    from github import Auth, Github
+
+    gh = Github(
+        auth=Auth.Token(token),
+        base_url=os.environ.get("GITHUB_API_URL") or GITHUB_API_URL,
+        lazy=True,
+    )
+    _count_requests(gh.requester)
+    return gh
+
+
+def _count_requests(requester: Any) -> Any:
+    # все запросы Requester (и *AndCheck, и graphql, и страницы списков) идут через эти три
+    # метода; подменяем их у экземпляра. Копии requester'а (get_repo и т. п.)
+    # создаются через with*, поэтому подменяем и их. with* может вернуть тот же экземпляр —
+    # второй раз его не оборачиваем, иначе запросы посчитаются дважды
+    if getattr(requester, "_counted", False):
+        return requester
+    requester._counted = True
+    for name in ("requestJson", "requestMultipart", "requestBlob"):
+        method = getattr(requester, name)
+
+        def counted(*args: Any, _method: Any = method, **kwargs: Any) -> Any:
+            count("github.pygithub")
+            return _method(*args, **kwargs)
+
+        setattr(requester, name, counted)
+
+    for name in ("withAuth", "withLazy", "withApiVersion"):
+        method = getattr(requester, name, None)
+        if method is None:
+            continue
+
+        def copied(*args: Any, _method: Any = method, **kwargs: Any) -> Any:
+            return _count_requests(_method(*args, **kwargs))
+
+        setattr(requester, name, copied)
+    return requester
+
+
+def ensure_labels(rest: GitHubREST, repo_name: str, labels: Dict[str, str]) -> None:
+    """Создаёт недостающие labels; список labels репозитория читается условным GET."""
+    existing = {label["name"] for label in rest.get(f"repos/{repo_name}/labels", {"per_page": 100})}
+    for name, color in labels.items():
+        if name in existing:
+            continue
+        try:
+            rest.request("POST", f"repos/{repo_name}/labels", {"name": name, "color": color})
+        except GitHubAPIError as e:
+            # 422 — label уже есть (не попал в первую страницу списка)
+            if e.status != 422:
+                raise
+
+
+def get_issue_labels(rest: GitHubREST, repo_name: str, number: int) -> List[str]:
+    labels = rest.get(f"repos/{repo_name}/issues/{number}/labels", {"per_page": 100})
+    return [label["name"] for label in labels]
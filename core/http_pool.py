@@ -0,0 +1,264 @@
+import base64
+import contextlib
+import http.client
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+# Ошибки, при которых keep-alive соединение оказалось закрытым сервером
+# и запрос безопасно повторить на свежем соединении.
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+HostKey = Tuple[str, str, int]
+
+
+def proxy_for(scheme: str, host: str) -> Optional[urllib.parse.SplitResult]:
+    """
+    Прокси из окружения (HTTP(S)_PROXY, NO_PROXY) — как у urllib.request.urlopen.
+    None — соединяться напрямую.
+    """
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(host):
+        return None
+    if "://" not in proxy:
+        proxy = f"http://{proxy}"
+    return urllib.parse.urlsplit(proxy)
+
+
+def _proxy_auth(proxy: urllib.parse.SplitResult) -> Dict[str, str]:
+    if proxy.username is None:
+        return {}
+    credentials = (
+        f"{urllib.parse.unquote(proxy.username)}:{urllib.parse.unquote(proxy.password or '')}"
+    )
+    token = base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+    return {"Proxy-Authorization": f"Basic {token}"}
+
+
+@dataclass
+class PoolStats:
+    created: int = 0
+    reused: int = 0
+    evicted: int = 0
+    discarded: int = 0
+
+
+@dataclass
+class HTTPResult:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+class _ProxiedHTTPConnection(http.client.HTTPConnection):
+    """HTTP через прокси: к каждому запросу добавляется Proxy-Authorization (если задан)."""
+
+    proxy_headers: Dict[str, str] = {}
+
+    def putrequest(self, method: str, url: str, *args: Any, **kwargs: Any) -> None:
+        super().putrequest(method, url, *args, **kwargs)
+        for name, value in self.proxy_headers.items():
+            self.putheader(name, value)
+
+
+class ConnectionPool:
+    """
+    Пул keep-alive HTTP(S) соединений, по одному набору на (scheme, host, port).
+    Потокобезопасен; держит не больше max_idle_per_host простаивающих соединений,
+    соединения, простоявшие дольше idle_timeout, закрываются при следующем обращении.
+    Прокси из окружения учитывается: HTTPS идёт туннелем (CONNECT), HTTP — через прокси
+    с абсолютным URL в строке запроса.
+    """
+
+    def __init__(
+        self, max_idle_per_host: int = 8, idle_timeout: float = 60.0, timeout: float = 60.0
+    ):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.stats = PoolStats()
+        self._idle: Dict[HostKey, Deque[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _split(url: str) -> Tuple[HostKey, str]:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or "http"
+        if scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {scheme}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        host = parts.hostname or ""
+        if scheme == "http" and proxy_for(scheme, host) is not None:
+            # HTTP-прокси ждёт absolute-form: GET http://host:port/path
+            path = f"http://{parts.netloc.rpartition('@')[2]}{path}"
+        return (scheme, host, port), path
+
+    def _new_connection(self, key: HostKey, timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        with self._lock:
+            self.stats.created += 1
+        proxy = proxy_for(scheme, host)
+        if proxy is None:
+            if scheme == "https":
+                return http.client.HTTPSConnection(host, port, timeout=timeout)
+            return http.client.HTTPConnection(host, port, timeout=timeout)
+
+        proxy_host, proxy_port = proxy.hostname or "", proxy.port or 80
+        if scheme == "https":
+            conn: http.client.HTTPConnection = http.client.HTTPSConnection(
+                proxy_host, proxy_port, timeout=timeout
+            )
+            conn.set_tunnel(host, port, headers=_proxy_auth(proxy))
+            return conn
+        conn = _ProxiedHTTPConnection(proxy_host, proxy_port, timeout=timeout)
+        conn.proxy_headers = _proxy_auth(proxy)
+        return conn
+
+    def _acquire(self, key: HostKey, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                conn, released_at = idle.pop()
+                if now - released_at > self.idle_timeout:
+                    conn.close()
+                    self.stats.evicted += 1
+                    continue
+                self.stats.reused += 1
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        return self._new_connection(key, timeout), False
+
+    def _release(self, key: HostKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < self.max_idle_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+            self.stats.discarded += 1
+        conn.close()
+
+    def _send(
+        self,
+        key: HostKey,
+        method: str,
+        path: str,
+        body: Optional[bytes],
+        headers: Dict[str, str],
+        timeout: float,
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        conn, reused = self._acquire(key, timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            return conn, conn.getresponse()
+        except _STALE_ERRORS:
+            conn.close()
+            if not reused:
+                raise
+        except BaseException:
+            conn.close()
+            raise
+
+        # сервер закрыл простаивающее соединение — повторяем один раз на новом
+        conn = self._new_connection(key, timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            return conn, conn.getresponse()
+        except BaseException:
+            conn.close()
+            raise
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> HTTPResult:
+        key, path = self._split(url)
+        conn, resp = self._send(
+            key, method, path, body, dict(headers or {}), timeout or self.timeout
+        )
+        try:
+            data = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+
+        result = HTTPResult(
+            status=resp.status,
+            headers={k.lower(): v for k, v in resp.getheaders()},
+            body=data,
+        )
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return result
+
+    @contextlib.contextmanager
+    def stream(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[http.client.HTTPResponse]:
+        """
+        Отдаёт ответ для чтения по мере поступления (например, SSE).
+        Соединение возвращается в пул, только если тело дочитано до конца;
+        при исключении или недочитанном ответе оно закрывается.
+        """
+        key, path = self._split(url)
+        conn, resp = self._send(
+            key, method, path, body, dict(headers or {}), timeout or self.timeout
+        )
+        try:
+            yield resp
+        except BaseException:
+            conn.close()
+            raise
+        if resp.isclosed() and not resp.will_close:
+            self._release(key, conn)
+        else:
+            conn.close()
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle.clear()
+        for idle in pools:
+            for conn, _ in idle:
+                conn.close()
+
+
+_default_pool: Optional[ConnectionPool] = None
+_default_lock = threading.Lock()
+
+
+def get_default_pool() -> ConnectionPool:
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
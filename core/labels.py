@@ -0,0 +1,122 @@
+import threading
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Set
+
+from core.github_rest import GitHubREST, ensure_labels, get_issue_labels
+
+LABEL_REVIEW_REQUESTED = "ai-review-requested"
+LABEL_CHANGES_REQUESTED = "ai-changes-requested"
+LABEL_APPROVED = "ai-approved"
+
+LABEL_COLORS = {
+    LABEL_REVIEW_REQUESTED: "cfd3d7",
+    LABEL_CHANGES_REQUESTED: "fbca04",
+    LABEL_APPROVED: "0e8a16",
+}
+
+
+class ReviewState(str, Enum):
+    NONE = "none"
+    REVIEW_REQUESTED = "review-requested"
+    CHANGES_REQUESTED = "changes-requested"
+    APPROVED = "approved"
+
+
+STATE_LABELS = {
+    ReviewState.REVIEW_REQUESTED: LABEL_REVIEW_REQUESTED,
+    ReviewState.CHANGES_REQUESTED: LABEL_CHANGES_REQUESTED,
+    ReviewState.APPROVED: LABEL_APPROVED,
+}
+
+# Жизненный цикл ревью:
+#   submit          — code-agent запушил новую попытку -> ждём ревью (из любого состояния)
+#   approve         — reviewer принял PR
+#   request_changes — reviewer вернул PR агенту
+# Вердикт ставится только на ожидающий ревью PR: запоздавший запуск ревьюера
+# не перепишет состояние, выставленное после него.
+_ANY = list(ReviewState)
+_AWAITING_REVIEW = [ReviewState.NONE, ReviewState.REVIEW_REQUESTED]
+TRANSITIONS: Dict[str, Dict[ReviewState, ReviewState]] = {
+    "submit": {state: ReviewState.REVIEW_REQUESTED for state in _ANY},
+    "approve": {state: ReviewState.APPROVED for state in _AWAITING_REVIEW},
+    "request_changes": {state: ReviewState.CHANGES_REQUESTED for state in _AWAITING_REVIEW},
+}
+
+_ensured: Set[str] = set()
+_ensured_lock = threading.Lock()
+
+
+def ensure_review_labels(rest: GitHubREST, repo_name: str) -> None:
+    """Создаёт labels жизненного цикла один раз на репозиторий за процесс."""
+    with _ensured_lock:
+        if repo_name in _ensured:
+            return
+    ensure_labels(rest, repo_name, LABEL_COLORS)
+    with _ensured_lock:
+        _ensured.add(repo_name)
+
+
+def state_from_labels(labels: Iterable[str]) -> ReviewState:
+    """
+    Текущее состояние по labels. Если state-labels несколько (следы старых
+    пошаговых переходов), приоритет у ожидания ревью, затем у changes.
+    """
+    present = set(labels)
+    for state in (
+        ReviewState.REVIEW_REQUESTED,
+        ReviewState.CHANGES_REQUESTED,
+        ReviewState.APPROVED,
+    ):
+        if STATE_LABELS[state] in present:
+            return state
+    return ReviewState.NONE
+
+
+def transition_allowed(current: ReviewState, event: str) -> bool:
+    return current in TRANSITIONS.get(event, {})
+
+
+def next_state(current: ReviewState, event: str) -> ReviewState:
+    try:
+        return TRANSITIONS[event][current]
+    except KeyError:
+        raise ValueError(f"Transition {event!r} is not allowed from {current.value}") from None
+
+
+def target_labels(labels: Iterable[str], state: ReviewState) -> List[str]:
+    """Все посторонние labels сохраняются, из state-labels остаётся ровно один."""
+    state_labels = set(STATE_LABELS.values())
+    target = [label for label in labels if label not in state_labels]
+    if state in STATE_LABELS:
+        target.append(STATE_LABELS[state])
+    return target
+
+
+def apply_transition(
+    rest: GitHubREST,
+    repo_name: str,
+    number: int,
+    event: str,
+    current_labels: Optional[List[str]] = None,
+) -> Optional[ReviewState]:
+    """
+    Считает целевой набор labels один раз и применяет его одним PUT
+    (замена целиком), без промежуточных состояний, на которые могли бы
+    сработать оба workflow. Если labels уже в нужном состоянии — запросов нет.
+    Если переход из текущего состояния не разрешён — labels не трогаются, возвращается None.
+    """
+    if event not in TRANSITIONS:
+        raise ValueError(f"Unknown transition {event!r}")
+    ensure_review_labels(rest, repo_name)
+    labels = (
+        current_labels if current_labels is not None else get_issue_labels(rest, repo_name, number)
+    )
+    current = state_from_labels(labels)
+    if not transition_allowed(current, event):
+        print(f"Labels of #{number}: {event!r} is not allowed from {current.value}, skipped")
+        return None
+    state = next_state(current, event)
+    target = target_labels(labels, state)
+    if set(target) != set(labels):
+        rest.request("PUT", f"repos/{repo_name}/issues/{number}/labels", {"labels": target})
+    return state
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from core.github_data import BOT_LOGINS, REVIEWER_MARKER
+from core.github_rest import DEFAULT_CACHE_DIR
+
+CURSOR_FILE = "last-reviewer-comments.json"
+
+# экземпляры создаются на каждый вызов, а файл один на процесс:
+# read-modify-write сериализуется общей блокировкой
+_write_lock = threading.Lock()
+
+
+class CommentCursorCache:
+    """
+    Для каждого PR помним id самого нового просмотренного комментария и последний
+    найденный отчёт ревьюера. id комментариев растут, поэтому всё, что не новее
+    курсора, уже просмотрено. Файл лежит рядом с ETag-кэшем (его сохраняет actions/cache).
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        directory = directory or os.environ.get("GITHUB_HTTP_CACHE_DIR") or DEFAULT_CACHE_DIR
+        self.path = Path(os.path.expanduser(directory)) / CURSOR_FILE
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            data: Dict[str, Any] = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._load().get(key)
+
+    def put(self, key: str, seen_id: int, body: str) -> None:
+        with _write_lock:
+            data = self._load()
+            data[key] = {"seen_id": seen_id, "body": body}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # свой временный файл у каждой записи: os.replace не заберёт чужой
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=CURSOR_FILE, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(json.dumps(data))
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+
+def is_reviewer_report(login: str, body: str) -> bool:
+    return login in BOT_LOGINS and REVIEWER_MARKER in body
+
+
+def find_last_reviewer_comment(
+    pr, repo_name: str, cache: Optional[CommentCursorCache] = None
+) -> str:
+    """
+    Последний отчёт ревьюера через REST: страницы идут с конца (PaginatedList.reversed),
+    перебор останавливается на первом отчёте или на курсоре прошлого запуска.
+    """
+    cache = cache or CommentCursorCache()
+    key = f"{repo_name}#{pr.number}"
+    cached = cache.get(key) or {}
+    seen_id = int(cached.get("seen_id") or 0)
+
+    newest_id = 0
+    body = ""
+    for comment in pr.get_issue_comments().reversed:
+        newest_id = newest_id or comment.id
+        if comment.id <= seen_id:
+            # дальше только уже просмотренные комментарии
+            body = cached.get("body") or ""
+            break
+        login = comment.user.login if comment.user else ""
+        if is_reviewer_report(login, comment.body or ""):
+            body = comment.body or ""
+            break
+
+    if newest_id and newest_id != seen_id:
+        cache.put(key, newest_id, body)
+    return body
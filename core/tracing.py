@@ -0,0 +1,227 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, TypeVar, cast
+
+T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Any])
+
+logger = logging.getLogger("code_agent.trace")
+# потолок хранимых span'ов: долгоживущий воркер без trace_file не копит их бесконечно
+MAX_SPANS = 50_000
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    end: float = 0.0
+    thread: int = 0
+    parent: str = ""
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    # счётчики включают вложенные span'ы: github.*, llm.*, subprocess.*
+    counters: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+class Tracer:
+    """
+    Лёгкий трейсер: span'ы вкладываются по стеку текущего потока, count() добавляет
+    значение во все открытые span'ы потока. Готовые span'ы экспортируются в JSON lines
+    (по строке на span) или в Chrome trace (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.finished: List[Span] = []
+        self.totals: Dict[str, float] = {}
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        stack: List[Span] = self._local.stack
+        return stack
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        stack = self._stack()
+        current = Span(
+            name,
+            time.perf_counter(),
+            thread=threading.get_ident(),
+            parent=stack[-1].name if stack else "",
+            attrs=attrs,
+        )
+        stack.append(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            stack.pop()
+            current.end = time.perf_counter()
+            with self._lock:
+                self.finished.append(current)
+                if len(self.finished) > MAX_SPANS:
+                    del self.finished[: len(self.finished) - MAX_SPANS]
+            logger.debug("%s %.3fs %s", name, current.seconds, current.counters)
+
+    def count(self, counter: str, value: float = 1) -> None:
+        with self._lock:
+            for span in self._stack():
+                span.counters[counter] = span.counters.get(counter, 0) + value
+            self.totals[counter] = self.totals.get(counter, 0) + value
+
+    def wrap(self, fn: Callable[..., T]) -> Callable[..., T]:
+        """
+        fn для пула потоков: внутри него открытые span'ы вызывающего потока остаются
+        родителями, и счётчики (например, subprocess.*) попадают в стадию вызывающего.
+        """
+        parents = list(self._stack())
+
+        def run(*args: Any, **kwargs: Any) -> T:
+            saved = self._stack()
+            self._local.stack = list(parents)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._local.stack = saved
+
+        return run
+
+    def export_jsonl(self, path: str) -> None:
+        with self._lock:
+            spans, self.finished = self.finished, []
+        with open(path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps({**asdict(span), "seconds": span.seconds}) + "\n")
+
+    def export_chrome(self, path: str) -> None:
+        # Chrome trace — один JSON-документ, поэтому span'ы не сбрасываются между выгрузками
+        with self._lock:
+            spans = list(self.finished)
+        origin = min((s.start for s in spans), default=0.0)
+        events = [
+            {
+                "name": s.name,
+                "cat": s.name.split(" ")[0],
+                "ph": "X",
+                "ts": (s.start - origin) * 1e6,
+                "dur": s.seconds * 1e6,
+                "pid": os.getpid(),
+                "tid": s.thread,
+                "args": {**s.attrs, **s.counters},
+            }
+            for s in spans
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self, root: Optional[Span] = None) -> str:
+        """Таблица стадий: время и счётчики; root — его прямые потомки в его потоке и он сам."""
+        with self._lock:
+            spans = list(self.finished)
+        if root is not None:
+            spans = [
+                s
+                for s in spans
+                if s.parent == root.name
+                and s.thread == root.thread
+                and root.start <= s.start <= root.end
+            ] + [root]
+        lines = ["trace:"]
+        for s in sorted(spans, key=lambda s: (s is root, s.start)):
+            counters = " ".join(f"{k}={v:g}" for k, v in sorted(s.counters.items()))
+            lines.append(f"  {s.name:<24} {s.seconds * 1000:9.1f} ms  {counters}")
+        return "\n".join(lines)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(name: str, **attrs: Any):
+    return _tracer.span(name, **attrs)
+
+
+def count(counter: str, value: float = 1) -> None:
+    _tracer.count(counter, value)
+
+
+def wrap(fn: Callable[..., T]) -> Callable[..., T]:
+    return _tracer.wrap(fn)
+
+
+def record_subprocess(started: float) -> None:
+    """Учёт дочернего процесса (git, ruff, black, pytest, mypy): число и суммарное время."""
+    _tracer.count("subprocess.calls")
+    _tracer.count("subprocess.seconds", time.perf_counter() - started)
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """Уровень логов трейсинга из Settings.log_level (DEBUG — каждый span)."""
+    if level is None:
+        from core.config import get_settings
+
+        level = get_settings().log_level
+    logger.setLevel(level.upper())
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+
+
+def flush(root: Optional[Span] = None) -> None:
+    """
+    Пишет summary в лог (INFO) и выгружает span'ы в Settings.trace_file:
+    *.json — Chrome trace, иначе — JSON lines (дописываются).
+    """
+    from core.config import get_settings
+
+    configure_logging()
+    logger.info(_tracer.summary(root))
+    path = get_settings().trace_file
+    if not path:
+        return
+    if path.endswith(".json"):
+        _tracer.export_chrome(path)
+    else:
+        _tracer.export_jsonl(path)
+
+
+def traced(name: str, attrs: Sequence[str] = ()) -> Callable[[F], F]:
+    """
+    Декоратор точки входа (run_issue_to_pr, review_pr): вызов идёт в корневом span'е,
+    после него — flush(). attrs — имена аргументов, попадающие в attrs span'а.
+    """
+
+    def decorate(fn: F) -> F:
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def run(*args: Any, **kwargs: Any) -> Any:
+            bound = signature.bind_partial(*args, **kwargs).arguments
+            root: Optional[Span] = None
+            try:
+                with span(name, **{k: bound[k] for k in attrs if k in bound}) as root:
+                    return fn(*args, **kwargs)
+            finally:
+                flush(root)
+
+        return cast(F, run)
+
+    return decorate
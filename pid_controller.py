@@ -1,4 +1,7 @@
 class PIDController:
+    # без __dict__ на экземпляр: меньше памяти и быстрее доступ к атрибутам в update
+    __slots__ = ("kp", "ki", "kd", "previous_error", "integral", "output_min", "output_max")
+
     def __init__(self, kp: float, ki: float, kd: float):
         self.kp = kp
         self.ki = ki
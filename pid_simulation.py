@@ -0,0 +1,236 @@
+"""
+Замкнутый контур PID + модель объекта: переходная характеристика на ступеньку
+уставки и подбор коэффициентов перебором тысяч (kp, ki, kd) сразу.
+Кандидаты считаются векторно (PIDBank — та же арифметика, что PIDController.update),
+большие наборы делятся на части и расходятся по пулу процессов.
+"""
+
+import itertools
+import math
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Deque, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+from pid_bank import PIDBank
+from pid_controller import PIDController
+
+# часть кандидатов на один процесс: меньше — больше накладных расходов на pickle
+DEFAULT_CHUNK = 2048
+
+
+class Plant(Protocol):
+    dead_time: float
+
+    def initial(self, n: int) -> Tuple[Any, ...]: ...
+
+    def step(self, state: Tuple[Any, ...], u: Any, dt: float) -> Tuple[Any, ...]: ...
+
+
+# step() записан одними арифметическими выражениями: одинаково работает на float
+# и на массивах NumPy, поэтому векторный прогон и эталонный поштучный совпадают бит в бит
+
+
+@dataclass(frozen=True)
+class FirstOrderPlant:
+    """tau * y' = gain * u - y (явный Эйлер)."""
+
+    gain: float = 1.0
+    tau: float = 1.0
+    dead_time: float = 0.0
+
+    def initial(self, n: int) -> Tuple[Any, ...]:
+        return (np.zeros(n),)
+
+    def step(self, state: Tuple[Any, ...], u: Any, dt: float) -> Tuple[Any, ...]:
+        (y,) = state
+        return (y + dt * (self.gain * u - y) / self.tau,)
+
+
+@dataclass(frozen=True)
+class SecondOrderPlant:
+    """y'' + 2 * zeta * wn * y' + wn^2 * y = wn^2 * gain * u (полунеявный Эйлер)."""
+
+    gain: float = 1.0
+    wn: float = 1.0
+    zeta: float = 0.5
+    dead_time: float = 0.0
+
+    def initial(self, n: int) -> Tuple[Any, ...]:
+        return (np.zeros(n), np.zeros(n))
+
+    def step(self, state: Tuple[Any, ...], u: Any, dt: float) -> Tuple[Any, ...]:
+        y, v = state
+        v = v + dt * (self.wn * self.wn * (self.gain * u - y) - 2 * self.zeta * self.wn * v)
+        return (y + dt * v, v)
+
+
+@dataclass
+class SweepResult:
+    kp: np.ndarray
+    ki: np.ndarray
+    kd: np.ndarray
+    overshoot: np.ndarray  # выброс за уставку по направлению ступеньки, доля от неё; 0 — нет
+    settling_time: np.ndarray  # сек до входа в полосу навсегда; inf — не установился
+    iae: np.ndarray  # интеграл модуля ошибки
+
+    def __len__(self) -> int:
+        return self.kp.size
+
+    def best(self, metric: str = "iae", max_overshoot: Optional[float] = None) -> int:
+        """Индекс лучшего кандидата по metric (меньше — лучше), с фильтром перерегулирования."""
+        values = np.array(getattr(self, metric), dtype=np.float64)
+        if max_overshoot is not None:
+            values[self.overshoot > max_overshoot] = np.inf
+        return int(np.argmin(values))
+
+    def candidate(self, index: int) -> Tuple[float, float, float]:
+        return float(self.kp[index]), float(self.ki[index]), float(self.kd[index])
+
+
+def gain_grid(kp: Sequence[float], ki: Sequence[float], kd: Sequence[float]) -> np.ndarray:
+    """Все сочетания коэффициентов: массив (N, 3)."""
+    return np.array(list(itertools.product(kp, ki, kd)), dtype=np.float64).reshape(-1, 3)
+
+
+def _delay_steps(plant: Plant, dt: float) -> int:
+    return int(round(plant.dead_time / dt))
+
+
+def simulate(
+    candidates: np.ndarray,
+    plant: Plant,
+    *,
+    setpoint: float = 1.0,
+    dt: float = 0.01,
+    horizon: float = 10.0,
+    band: float = 0.02,
+    output_min: float = -10.0,
+    output_max: float = 10.0,
+) -> SweepResult:
+    """
+    Переходная характеристика для всех кандидатов (N, 3) в одном процессе.
+    На шаге k регулятор видит y_k и выдаёт u_k, объект получает u_(k - dead_time/dt).
+    Метрики копятся на лету — траектории не хранятся, горизонт может быть длинным.
+    Ступенька идёт из 0 в setpoint любого знака: перерегулирование считается по её направлению.
+    """
+    if setpoint == 0:
+        raise ValueError("setpoint must be non-zero: metrics are relative to the step")
+    candidates = np.asarray(candidates, dtype=np.float64).reshape(-1, 3)
+    n = len(candidates)
+    steps = int(round(horizon / dt))
+    bank = PIDBank(candidates[:, 0], candidates[:, 1], candidates[:, 2], output_min, output_max)
+    state = plant.initial(n)
+    delay = _delay_steps(plant, dt)
+    buffer = np.zeros((delay, n))
+    u = np.empty(n)
+
+    # пик отклика по направлению ступеньки: для отрицательной уставки — по -y
+    negative = setpoint < 0
+    peak = np.full(n, -np.inf)
+    iae = np.zeros(n)
+    last_outside = np.full(n, -1)
+    tolerance = band * abs(setpoint)
+    for k in range(steps):
+        y = state[0]
+        np.maximum(peak, np.negative(y) if negative else y, out=peak)
+        error = setpoint - y
+        iae += np.abs(error) * dt
+        last_outside[np.abs(error) > tolerance] = k
+
+        bank.update(setpoint, y, dt, out=u)
+        if delay:
+            applied = buffer[k % delay].copy()
+            buffer[k % delay] = u
+        else:
+            applied = u
+        state = plant.step(state, applied, dt)
+
+    return SweepResult(
+        kp=candidates[:, 0].copy(),
+        ki=candidates[:, 1].copy(),
+        kd=candidates[:, 2].copy(),
+        overshoot=np.maximum(0.0, (peak - abs(setpoint)) / abs(setpoint)),
+        settling_time=np.where(last_outside < steps - 1, (last_outside + 1) * dt, np.inf),
+        iae=iae,
+    )
+
+
+def simulate_scalar(
+    kp: float,
+    ki: float,
+    kd: float,
+    plant: Plant,
+    *,
+    setpoint: float = 1.0,
+    dt: float = 0.01,
+    horizon: float = 10.0,
+    band: float = 0.02,
+    output_min: float = -10.0,
+    output_max: float = 10.0,
+) -> Tuple[float, float, float]:
+    """
+    Эталон на одном PIDController: (overshoot, settling_time, iae).
+    Тот же порядок вычислений, что в simulate, — для проверки векторного прогона.
+    """
+    pid = PIDController(kp, ki, kd)
+    pid.output_min, pid.output_max = output_min, output_max
+    state = tuple(float(x[0]) for x in plant.initial(1))
+    delay = _delay_steps(plant, dt)
+    pending: Deque[float] = deque([0.0] * delay)
+    steps = int(round(horizon / dt))
+
+    negative = setpoint < 0
+    peak, iae, last_outside = -math.inf, 0.0, -1
+    tolerance = band * abs(setpoint)
+    for k in range(steps):
+        y = state[0]
+        peak = max(peak, -y if negative else y)
+        error = setpoint - y
+        iae += abs(error) * dt
+        if abs(error) > tolerance:
+            last_outside = k
+
+        u = pid.update(setpoint, y, dt)
+        if delay:
+            pending.append(u)
+            u = pending.popleft()
+        state = plant.step(state, u, dt)
+
+    overshoot = max(0.0, (peak - abs(setpoint)) / abs(setpoint))
+    settling = (last_outside + 1) * dt if last_outside < steps - 1 else math.inf
+    return overshoot, settling, iae
+
+
+def _concat(parts: List[SweepResult]) -> SweepResult:
+    return SweepResult(
+        *(
+            np.concatenate([getattr(p, name) for p in parts])
+            for name in ("kp", "ki", "kd", "overshoot", "settling_time", "iae")
+        )
+    )
+
+
+def sweep(
+    candidates: np.ndarray,
+    plant: Plant,
+    *,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK,
+    **options: Any,
+) -> SweepResult:
+    """
+    simulate() по частям candidates в пуле из workers процессов; порядок результатов —
+    как у candidates. options — параметры simulate (setpoint, dt, horizon, ...).
+    """
+    candidates = np.asarray(candidates, dtype=np.float64).reshape(-1, 3)
+    chunks = [candidates[i : i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+    chunks = chunks or [candidates]
+    if workers <= 1 or len(chunks) <= 1:
+        return _concat([simulate(chunk, plant, **options) for chunk in chunks])
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(simulate, chunk, plant, **options) for chunk in chunks]
+        return _concat([f.result() for f in futures])
@@ -1,30 +1,22 @@
 import os
+from typing import Collection, List, Optional, Set
 
 from github import Github
 
-LABEL_REVIEW_REQUESTED = "ai-review-requested"
-LABEL_CHANGES_REQUESTED = "ai-changes-requested"
-LABEL_APPROVED = "ai-approved"
-
-
-def ensure_label(repo, name: str, color: str = "ededed"):
-    """Создаёт label если его нет."""
-    try:
-        repo.get_label(name)
-    except Exception:
-        repo.create_label(name=name, color=color)
-
-
-def add_label(pr, name: str):
-    existing = {label.name for label in pr.get_labels()}
-    if name not in existing:
-        pr.add_to_labels(name)
-
-
-def remove_label(pr, name: str):
-    existing = {label.name for label in pr.get_labels()}
-    if name in existing:
-        pr.remove_from_labels(name)
+from core.ci_wait import wait_for_ci
+from core.config import get_settings
+from core.github_data import CheckRunInfo, evaluate_ci, fetch_pr_snapshot
+from core.github_rest import GitHubREST, get_issue_labels, github_client
+from core.labels import (  # noqa: F401  (LABEL_* реэкспортируются для совместимости)
+    LABEL_APPROVED,
+    LABEL_CHANGES_REQUESTED,
+    LABEL_REVIEW_REQUESTED,
+    apply_transition,
+    ensure_review_labels,
+    state_from_labels,
+    transition_allowed,
+)
+from core.tracing import span, traced
 
 
 def pr_body_has_sections(pr_body: str) -> bool:
@@ -38,63 +30,101 @@ def pr_body_has_sections(pr_body: str) -> bool:
     return has_summary and has_verify
 
 
-def get_ci_status(repo, pr):
+def own_check_names() -> Set[str]:
+    """Check run самого ревьюера в GitHub Actions (имя = id job'а) — его не ждём."""
+    job = os.environ.get("GITHUB_JOB", "")
+    return {job} if job else set()
+
+
+def get_ci_status(repo, pr, ignore: Collection[str] = ()):
     """
-    Возвращает (is_green, details_list)
-    details_list — список строк по неуспешным статусам CI.
-    Используем combined status — он совпадает с тем, что видно в GitHub UI.
+    Возвращает (state, details_list): success / pending / failed / missing.
+    details_list — список строк по неуспешным проверкам CI.
+    Учитываются check runs (GitHub Actions) и commit statuses — как в GitHub UI.
     """
-    commits = list(pr.get_commits())
-    if not commits:
+    # head SHA уже есть в объекте PR — список коммитов не нужен
+    last_sha = pr.head.sha
+    if not last_sha:
         return "missing", ["Нет коммитов в PR — CI проверить невозможно."]
-
-    last_sha = commits[-1].sha
     commit = repo.get_commit(last_sha)
 
+    check_runs = [
+        CheckRunInfo(name=cr.name, status=cr.status or "", conclusion=cr.conclusion or "")
+        for cr in commit.get_check_runs()
+    ]
     combined = commit.get_combined_status()
-    state = getattr(combined, "state", None) or combined.raw_data.get("state")
-
-    if state == "success":
-        return "success", []
-
-    if state == "pending":
-        return "pending", ["CI ещё выполняется."]
-
-    details = [f"combined status: {state}"]
-    for s in combined.statuses:
-        st = getattr(s, "state", None) or s.raw_data.get("state")
-        if st != "success":
-            ctx = getattr(s, "context", None) or s.raw_data.get("context") or "unknown"
-            details.append(f"{ctx}: {st}")
-
-    return "failed", details
-
-
-def main():
-    token = os.environ["GITHUB_TOKEN"]
-    repo_name = os.environ["GITHUB_REPOSITORY"]
-    pr_number = int(os.environ["PR_NUMBER"])
-
-    gh = Github(token)
+    statuses = [(s.context or "unknown", s.state or "") for s in combined.statuses]
+    return evaluate_ci(check_runs, combined.state or "pending", statuses, ignore)
+
+
+@traced("review_pr", attrs=("repo_name", "pr_number"))
+def review_pr(
+    token: str,
+    repo_name: str,
+    pr_number: int,
+    gh: Optional[Github] = None,
+    rest: Optional[GitHubREST] = None,
+    ci_timeout: Optional[float] = None,
+) -> str:
+    """
+    Ревью одного PR. Возвращает вердикт: approved / changes / pending / superseded;
+    stale — PR уже не ждёт ревью (вердикт выставлен другим запуском), ничего не пишем.
+    gh/rest — прогретые клиенты долгоживущего воркера, иначе создаются новые.
+    ci_timeout — сколько секунд ждать завершения CI (по умолчанию Settings.review_ci_timeout);
+    0 — сразу выйти с pending.
+    """
+    gh = gh or github_client(token)
     repo = gh.get_repo(repo_name)
     pr = repo.get_pull(pr_number)
 
-    # гарантируем, что labels существуют
-    ensure_label(repo, LABEL_REVIEW_REQUESTED, "cfd3d7")
-    ensure_label(repo, LABEL_CHANGES_REQUESTED, "fbca04")
-    ensure_label(repo, LABEL_APPROVED, "0e8a16")
-
-    files = list(pr.get_files())
-    pr_body = pr.body or ""
+    # гарантируем, что labels существуют (условный GET — 304 не тратит лимит)
+    rest = rest or GitHubREST(token)
+    ensure_review_labels(rest, repo_name)
 
     # 0) CI обязателен: если CI не зелёный — changes
-    ci_state, ci_details = get_ci_status(repo, pr)
+    # файлы, body и CI — одним GraphQL-запросом; при недоступности GraphQL — по REST
+    ignore = own_check_names()
+    with span("context"):
+        snapshot = fetch_pr_snapshot(token, repo_name, pr_number)
+        # labels — из того же снимка: целевой набор считается без отдельного GET
+        labels_now: Optional[List[str]] = None
+        if snapshot is not None:
+            labels_now = snapshot.labels
+            files_count = snapshot.files_total
+            pr_body = snapshot.body
+            ci_state, ci_details = snapshot.ci_status(ignore)
+        else:
+            files_count = len(list(pr.get_files()))
+            pr_body = pr.body or ""
+            ci_state, ci_details = get_ci_status(repo, pr, ignore)
+
+    settings = get_settings()
+    ci_timeout = settings.review_ci_timeout if ci_timeout is None else ci_timeout
+    if ci_state == "pending" and files_count and ci_timeout > 0:
+        # вердикт — как только CI завершится, а не при следующем событии PR
+        with span("wait_ci"):
+            ci = wait_for_ci(
+                rest,
+                repo_name,
+                pr_number,
+                snapshot.head_sha if snapshot is not None else pr.head.sha,
+                timeout=ci_timeout,
+                interval=settings.review_ci_poll_interval,
+                max_interval=settings.review_ci_poll_max_interval,
+                ignore=ignore,
+            )
+        # пока ждали CI, labels могли поменяться — перечитаем перед вердиктом
+        labels_now = None
+        if ci.state == "superseded":
+            print(f"Reviewer stopped: new commit {ci.head_sha[:7]} in PR {pr.html_url}")
+            return "superseded"
+        ci_state, ci_details = ci.state, ci.details
 
     notes = []
     verdict = "changes"
 
     # 1) Если PR пустой — changes
-    if len(files) == 0:
+    if files_count == 0:
         verdict = "changes"
         notes.append(
             "В PR нет изменённых файлов. Похоже, агент ничего не сделал — нужны изменения в коде."
@@ -103,7 +133,7 @@ def main():
     # 2) Если CI ещё выполняется — ничего не делаем, ждём следующий запуск
     elif ci_state == "pending":
         print(f"Reviewer postponed: CI still pending for PR {pr.html_url}")
-        return
+        return "pending"
 
     # 3) Если CI неуспешный — changes requested
     elif ci_state != "success":
@@ -126,6 +156,14 @@ def main():
             )
             notes.append("Добавь краткое описание: что сделано и как проверить (в PR description).")
 
+    event = "approve" if verdict == "approved" else "request_changes"
+    if labels_now is None:
+        labels_now = get_issue_labels(rest, repo_name, pr.number)
+    current = state_from_labels(labels_now)
+    if not transition_allowed(current, event):
+        print(f"Reviewer skipped: PR {pr.html_url} is already {current.value}")
+        return "stale"
+
     # Пишем комментарий в PR
     body_lines = [
         "## 🤖 AI Reviewer report",
@@ -141,27 +179,35 @@ def main():
         "- Если стоит `ai-changes-requested`, Code Agent должен внести правки и снова поставить `ai-review-requested`.",
         "- Если стоит `ai-approved`, цикл завершён.",
     ]
-    pr.create_issue_comment("\n".join(body_lines))
+    with span("comment"):
+        pr.create_issue_comment("\n".join(body_lines))
+
+    # Обновляем labels по вердикту: один PUT с итоговым набором
+    with span("labels"):
+        apply_transition(rest, repo_name, pr.number, event, current_labels=labels_now)
+
+    with span("review"):
+        if verdict == "approved":
+            pr.create_review(
+                body="AI Reviewer: CI is green and the PR body contains the required sections.",
+                event="APPROVE",
+            )
+        else:
+            pr.create_review(
+                body="AI Reviewer: changes are required. See the reviewer report comment for details.",
+                event="REQUEST_CHANGES",
+            )
 
-    # Обновляем labels по вердикту
-    remove_label(pr, LABEL_REVIEW_REQUESTED)
+    print(f"Reviewer finished: verdict={verdict} PR={pr.html_url}")
+    return verdict
 
-    if verdict == "approved":
-        remove_label(pr, LABEL_CHANGES_REQUESTED)
-        add_label(pr, LABEL_APPROVED)
-        pr.create_review(
-            body="AI Reviewer: CI is green and the PR body contains the required sections.",
-            event="APPROVE",
-        )
-    else:
-        remove_label(pr, LABEL_APPROVED)
-        add_label(pr, LABEL_CHANGES_REQUESTED)
-        pr.create_review(
-            body="AI Reviewer: changes are required. See the reviewer report comment for details.",
-            event="REQUEST_CHANGES",
-        )
 
-    print(f"Reviewer finished: verdict={verdict} PR={pr.html_url}")
+def main():
+    review_pr(
+        os.environ["GITHUB_TOKEN"],
+        os.environ["GITHUB_REPOSITORY"],
+        int(os.environ["PR_NUMBER"]),
+    )
 
 
 if __name__ == "__main__":
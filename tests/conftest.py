@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests.append(payload)  # type: ignore[attr-defined]
+        time.sleep(self.server.delay)  # type: ignore[attr-defined]
+        if self.server.failures:  # type: ignore[attr-defined]
+            status = self.server.failures.pop(0)  # type: ignore[attr-defined]
+            body = b'{"error": "try later"}'
+            self.send_response(status)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        user = payload["messages"][-1]["content"]
+        replies = self.server.replies  # type: ignore[attr-defined]
+        content = (replies.pop(0) if replies else self.server.reply) or f"echo: {user}"  # type: ignore[attr-defined]
+        if payload.get("stream"):
+            self._stream(content)
+            return
+        reply = {"choices": [{"message": {"content": content}}]}
+        if self.server.usage:  # type: ignore[attr-defined]
+            reply["usage"] = self.server.usage  # type: ignore[attr-defined]
+        body = json.dumps(reply).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, content: str, chunk_size: int = 7):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        events = [
+            {"choices": [{"delta": {"content": content[i : i + chunk_size]}}]}
+            for i in range(0, len(content), chunk_size)
+        ]
+        if self.server.usage:  # type: ignore[attr-defined]
+            events.append({"choices": [], "usage": self.server.usage})  # type: ignore[attr-defined]
+        lines = [f"data: {json.dumps(e)}\n\n" for e in events] + ["data: [DONE]\n\n"]
+        for line in lines:
+            data = line.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    """Локальный stand-in для chat/completions; отвечает 'echo: <user prompt>'."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    server.requests = []  # type: ignore[attr-defined]
+    server.delay = 0.0  # type: ignore[attr-defined]
+    server.reply = ""  # type: ignore[attr-defined]
+    server.replies = []  # type: ignore[attr-defined]  # ответы по очереди, затем reply
+    server.failures = []  # type: ignore[attr-defined]
+    server.usage = None  # type: ignore[attr-defined]  # блок usage в ответе, как у OpenAI
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    monkeypatch.setattr("code_agent.llm_client.OPENAI_ENDPOINT", url)
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    yield server
+
+    server.shutdown()
+    server.server_close()
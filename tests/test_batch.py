@@ -0,0 +1,55 @@
+import subprocess
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+from code_agent.batch import parse_issue_list, run_batch
+
+
+def sh(*args, cwd):
+    return subprocess.run(args, cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+class FakeGithub:
+    def get_repo(self, name):
+        return SimpleNamespace(get_issue=lambda n: SimpleNamespace(title=f"t{n}", body=""))
+
+
+def test_parse_issue_list():
+    assert parse_issue_list("3, 5,10-12,5") == ["3", "5", "10", "11", "12"]
+
+
+def test_issues_run_concurrently_in_separate_worktrees(tmp_path):
+    work = tmp_path / "work"
+    work.mkdir()
+    sh("git", "init", "-q", "-b", "main", cwd=work)
+    (work / "README.md").write_text("hello\n", encoding="utf-8")
+    sh("git", "add", "README.md", cwd=work)
+    sh("git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init", cwd=work)
+
+    seen = {}
+    barrier = threading.Barrier(3, timeout=10)
+
+    def runner(*, issue_number, workdir, issue_title, **kwargs):
+        # все три issue одновременно внутри пайплайна, каждая в своём дереве
+        barrier.wait()
+        assert (Path(workdir) / "README.md").is_file()
+        seen[issue_number] = (workdir, issue_title)
+        if issue_number == "3":
+            raise RuntimeError("boom")
+
+    results = run_batch(
+        issues=["1", "2", "3"],
+        repo_name="o/r",
+        api_token="t",
+        workers=3,
+        root=str(work),
+        runner=runner,
+        gh=FakeGithub(),
+    )
+
+    assert [(r.number, r.ok) for r in results] == [("1", True), ("2", True), ("3", False)]
+    assert len({path for path, _ in seen.values()}) == 3
+    assert seen["2"][1] == "t2"
+    # worktree'ы убраны за собой
+    assert sh("git", "worktree", "list", cwd=work).count("\n") == 1
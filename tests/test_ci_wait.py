@@ -0,0 +1,91 @@
+from code_agent.job_queue import job_from_event
+from core.ci_wait import wait_for_ci
+
+
+class FakeREST:
+    """Отвечает на GET по пути: head PR и последовательность состояний check runs."""
+
+    def __init__(self, heads, runs):
+        self.heads = list(heads)
+        self.runs = list(runs)
+        self.calls = []
+
+    def get(self, path, params=None):
+        self.calls.append(path)
+        if path.endswith("/check-runs"):
+            status, conclusion = self.runs.pop(0) if len(self.runs) > 1 else self.runs[0]
+            return {"check_runs": [{"name": "tests", "status": status, "conclusion": conclusion}]}
+        if path.endswith("/status"):
+            return {"state": "pending", "statuses": []}
+        head = self.heads.pop(0) if len(self.heads) > 1 else self.heads[0]
+        return {"head": {"sha": head}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def wait(rest, clock, timeout=600.0, **kwargs):
+    return wait_for_ci(
+        rest,
+        "o/r",
+        7,
+        "abc",
+        timeout=timeout,
+        interval=5,
+        max_interval=30,
+        sleep=clock.sleep,
+        clock=lambda: clock.now,
+        **kwargs,
+    )
+
+
+def test_returns_verdict_once_ci_settles_with_backoff():
+    rest = FakeREST(["abc"], [("queued", None)] * 4 + [("completed", "failure")])
+    clock = FakeClock()
+
+    result = wait(rest, clock)
+
+    assert (result.state, result.details, result.polls) == ("failed", ["tests: failure"], 5)
+    assert clock.sleeps == [5, 10, 20, 30, 30]
+
+
+def test_new_push_supersedes_wait():
+    rest = FakeREST(["abc", "def456"], [("in_progress", None)])
+    result = wait(rest, FakeClock())
+    assert (result.state, result.head_sha, result.polls) == ("superseded", "def456", 2)
+
+
+def test_deadline_leaves_pending():
+    clock = FakeClock()
+    result = wait(FakeREST(["abc"], [("in_progress", None)]), clock, timeout=40)
+    assert result.state == "pending"
+    assert sum(clock.sleeps) == 40
+
+
+def test_own_check_run_is_not_awaited():
+    rest = FakeREST(["abc"], [("in_progress", None)])
+    result = wait(rest, FakeClock(), ignore={"tests"})
+    # ничего, кроме собственного job'а, не запущено — ждём дальше, пока не выйдет время
+    assert result.state == "pending"
+
+
+def test_check_suite_completed_event_queues_review():
+    payload = {
+        "action": "completed",
+        "repository": {"full_name": "o/r"},
+        "check_suite": {"pull_requests": [{"number": 7, "head": {"ref": "agent/issue-3"}}]},
+    }
+    assert job_from_event("check_suite", payload) == {
+        "kind": "review",
+        "repo": "o/r",
+        "payload": {"pr_number": "7", "branch": "agent/issue-3"},
+    }
+    payload["check_suite"]["pull_requests"] = []
+    assert job_from_event("check_suite", payload) is None
@@ -6,3 +6,26 @@ def test_cli_has_run_command():
     args = parser.parse_args(["run", "--base", "main"])
     assert args.command == "run"
     assert args.base_branch == "main"
+
+
+def test_cli_enqueue_replays_webhook_payload(tmp_path):
+    import json
+
+    from code_agent.cli import main
+    from code_agent.job_queue import JobQueue
+
+    event = tmp_path / "issue.json"
+    event.write_text(
+        json.dumps(
+            {
+                "action": "opened",
+                "repository": {"full_name": "o/r"},
+                "issue": {"number": 5, "title": "t", "body": "b"},
+            }
+        )
+    )
+    queue_path = str(tmp_path / "q.sqlite3")
+    assert (
+        main(["enqueue", "--queue", queue_path, "--event", "issues", "--payload", str(event)]) == 0
+    )
+    assert JobQueue(queue_path).depth() == {"queued": 1}
@@ -0,0 +1,25 @@
+from benchmarks.e2e import BUDGETS, BenchConfig, format_report, percentile, run
+
+
+def test_percentile_nearest_rank():
+    values = [0.4, 0.1, 0.3, 0.2]
+    assert percentile(values, 50) == 0.2
+    assert percentile(values, 95) == 0.4
+    assert percentile([], 95) == 0.0
+
+
+def test_full_cycle_offline_within_budgets():
+    report = run(BenchConfig(issues=1))
+
+    assert {name: s.errors for name, s in report.stages.items()} == {
+        "issue": 0,
+        "review": 0,
+        "fix": 0,
+    }
+    assert report.over_budget() == []
+    # ревью читает PR одним GraphQL-запросом и ставит labels одним PUT
+    review = report.stages["review"].github
+    assert review["POST /graphql"] == 1
+    assert review["PUT /repos/{repo}/issues/{n}/labels"] == 1
+    assert report.stages["fix"].llm == BUDGETS["fix"]["llm"]
+    assert "cycles/min" in format_report(report)
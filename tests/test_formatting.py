@@ -0,0 +1,21 @@
+from code_agent.formatting import format_paths, python_paths
+
+
+def test_python_paths_skips_non_python_and_missing(tmp_path):
+    (tmp_path / "a.py").write_text("x = 1\n", encoding="utf-8")
+    (tmp_path / "notes.md").write_text("# notes\n", encoding="utf-8")
+
+    assert python_paths(["a.py", "notes.md", "gone.py"], str(tmp_path)) == ["a.py"]
+    assert format_paths(["notes.md"], str(tmp_path)) == []
+
+
+def test_format_paths_touches_only_given_files(tmp_path):
+    (tmp_path / "pyproject.toml").write_text("[tool.black]\nline-length = 100\n", encoding="utf-8")
+    (tmp_path / "changed.py").write_text("import os\nx=[1,2]\n", encoding="utf-8")
+    (tmp_path / "other.py").write_text("y=[1,2]\n", encoding="utf-8")
+
+    results = format_paths(["changed.py"], str(tmp_path))
+
+    assert [r.paths for r in results] == [["changed.py"]]
+    assert (tmp_path / "changed.py").read_text(encoding="utf-8") == "x = [1, 2]\n"
+    assert (tmp_path / "other.py").read_text(encoding="utf-8") == "y=[1,2]\n"
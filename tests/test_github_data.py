@@ -0,0 +1,94 @@
+from core.github_data import fetch_pr_snapshot, parse_pr_snapshot
+
+
+def graphql_payload(**overrides):
+    pr = {
+        "number": 7,
+        "title": "Fix divide",
+        "body": "### Agent summary\nok\n### How to verify\nrun",
+        "url": "https://github.com/o/r/pull/7",
+        "headRefName": "agent/issue-7",
+        "labels": {"nodes": [{"name": "ai-review-requested"}]},
+        "files": {"totalCount": 2, "nodes": [{"path": "a.py"}, {"path": "b.py"}]},
+        "commits": {
+            "nodes": [
+                {
+                    "commit": {
+                        "oid": "abc123",
+                        "status": {
+                            "state": "FAILURE",
+                            "contexts": [
+                                {"context": "lint", "state": "SUCCESS"},
+                                {"context": "tests", "state": "FAILURE"},
+                            ],
+                        },
+                        "checkSuites": {
+                            "nodes": [
+                                {
+                                    "checkRuns": {
+                                        "nodes": [
+                                            {
+                                                "name": "pytest",
+                                                "status": "COMPLETED",
+                                                "conclusion": "FAILURE",
+                                                "title": "1 failed",
+                                                "summary": "test_divide",
+                                                "text": None,
+                                            },
+                                            {
+                                                "name": "ruff",
+                                                "status": "COMPLETED",
+                                                "conclusion": "SUCCESS",
+                                            },
+                                        ]
+                                    }
+                                }
+                            ]
+                        },
+                    }
+                }
+            ]
+        },
+        "comments": {
+            "nodes": [
+                {"body": "## AI Reviewer report old", "author": {"login": "github-actions"}},
+                {"body": "## AI Reviewer report new", "author": {"login": "github-actions"}},
+                {"body": "AI Reviewer report quoted", "author": {"login": "someone"}},
+            ]
+        },
+    }
+    pr.update(overrides)
+    return {"repository": {"pullRequest": pr}}
+
+
+def test_parse_pr_snapshot():
+    snap = parse_pr_snapshot(graphql_payload())
+
+    assert snap.head_sha == "abc123"
+    assert snap.labels == ["ai-review-requested"]
+    assert snap.files_total == 2
+    assert snap.last_reviewer_comment == "## AI Reviewer report new"
+    assert snap.ci_failures() == [("pytest", "1 failed\ntest_divide")]
+    assert snap.ci_status() == (
+        "failed",
+        ["combined status: failure", "tests: failure", "pytest: failure"],
+    )
+
+
+def test_snapshot_without_statuses_uses_check_runs():
+    data = graphql_payload()
+    commit = data["repository"]["pullRequest"]["commits"]["nodes"][0]["commit"]
+    commit["status"] = None
+    runs = commit["checkSuites"]["nodes"][0]["checkRuns"]["nodes"]
+
+    # только GitHub Actions: combined status отсутствует, решают check runs
+    assert parse_pr_snapshot(data).ci_status() == ("failed", ["pytest: failure"])
+    runs[0].update(status="IN_PROGRESS", conclusion=None)
+    assert parse_pr_snapshot(data).ci_status() == ("pending", ["CI ещё выполняется: pytest."])
+    assert parse_pr_snapshot(data).ci_status(ignore={"pytest"}) == ("success", [])
+    commit["checkSuites"]["nodes"] = []
+    assert parse_pr_snapshot(data).ci_status() == ("pending", ["CI ещё выполняется."])
+
+
+def test_fetch_pr_snapshot_returns_none_when_graphql_unavailable():
+    assert fetch_pr_snapshot("t", "o/r", 7, url="http://127.0.0.1:9/graphql") is None
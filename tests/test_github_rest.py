@@ -0,0 +1,72 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.github_rest import GitHubREST, ensure_labels, get_issue_labels
+
+
+class LabelsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload=None, etag=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.calls.append(("GET", self.path))  # type: ignore[attr-defined]
+        labels = [{"name": n} for n in sorted(self.server.labels)]  # type: ignore[attr-defined]
+        etag = f'"{len(labels)}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._reply(304, etag=etag)
+        else:
+            self._reply(200, labels, etag=etag)
+
+    def do_POST(self):
+        self.server.calls.append(("POST", self.path))  # type: ignore[attr-defined]
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.labels.add(payload["name"])  # type: ignore[attr-defined]
+        self._reply(201, payload)
+
+
+@pytest.fixture
+def github_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), LabelsHandler)
+    server.calls = []  # type: ignore[attr-defined]
+    server.labels = {"bug"}  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_conditional_get_serves_304_from_cache(github_api, tmp_path):
+    server, url = github_api
+    rest = GitHubREST("t", base_url=url, cache_dir=str(tmp_path))
+
+    assert get_issue_labels(rest, "o/r", 1) == ["bug"]
+    # новый клиент с тем же каталогом — как следующий запуск workflow
+    rest = GitHubREST("t", base_url=url, cache_dir=str(tmp_path))
+    assert get_issue_labels(rest, "o/r", 1) == ["bug"]
+    assert rest.stats.not_modified == 1
+
+
+def test_ensure_labels_creates_only_missing(github_api, tmp_path):
+    server, url = github_api
+    rest = GitHubREST("t", base_url=url, cache_dir=str(tmp_path))
+
+    ensure_labels(rest, "o/r", {"bug": "ff0000", "ai-approved": "0e8a16"})
+    ensure_labels(rest, "o/r", {"bug": "ff0000", "ai-approved": "0e8a16"})
+
+    posts = [c for c in server.calls if c[0] == "POST"]
+    assert posts == [("POST", "/repos/o/r/labels")]
+    assert server.labels == {"bug", "ai-approved"}
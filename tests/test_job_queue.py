@@ -0,0 +1,133 @@
+import subprocess
+import threading
+from pathlib import Path
+
+from code_agent.daemon import AgentDaemon
+from code_agent.git_repo import GitRepo
+from code_agent.job_queue import JobQueue, job_from_event
+
+
+def test_same_branch_jobs_are_serialized_and_deduplicated(tmp_path):
+    queue = JobQueue(str(tmp_path / "q.sqlite3"))
+    first = queue.enqueue("fix", "o/r", {"pr_number": "7", "branch": "agent/issue-3"})
+    queue.enqueue("issue", "o/r", {"issue_number": "9"})
+    # review той же ветки ждёт, пока идёт fix; повторный webhook не создаёт новую задачу
+    review = queue.enqueue("review", "o/r", {"pr_number": "7", "branch": "agent/issue-3"})
+    assert queue.enqueue("review", "o/r", {"pr_number": "7", "branch": "agent/issue-3"}) == review
+
+    job = queue.claim()
+    assert job is not None and job.id == first
+    other = queue.claim()
+    assert other is not None and other.kind == "issue"
+    assert queue.claim() is None
+
+    queue.finish(first)
+    job = queue.claim()
+    assert job is not None and job.id == review
+    assert queue.depth() == {"done": 1, "running": 2}
+
+    assert queue.recover() == 2
+    assert queue.depth() == {"done": 1, "queued": 2}
+
+
+def test_job_from_webhook_payload():
+    payload = {
+        "action": "labeled",
+        "label": {"name": "ai-changes-requested"},
+        "repository": {"full_name": "o/r"},
+        "pull_request": {"number": 7, "title": "t", "body": "b", "head": {"ref": "agent/issue-3"}},
+    }
+    job = job_from_event("pull_request_target", payload)
+    assert job == {
+        "kind": "fix",
+        "repo": "o/r",
+        "payload": {
+            "pr_number": "7",
+            "branch": "agent/issue-3",
+            "issue_title": "t",
+            "issue_body": "b",
+        },
+    }
+    payload["label"] = {"name": "bug"}
+    assert job_from_event("pull_request_target", payload) is None
+
+
+def test_daemon_runs_jobs_concurrently_and_reports_metrics(tmp_path):
+    queue = JobQueue(str(tmp_path / "q.sqlite3"))
+    for n in range(4):
+        queue.enqueue("issue", "o/r", {"issue_number": str(n)})
+    queue.enqueue("review", "o/r", {"pr_number": "1", "branch": "agent/issue-0"})
+
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def handler(job):
+        with lock:
+            active.append(job.lock_key)
+            peak.append(len(active))
+            assert len(set(active)) == len(active), "one job per branch"
+        threading.Event().wait(0.05)
+        with lock:
+            active.remove(job.lock_key)
+        if job.kind == "review":
+            raise RuntimeError("boom")
+
+    daemon = AgentDaemon(
+        queue,
+        "t",
+        workers=3,
+        workdir=str(tmp_path),
+        handlers={"issue": handler, "review": handler},
+    )
+    daemon.serve(poll_interval=0.01, once=True)
+
+    metrics = daemon.metrics_snapshot()
+    assert metrics["queue"] == {"done": 4, "failed": 1}
+    assert metrics["done"] == 4 and metrics["failed"] == 1
+    assert metrics["job_latency_p50"] >= 0.05
+    assert max(peak) > 1
+
+
+def test_failed_job_does_not_break_next_job_on_same_branch(tmp_path):
+    def sh(*args, cwd):
+        subprocess.run(args, cwd=cwd, check=True, capture_output=True)
+
+    origin = tmp_path / "origin.git"
+    sh("git", "init", "-q", "--bare", "-b", "main", str(origin), cwd=tmp_path)
+    seed = tmp_path / "seed"
+    sh("git", "clone", "-q", str(origin), str(seed), cwd=tmp_path)
+    (seed / "app.py").write_text("x = 1\n", encoding="utf-8")
+    sh("git", "add", "app.py", cwd=seed)
+    sh("git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init", cwd=seed)
+    sh("git", "push", "-q", "origin", "HEAD:refs/heads/main", cwd=seed)
+
+    queue = JobQueue(str(tmp_path / "q.sqlite3"))
+    seen = []
+
+    def handler(job):
+        workdir = daemon.workspace(job)
+        GitRepo(workdir).checkout_from_remote("agent/issue-1", "main")
+        seen.append((Path(workdir) / "app.py").read_text(encoding="utf-8"))
+        if len(seen) == 1:
+            # задача упала после apply_changes: дерево осталось грязным
+            (Path(workdir) / "app.py").write_text("x = 2\n", encoding="utf-8")
+            (Path(workdir) / "stray.py").write_text("y = 1\n", encoding="utf-8")
+            raise RuntimeError("LLM error")
+        assert not (Path(workdir) / "stray.py").exists()
+
+    daemon = AgentDaemon(
+        queue,
+        "t",
+        workers=1,
+        workdir=str(tmp_path / "ws"),
+        clone_url=str(origin),
+        handlers={"issue": handler},
+    )
+    queue.enqueue("issue", "o/r", {"issue_number": "1"})
+    daemon.serve(poll_interval=0.01, once=True)
+    queue.enqueue("issue", "o/r", {"issue_number": "1"})
+    daemon.serve(poll_interval=0.01, once=True)
+
+    assert seen == ["x = 1\n", "x = 1\n"]
+    assert daemon.metrics_snapshot()["queue"] == {"done": 1, "failed": 1}
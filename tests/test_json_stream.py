@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from code_agent import llm_client
+from code_agent.agent import PlaceholderFound, check_streamed_change, extract_json
+from code_agent.json_stream import IncrementalJSONScanner
+from core.http_pool import ConnectionPool
+
+ANSWER = (
+    'Вот ответ: {"summary": "s {not a brace}", "changes": ['
+    '{"path": "a.py", "action": "create", "content": "x = {\\"k\\": 1}\\n"},'
+    '{"path": "b.py", "action": "delete"}'
+    "]} хвост"
+)
+
+
+def feed_in_chunks(scanner, text, size=5):
+    for i in range(0, len(text), size):
+        scanner.feed(text[i : i + size])
+
+
+def test_scanner_emits_items_as_they_complete():
+    seen = []
+    scanner = IncrementalJSONScanner(on_item=lambda key, item: seen.append((key, item["path"])))
+
+    feed_in_chunks(scanner, ANSWER)
+
+    assert seen == [("changes", "a.py"), ("changes", "b.py")]
+    assert scanner.done
+    assert json.loads(scanner.result()) == json.loads(extract_json(ANSWER))
+
+
+def test_scanner_stops_on_callback_error():
+    scanner = IncrementalJSONScanner(on_item=check_streamed_change)
+    bad = ANSWER.replace('"a.py"', '"../a.py"')
+
+    with pytest.raises(RuntimeError, match="Unsafe path"):
+        feed_in_chunks(scanner, bad)
+    assert not scanner.done
+
+
+def test_streamed_completion_aborts_on_placeholder(fake_openai):
+    fake_openai.reply = ANSWER.replace("x = {", "TODO = {")
+    scanner = IncrementalJSONScanner(on_item=check_streamed_change)
+
+    with pytest.raises(PlaceholderFound) as exc:
+        llm_client.openai_complete(system="s", user="u", stream=True, on_delta=scanner.feed)
+    assert exc.value.path == "a.py"
+
+
+def test_streamed_completion_returns_full_text(fake_openai):
+    fake_openai.reply = ANSWER
+    pieces = []
+
+    text = llm_client.openai_complete(system="s", user="u", stream=True, on_delta=pieces.append)
+
+    assert text == ANSWER
+    assert len(pieces) > 1
+
+
+def test_streamed_connection_is_reused(fake_openai, monkeypatch):
+    pool = ConnectionPool()
+    monkeypatch.setattr(llm_client, "get_default_pool", lambda: pool)
+    fake_openai.reply = ANSWER
+
+    llm_client.openai_complete(system="s", user="u", stream=True)
+    llm_client.openai_complete(system="s", user="u", stream=True)
+
+    assert pool.stats.created == 1 and pool.stats.reused == 1
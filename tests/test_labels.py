@@ -0,0 +1,113 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core import labels
+from core.github_rest import GitHubREST
+from core.labels import (
+    LABEL_APPROVED,
+    LABEL_CHANGES_REQUESTED,
+    LABEL_REVIEW_REQUESTED,
+    ReviewState,
+    apply_transition,
+    next_state,
+    state_from_labels,
+    target_labels,
+    transition_allowed,
+)
+
+
+class IssueLabelsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.calls.append(("GET", self.path))  # type: ignore[attr-defined]
+        if "/issues/" in self.path:
+            names = self.server.issue_labels  # type: ignore[attr-defined]
+        else:
+            names = list(labels.LABEL_COLORS)
+        self._reply(200, [{"name": n} for n in names])
+
+    def do_PUT(self):
+        self.server.calls.append(("PUT", self.path))  # type: ignore[attr-defined]
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.issue_labels = payload["labels"]  # type: ignore[attr-defined]
+        self._reply(200, [{"name": n} for n in payload["labels"]])
+
+
+@pytest.fixture
+def github_api(monkeypatch):
+    monkeypatch.setattr(labels, "_ensured", set())
+    server = ThreadingHTTPServer(("127.0.0.1", 0), IssueLabelsHandler)
+    server.calls = []  # type: ignore[attr-defined]
+    server.issue_labels = []  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_state_from_labels_prefers_pending_review():
+    assert state_from_labels(["bug"]) is ReviewState.NONE
+    assert state_from_labels([LABEL_APPROVED]) is ReviewState.APPROVED
+    both = [LABEL_CHANGES_REQUESTED, LABEL_REVIEW_REQUESTED]
+    assert state_from_labels(both) is ReviewState.REVIEW_REQUESTED
+
+
+def test_target_labels_keeps_foreign_labels_and_one_state_label():
+    current = ["bug", LABEL_CHANGES_REQUESTED, LABEL_APPROVED]
+    state = next_state(state_from_labels(current), "submit")
+    assert target_labels(current, state) == ["bug", LABEL_REVIEW_REQUESTED]
+
+    with pytest.raises(ValueError):
+        next_state(ReviewState.NONE, "merge")
+
+
+def test_apply_transition_replaces_labels_with_single_put(github_api, tmp_path):
+    server, url = github_api
+    server.issue_labels = ["bug", LABEL_REVIEW_REQUESTED]
+    rest = GitHubREST("t", base_url=url, cache_dir=str(tmp_path))
+
+    state = apply_transition(rest, "o/r", 7, "request_changes")
+    assert state is ReviewState.CHANGES_REQUESTED
+    assert server.issue_labels == ["bug", LABEL_CHANGES_REQUESTED]
+    assert [c for c in server.calls if c[0] == "PUT"] == [("PUT", "/repos/o/r/issues/7/labels")]
+
+    # повторный вердикт: PR уже не ждёт ревью — только чтение labels
+    server.calls.clear()
+    apply_transition(rest, "o/r", 7, "request_changes")
+    assert [c[0] for c in server.calls] == ["GET"]
+
+
+def test_verdict_is_rejected_unless_pr_awaits_review(github_api, tmp_path):
+    server, url = github_api
+    server.issue_labels = ["bug", LABEL_APPROVED]
+    rest = GitHubREST("t", base_url=url, cache_dir=str(tmp_path))
+
+    assert not transition_allowed(ReviewState.APPROVED, "request_changes")
+    assert transition_allowed(ReviewState.APPROVED, "submit")
+    with pytest.raises(ValueError):
+        next_state(ReviewState.CHANGES_REQUESTED, "approve")
+
+    # запоздавший ревьюер: PR уже принят — labels не трогаем
+    assert apply_transition(rest, "o/r", 7, "request_changes") is None
+    assert server.issue_labels == ["bug", LABEL_APPROVED]
+    assert not [c for c in server.calls if c[0] == "PUT"]
+
+    # известные labels не перечитываются
+    server.calls.clear()
+    state = apply_transition(rest, "o/r", 7, "submit", current_labels=["bug", LABEL_APPROVED])
+    assert state is ReviewState.REVIEW_REQUESTED
+    assert [c[0] for c in server.calls] == ["PUT"]
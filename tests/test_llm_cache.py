@@ -0,0 +1,56 @@
+import os
+import time
+
+from code_agent import llm_client
+from code_agent.llm_cache import CompletionCache, cache_key
+
+
+def test_deterministic_calls_hit_cache(fake_openai, monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path))
+
+    first = llm_client.openai_complete(system="s", user="u", temperature=0)
+    second = llm_client.openai_complete(system="s", user="u", temperature=0)
+
+    assert first == second == "echo: u"
+    assert len(fake_openai.requests) == 1
+    stats = llm_client.cache_stats()
+    assert stats is not None and stats.hits == 1 and stats.misses == 1
+
+
+def test_sampled_calls_skip_cache_unless_requested(fake_openai, monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path))
+
+    llm_client.openai_complete(system="s", user="u", temperature=0.2)
+    llm_client.openai_complete(system="s", user="u", temperature=0.2)
+    assert len(fake_openai.requests) == 2
+
+    llm_client.openai_complete(system="s", user="u", temperature=0.2, use_cache=True)
+    llm_client.openai_complete(system="s", user="u", temperature=0.2, use_cache=True)
+    assert len(fake_openai.requests) == 3
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = CompletionCache(str(tmp_path), max_bytes=250)
+    keys = [
+        cache_key(endpoint="e", model="m", temperature=0, max_tokens=1, messages=[{"n": i}])
+        for i in range(3)
+    ]
+    cache.put(keys[0], "a" * 60)
+    cache.put(keys[1], "b" * 60)
+    old = time.time() - 100
+    os.utime(tmp_path / f"{keys[1]}.json", (old, old))
+    cache.put(keys[2], "c" * 60)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == "a" * 60
+    assert cache.stats.evictions == 1
+    assert cache.size_bytes() <= 250
+
+
+def test_cache_expires_entries(tmp_path):
+    cache = CompletionCache(str(tmp_path), ttl=0)
+    cache.put("k", "text")
+    time.sleep(0.01)
+
+    assert cache.get("k") is None
+    assert cache.stats.expired == 1
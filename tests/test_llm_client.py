@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from code_agent import llm_client
+from core.http_pool import ConnectionPool, proxy_for
+
+
+def test_openai_complete_reuses_connection(fake_openai, monkeypatch):
+    pool = ConnectionPool()
+    monkeypatch.setattr(llm_client, "get_default_pool", lambda: pool)
+
+    for i in range(3):
+        assert llm_client.openai_complete(system="s", user=f"u{i}") == f"echo: u{i}"
+
+    assert pool.stats.created == 1
+    assert pool.stats.reused == 2
+    assert len(fake_openai.requests) == 3
+
+
+def test_pool_evicts_idle_connections(fake_openai, monkeypatch):
+    pool = ConnectionPool(idle_timeout=0.0)
+    monkeypatch.setattr(llm_client, "get_default_pool", lambda: pool)
+
+    llm_client.openai_complete(system="s", user="a")
+    llm_client.openai_complete(system="s", user="b")
+
+    assert pool.stats.created == 2
+    assert pool.stats.evicted == 1
+
+
+def test_complete_many_runs_prompts_concurrently(fake_openai):
+    fake_openai.delay = 0.3
+    prompts = [{"system": "s", "user": f"u{i}"} for i in range(4)]
+
+    started = time.perf_counter()
+    answers = llm_client.complete_many(prompts, concurrency=4)
+    elapsed = time.perf_counter() - started
+
+    assert answers == [f"echo: u{i}" for i in range(4)]
+    assert elapsed < 0.3 * 4 * 0.75
+
+
+def test_agather_complete_respects_concurrency(fake_openai):
+    fake_openai.delay = 0.2
+    prompts = [{"system": "s", "user": f"u{i}"} for i in range(4)]
+
+    started = time.perf_counter()
+    asyncio.run(llm_client.agather_complete(prompts, concurrency=1))
+
+    assert time.perf_counter() - started >= 0.2 * 4
+
+
+@pytest.fixture
+def proxy_env(monkeypatch):
+    for name in ("http_proxy", "https_proxy", "no_proxy", "all_proxy"):
+        monkeypatch.delenv(name, raising=False)
+        monkeypatch.delenv(name.upper(), raising=False)
+    return monkeypatch
+
+
+def test_pool_sends_plain_http_through_env_proxy(proxy_env):
+    seen = []
+
+    class Proxy(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            seen.append((self.path, self.headers.get("Proxy-Authorization")))
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Proxy)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    proxy_env.setenv("HTTP_PROXY", f"http://u:p@127.0.0.1:{server.server_address[1]}")
+    try:
+        result = ConnectionPool().request("GET", "http://api.example:8080/v1?x=1")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert result.body == b"ok"
+    assert seen == [("http://api.example:8080/v1?x=1", "Basic dTpw")]
+
+
+def test_pool_tunnels_https_and_honours_no_proxy(proxy_env):
+    proxy_env.setenv("HTTPS_PROXY", "http://proxy.local:3128")
+    conn = ConnectionPool()._new_connection(("https", "api.example", 443), 5.0)
+    assert (conn.host, conn.port) == ("proxy.local", 3128)
+    assert conn._tunnel_host == "api.example"  # type: ignore[attr-defined]
+
+    proxy_env.setenv("NO_PROXY", "api.example")
+    assert proxy_for("https", "api.example") is None
+    conn = ConnectionPool()._new_connection(("https", "api.example", 443), 5.0)
+    assert conn.host == "api.example"
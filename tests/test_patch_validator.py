@@ -0,0 +1,54 @@
+import pytest
+
+from code_agent.patch_validator import (
+    PlaceholderFound,
+    StreamValidator,
+    find_placeholders,
+    placeholder_paths,
+    raise_for_fatal,
+    validate_changes,
+)
+
+
+def test_find_placeholders_reports_each_line_once():
+    text = "x = 1\n# todo: later ... TBD\ny = [...]\nok = '…'\n"
+    assert find_placeholders(text) == [
+        (2, "# todo: later ... TBD"),
+        (3, "y = [...]"),
+        (4, "ok = '…'"),
+    ]
+    assert find_placeholders("clean = True\n") == []
+
+
+def test_validate_changes_splits_fatal_and_placeholder_findings():
+    changes = [
+        {"path": "a.py", "action": "create", "content": "a = 1\nb = TODO\n"},
+        {"path": "b.py", "action": "patch", "hunks": [{"search": "x...", "replace": "y = 2"}]},
+        {"path": "c.py", "action": "delete"},
+    ]
+    findings = validate_changes(changes)
+    # в patch проверяется только добавляемый текст, search может содержать что угодно
+    assert [(f.path, f.line) for f in findings] == [("a.py", 2)]
+    assert placeholder_paths(findings) == ["a.py"]
+    raise_for_fatal(findings)
+
+    for bad, message in [
+        ({"path": "../x.py", "action": "create", "content": ""}, "Unsafe path"),
+        ({"path": "x.py", "action": "chmod"}, "Unsupported action"),
+        ({"path": "code_agent/agent.py", "action": "delete"}, "agent internals"),
+        ({"path": "x.py", "action": "update"}, "Missing content"),
+    ]:
+        with pytest.raises(RuntimeError, match=message):
+            raise_for_fatal(validate_changes([bad]))
+
+
+def test_stream_validator_counts_checked_items():
+    validator = StreamValidator()
+    validator.on_item("changes", {"path": "a.py", "action": "delete"})
+    validator.on_item("other", {})
+    assert validator.checked == 1
+
+    with pytest.raises(PlaceholderFound) as exc:
+        validator.on_item("changes", {"path": "b.py", "action": "create", "content": "TBD"})
+    assert exc.value.findings[0].line == 1
+    assert validator.checked == 1
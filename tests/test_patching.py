@@ -0,0 +1,75 @@
+import pytest
+
+from code_agent.agent import apply_changes
+from code_agent.patching import (
+    PatchError,
+    added_text,
+    apply_patch_change,
+    apply_search_replace,
+    apply_unified_diff,
+)
+
+SOURCE = "def add(a, b):\n    return a + b\n\n\ndef sub(a, b):\n    return a - b\n"
+
+
+def test_search_replace_applies_unique_hunk():
+    out = apply_search_replace(SOURCE, [{"search": "return a - b", "replace": "return b - a"}])
+    assert out == SOURCE.replace("a - b", "b - a")
+
+
+def test_search_replace_rejects_missing_and_ambiguous_hunks():
+    with pytest.raises(PatchError, match="not found"):
+        apply_search_replace(SOURCE, [{"search": "return a * b", "replace": "x"}])
+    with pytest.raises(PatchError, match="found 2 times"):
+        apply_search_replace(SOURCE, [{"search": "(a, b)", "replace": "(x, y)"}])
+
+
+def test_unified_diff_applies_with_shifted_lines():
+    diff = (
+        "--- a/m.py\n+++ b/m.py\n"
+        "@@ -2,4 +2,4 @@\n"
+        " def sub(a, b):\n"
+        "-    return a - b\n"
+        "+    return b - a\n"
+    )
+    # номер строки в заголовке неверный — хунк находится по контексту
+    out = apply_unified_diff(SOURCE, diff)
+    assert out == SOURCE.replace("a - b", "b - a")
+
+
+def test_unified_diff_rejects_mismatched_context():
+    diff = "@@ -1,2 +1,2 @@\n def mul(a, b):\n-    return a * b\n+    return b * a\n"
+    with pytest.raises(PatchError, match="does not match"):
+        apply_unified_diff(SOURCE, diff)
+
+
+def test_patch_change_dispatch_and_added_text():
+    change = {"path": "m.py", "action": "patch", "hunks": [{"search": "a + b", "replace": "b + a"}]}
+    assert "b + a" in apply_patch_change(SOURCE, change)
+    assert added_text(change) == "b + a"
+
+    with pytest.raises(PatchError):
+        apply_patch_change(SOURCE, {"path": "m.py", "action": "patch"})
+
+
+def test_apply_changes_writes_nothing_when_a_hunk_is_rejected(tmp_path):
+    (tmp_path / "m.py").write_text(SOURCE, encoding="utf-8")
+    changes = [
+        {"path": "new.py", "action": "create", "content": "x = 1\n"},
+        {"path": "m.py", "action": "patch", "hunks": [{"search": "a * b", "replace": "x"}]},
+    ]
+
+    with pytest.raises(RuntimeError, match="Rejected patch"):
+        apply_changes(changes, root=str(tmp_path))
+    assert not (tmp_path / "new.py").exists()
+    assert (tmp_path / "m.py").read_text(encoding="utf-8") == SOURCE
+
+
+def test_apply_changes_patches_on_top_of_earlier_change(tmp_path):
+    changes = [
+        {"path": "m.py", "action": "create", "content": SOURCE},
+        {"path": "m.py", "action": "patch", "hunks": [{"search": "a - b", "replace": "b - a"}]},
+    ]
+
+    apply_changes(changes, root=str(tmp_path))
+    assert (tmp_path / "m.py").read_text(encoding="utf-8") == SOURCE.replace("a - b", "b - a")
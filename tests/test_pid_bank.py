@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from benchmarks.pid_bank import measure
+from pid_bank import PIDBank
+from pid_controller import PIDController
+
+
+def test_bank_matches_scalar_controllers_exactly():
+    rng = np.random.default_rng(1)
+    n = 50
+    kp, ki, kd = rng.uniform(0, 5, (3, n))
+    low = rng.uniform(-8, -1, n)
+    high = rng.uniform(1, 8, n)
+    controllers = [PIDController(*map(float, gains)) for gains in zip(kp, ki, kd)]
+    for c, lo, hi in zip(controllers, low, high):
+        c.output_min, c.output_max = float(lo), float(hi)
+    bank = PIDBank(kp, ki, kd, low, high)
+
+    setpoints = rng.uniform(-20, 20, n)
+    for step in range(300):
+        measurements = rng.uniform(-20, 20, n)
+        dt = 0.01 if step % 2 else 0.05
+        expected = [
+            c.update(float(s), float(m), dt)
+            for c, s, m in zip(controllers, setpoints, measurements)
+        ]
+
+        assert bank.update(setpoints, measurements, dt).tolist() == expected
+    # anti-windup: интеграл упирается в пределы выхода, как у PIDController
+    assert bank.integral.tolist() == [c.integral for c in controllers]
+    assert np.any(bank.integral == high) or np.any(bank.integral == low)
+
+
+def test_from_controllers_keeps_state():
+    c = PIDController(1.0, 0.5, 0.1)
+    c.update(1.0, 0.0, 0.1)
+    bank = PIDBank.from_controllers([c, PIDController(2.0, 0.0, 0.0)])
+
+    out = bank.update([1.0, 1.0], [0.2, 0.2], 0.1, out=np.empty(2))
+
+    assert out[0] == c.update(1.0, 0.2, 0.1)
+    assert len(bank) == 2
+
+
+def test_update_validates_dt_and_limits():
+    bank = PIDBank(1.0, 0.0, 0.0, size=3)
+    with pytest.raises(ValueError):
+        bank.update(1.0, 0.0, [0.1, 0.0, 0.1])
+    with pytest.raises(ValueError):
+        PIDBank([1.0, 1.0], 0.0, 0.0, output_min=[0.0, 5.0], output_max=[1.0, 4.0])
+
+
+def test_scalar_controller_has_slots():
+    c = PIDController(1.0, 0.0, 0.0)
+    assert not hasattr(c, "__dict__")
+    with pytest.raises(AttributeError):
+        c.gain = 2.0  # type: ignore[attr-defined]
+
+
+def test_benchmark_reports_rates():
+    result = measure(loops=100, ticks=5)
+    assert result.scalar_per_second > 0 and result.bank_per_second > 0
@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+import pytest
+
+from pid_simulation import (
+    FirstOrderPlant,
+    SecondOrderPlant,
+    gain_grid,
+    simulate,
+    simulate_scalar,
+    sweep,
+)
+
+PLANTS = [
+    FirstOrderPlant(gain=2.0, tau=0.5),
+    SecondOrderPlant(gain=1.0, wn=2.0, zeta=0.3),
+    FirstOrderPlant(gain=1.0, tau=1.0, dead_time=0.25),
+]
+
+
+@pytest.mark.parametrize("plant", PLANTS)
+def test_vectorized_matches_scalar_pid_controller_exactly(plant):
+    candidates = gain_grid([0.5, 2.0, 6.0], [0.0, 1.5], [0.0, 0.1])
+    result = simulate(candidates, plant, dt=0.01, horizon=5.0)
+
+    for i, (kp, ki, kd) in enumerate(candidates):
+        expected = simulate_scalar(kp, ki, kd, plant, dt=0.01, horizon=5.0)
+        assert (result.overshoot[i], result.settling_time[i], result.iae[i]) == expected
+
+
+def test_metrics_for_known_responses():
+    # P-регулятор на первом порядке: статическая ошибка — не установится, без перерегулирования
+    plant = FirstOrderPlant(gain=1.0, tau=1.0)
+    result = simulate(np.array([[1.0, 0.0, 0.0], [2.0, 1.0, 0.0]]), plant, horizon=20.0)
+    assert result.overshoot[0] == 0.0
+    assert math.isinf(result.settling_time[0])
+    # с интегралом ошибка уходит в ноль
+    assert result.settling_time[1] < 20.0
+    assert result.iae[1] < result.iae[0]
+
+
+def test_parallel_sweep_keeps_candidate_order():
+    candidates = gain_grid(np.linspace(0.5, 5, 6), np.linspace(0, 3, 4), [0.0, 0.2])
+    plant = SecondOrderPlant(wn=3.0, zeta=0.4, dead_time=0.05)
+    serial = simulate(candidates, plant, horizon=3.0)
+    parallel = sweep(candidates, plant, workers=2, chunk_size=10, horizon=3.0)
+
+    assert len(parallel) == len(candidates)
+    np.testing.assert_array_equal(parallel.kp, candidates[:, 0])
+    np.testing.assert_array_equal(parallel.iae, serial.iae)
+    np.testing.assert_array_equal(parallel.settling_time, serial.settling_time)
+
+    best = parallel.best("iae", max_overshoot=0.2)
+    assert parallel.overshoot[best] <= 0.2
+    assert parallel.candidate(best) == tuple(candidates[best])
+
+
+def test_zero_setpoint_is_rejected():
+    with pytest.raises(ValueError):
+        simulate(gain_grid([1.0], [0.0], [0.0]), PLANTS[0], setpoint=0.0)
+
+
+@pytest.mark.parametrize("plant", PLANTS)
+def test_negative_step_mirrors_positive_step(plant):
+    candidates = gain_grid([0.5, 6.0], [0.0, 1.5], [0.0, 0.1])
+    up = simulate(candidates, plant, setpoint=1.0, horizon=5.0)
+    down = simulate(candidates, plant, setpoint=-1.0, horizon=5.0)
+
+    np.testing.assert_array_equal(down.overshoot, up.overshoot)
+    np.testing.assert_array_equal(down.settling_time, up.settling_time)
+    np.testing.assert_array_equal(down.iae, up.iae)
+    for i, (kp, ki, kd) in enumerate(candidates):
+        expected = simulate_scalar(kp, ki, kd, plant, setpoint=-1.0, horizon=5.0)
+        assert (down.overshoot[i], down.settling_time[i], down.iae[i]) == expected
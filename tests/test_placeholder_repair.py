@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from code_agent.agent import generate_patch, merge_changes
+from code_agent.llm_client import PendingCache
+from core.config import get_settings
+
+
+def answer(*changes):
+    return json.dumps({"summary": "s", "changes": list(changes)})
+
+
+GOOD_A = {"path": "a.py", "action": "create", "content": "a = 1\n"}
+BAD_B = {"path": "b.py", "action": "create", "content": "def f():\n    TODO\n"}
+FIXED_B = {"path": "b.py", "action": "create", "content": "def f():\n    return 2\n"}
+
+
+def test_merge_changes_replaces_only_requested_paths():
+    other = {"path": "a.py", "action": "delete"}
+    merged = merge_changes([GOOD_A, BAD_B], [other, FIXED_B], ["b.py"])
+    assert merged == [GOOD_A, FIXED_B]
+
+
+def test_merge_replaces_every_change_of_a_repaired_path():
+    create = {"path": "a.py", "action": "create", "content": "x = 1\n"}
+    patch = {"path": "a.py", "action": "patch", "hunks": [{"search": "1", "replace": "2  # TODO"}]}
+    fix = {"path": "a.py", "action": "update", "content": "x = 2\n"}
+    other = {"path": "c.py", "action": "delete"}
+
+    assert merge_changes([create, other, patch], [fix], ["a.py"]) == [fix, other]
+
+
+def test_repair_of_duplicate_path_leaves_no_placeholder(fake_openai):
+    create = {"path": "a.py", "action": "create", "content": "x = 1\n"}
+    patch = {"path": "a.py", "action": "patch", "hunks": [{"search": "1", "replace": "2  # TODO"}]}
+    fix = {"path": "a.py", "action": "update", "content": "x = 2\n"}
+    fake_openai.replies = [answer(create, patch), answer(fix)]
+
+    result = generate_patch(system="s", user="u", issue_title="t", issue_body="b")
+
+    assert result["changes"] == [fix]
+    assert len(fake_openai.requests) == 2
+
+
+def test_repair_resends_only_broken_files_and_keeps_good_ones(fake_openai):
+    regressed_a = {"path": "a.py", "action": "create", "content": "a = 'changed'\n"}
+    fake_openai.replies = [answer(GOOD_A, BAD_B), answer(regressed_a, FIXED_B)]
+
+    patch = generate_patch(
+        system="s", user="u", issue_title="t", issue_body="b", repair_context="CI: tests failed"
+    )
+
+    assert patch["changes"] == [GOOD_A, FIXED_B]
+    repair_prompt = fake_openai.requests[1]["messages"][-1]["content"]
+    assert "b.py:2:" in repair_prompt and "CI: tests failed" in repair_prompt
+    assert "a = 1" not in repair_prompt
+    assert len(fake_openai.requests) == 2
+
+
+def test_repair_rounds_are_bounded(fake_openai, monkeypatch):
+    monkeypatch.setattr(get_settings(), "llm_repair_max_rounds", 1)
+    fake_openai.replies = [answer(GOOD_A, BAD_B)]
+    fake_openai.reply = answer(BAD_B)
+
+    with pytest.raises(RuntimeError, match="after 1 repair round"):
+        generate_patch(system="s", user="u", issue_title="t", issue_body="b")
+    assert len(fake_openai.requests) == 2
+
+
+def test_agent_answer_is_cached_only_after_commit(fake_openai, monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(get_settings(), "llm_cache_agent", True)
+    fake_openai.reply = answer(GOOD_A)
+
+    # изменения не применились (commit не вызван) — повтор идёт к модели заново
+    generate_patch(system="s", user="u", issue_title="t", issue_body="b", cache=PendingCache())
+    assert len(fake_openai.requests) == 1
+
+    pending = PendingCache()
+    first = generate_patch(system="s", user="u", issue_title="t", issue_body="b", cache=pending)
+    pending.commit()
+    second = generate_patch(system="s", user="u", issue_title="t", issue_body="b", cache=pending)
+    assert first == second
+    assert len(fake_openai.requests) == 2
+
+
+def test_answer_with_placeholders_is_never_cached(fake_openai, monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(get_settings(), "llm_cache_agent", True)
+    monkeypatch.setattr(get_settings(), "llm_repair_max_rounds", 0)
+    fake_openai.reply = answer(BAD_B)
+
+    for _ in range(2):
+        pending = PendingCache()
+        with pytest.raises(RuntimeError, match="Placeholders left"):
+            generate_patch(system="s", user="u", issue_title="t", issue_body="b", cache=pending)
+    assert len(fake_openai.requests) == 2
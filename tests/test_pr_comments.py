@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from core.pr_comments import CommentCursorCache, find_last_reviewer_comment
+
+
+class FakeComments:
+    """PaginatedList: .reversed отдаёт комментарии с конца и считает прочитанные."""
+
+    def __init__(self, comments):
+        self.comments = comments
+        self.read = 0
+
+    @property
+    def reversed(self):
+        for comment in reversed(self.comments):
+            self.read += 1
+            yield comment
+
+
+def comment(id, login, body):
+    return SimpleNamespace(id=id, user=SimpleNamespace(login=login), body=body)
+
+
+def fake_pr(comments):
+    listing = FakeComments(comments)
+    return SimpleNamespace(number=7, get_issue_comments=lambda: listing), listing
+
+
+def test_stops_at_newest_report(tmp_path):
+    history = [comment(i, "someone", "chatter") for i in range(1, 200)]
+    history.append(comment(200, "github-actions[bot]", "## AI Reviewer report\nfix tests"))
+    history.append(comment(201, "someone", "thanks"))
+    pr, listing = fake_pr(history)
+
+    body = find_last_reviewer_comment(pr, "o/r", CommentCursorCache(str(tmp_path)))
+    assert "fix tests" in body
+    assert listing.read == 2
+
+
+def test_cursor_skips_already_scanned_comments(tmp_path):
+    cache = CommentCursorCache(str(tmp_path))
+    history = [comment(1, "github-actions[bot]", "## AI Reviewer report\nold")]
+    history += [comment(i, "someone", "chatter") for i in range(2, 50)]
+    pr, listing = fake_pr(history)
+    assert "old" in find_last_reviewer_comment(pr, "o/r", cache)
+
+    # новый запуск: добавился один комментарий, старая история не перечитывается
+    history.append(comment(50, "someone", "ping"))
+    pr, listing = fake_pr(history)
+    assert "old" in find_last_reviewer_comment(pr, "o/r", cache)
+    assert listing.read == 2
+
+
+def test_concurrent_writers_keep_every_cursor(tmp_path):
+    # как у воркеров serve: у каждого вызова свой экземпляр кэша, файл общий
+    def write(i):
+        CommentCursorCache(str(tmp_path)).put(f"o/r#{i}", i, "")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(64)))
+
+    cache = CommentCursorCache(str(tmp_path))
+    assert all(cache.get(f"o/r#{i}") == {"seen_id": i, "body": ""} for i in range(64))
+    assert [p.name for p in tmp_path.iterdir()] == ["last-reviewer-comments.json"]
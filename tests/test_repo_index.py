@@ -0,0 +1,54 @@
+import subprocess
+
+from code_agent.repo_index import RepoIndex, python_symbols
+
+
+def make_repo(tmp_path, files):
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    for path, text in files.items():
+        target = tmp_path / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(text, encoding="utf-8")
+    subprocess.run(["git", "add", "-A"], cwd=tmp_path, check=True)
+    return tmp_path
+
+
+def test_python_symbols():
+    source = "x = 1\nLIMIT = 2\n\ndef f():\n    pass\n\nclass C:\n    def m(self):\n        pass\n"
+    assert python_symbols(source) == ["LIMIT", "f", "C", "C.m"]
+
+
+def test_index_is_incremental_by_blob_sha(tmp_path):
+    repo = make_repo(tmp_path, {"a.py": "def alpha():\n    pass\n", "b.txt": "hello\n"})
+
+    first = RepoIndex(str(repo)).refresh()
+    assert first.reindexed == 2
+
+    (repo / "a.py").write_text("def alpha():\n    return 1\n", encoding="utf-8")
+    subprocess.run(["git", "add", "a.py"], cwd=repo, check=True)
+
+    second = RepoIndex(str(repo)).refresh()
+    assert second.reindexed == 1
+    assert second.entries["a.py"].symbols == ["alpha"]
+
+
+def test_pack_prefers_mentioned_files_within_budget(tmp_path):
+    repo = make_repo(
+        tmp_path,
+        {
+            "pid_controller.py": "class PIDController:\n    def update(self):\n        pass\n",
+            "math_utils.py": "def divide(a, b):\n    return a / b\n",
+            "big.py": "def divide_big():\n    pass\n" + "# filler\n" * 2000,
+            "code_agent/agent.py": "def divide():\n    pass\n",
+        },
+    )
+    index = RepoIndex(str(repo)).refresh()
+
+    query = 'Traceback:\n  File "math_utils.py", line 2, in divide\nZeroDivisionError'
+    ranked = [e.path for _, e in index.rank(query, exclude=("code_agent/",))]
+    assert ranked[0] == "math_utils.py"
+    assert "code_agent/agent.py" not in ranked
+
+    packed = index.pack(query + " big", token_budget=200, exclude=("code_agent/",))
+    assert "----- FILE: math_utils.py -----" in packed
+    assert "----- FILE (outline only): big.py -----" in packed
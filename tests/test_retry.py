@@ -0,0 +1,75 @@
+import pytest
+
+from code_agent import llm_client
+from code_agent.retry import (
+    LLMHTTPError,
+    RetryPolicy,
+    TokenBucket,
+    call_with_retry,
+    parse_retry_after,
+)
+
+
+def flaky(errors, result="ok"):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return fn, calls
+
+
+def test_retries_transient_errors_and_honors_retry_after():
+    fn, calls = flaky([LLMHTTPError(429, "slow down", retry_after=7), ConnectionResetError()])
+    sleeps = []
+
+    assert call_with_retry(fn, RetryPolicy(backoff_base=0.5), sleep=sleeps.append) == "ok"
+    assert len(calls) == 3
+    assert sleeps[0] == 7
+    assert 0 <= sleeps[1] <= 1.0
+
+
+def test_does_not_retry_client_errors():
+    fn, calls = flaky([LLMHTTPError(400, "bad request")])
+
+    with pytest.raises(LLMHTTPError):
+        call_with_retry(fn, RetryPolicy(), sleep=lambda s: None)
+    assert len(calls) == 1
+
+
+def test_gives_up_when_retry_after_exceeds_deadline():
+    fn, calls = flaky([LLMHTTPError(503, "down", retry_after=600)])
+
+    with pytest.raises(LLMHTTPError):
+        call_with_retry(fn, RetryPolicy(deadline=60), sleep=lambda s: None)
+    assert len(calls) == 1
+
+
+def test_stops_after_max_retries():
+    fn, calls = flaky([TimeoutError() for _ in range(5)])
+
+    with pytest.raises(TimeoutError):
+        call_with_retry(fn, RetryPolicy(max_retries=2), sleep=lambda s: None)
+    assert len(calls) == 3
+
+
+def test_token_bucket_spaces_out_requests():
+    bucket = TokenBucket(rate=2.0)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("garbage") is None
+
+
+def test_openai_complete_survives_rate_limit(fake_openai):
+    fake_openai.failures = [429, 503]
+
+    assert llm_client.openai_complete(system="s", user="u") == "echo: u"
+    assert len(fake_openai.requests) == 3
@@ -0,0 +1,28 @@
+from benchmarks.startup import (
+    CLI_HELP_BUDGET_MS,
+    CLI_IMPORT_BUDGET_MS,
+    heavy_imports,
+    measure,
+    parse_importtime,
+)
+
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       767 |        767 |     gettext\n"
+        "import time:      2108 |       4079 | code_agent.cli\n"
+    )
+    assert parse_importtime(stderr) == {"gettext": 0.767, "code_agent.cli": 4.079}
+
+
+def test_cli_import_stays_light_and_within_budget():
+    result = measure("import code_agent.cli", ["-c", "import code_agent.cli"], runs=1)
+    assert heavy_imports(result) == []
+    assert result.import_ms["code_agent.cli"] < CLI_IMPORT_BUDGET_MS
+
+
+def test_cli_help_within_budget():
+    result = measure("code-agent --help", ["-m", "code_agent.cli", "--help"], runs=3)
+    assert heavy_imports(result) == []
+    assert result.wall_ms < CLI_HELP_BUDGET_MS
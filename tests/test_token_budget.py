@@ -0,0 +1,70 @@
+from code_agent.token_budget import (
+    PROMPT_OVERHEAD_TOKENS,
+    TokenBudget,
+    budget_for_model,
+    compact_log,
+    estimate_tokens,
+    plan_prompt,
+)
+from core.config import get_settings
+
+CI_LOG = "\n".join(
+    ["2024-05-01T10:00:00.1234567Z Collecting package"] * 200
+    + [
+        "tests/test_math.py::test_divide FAILED",
+        "Traceback (most recent call last):",
+        '  File "math_utils.py", line 3, in divide',
+        "    return a / b",
+        "ZeroDivisionError: division by zero",
+        "\x1b[31mDeprecationWarning spam\x1b[0m",
+        "2024-05-01T10:00:01Z \x1b[31mERROR: could not connect\x1b[0m",
+        "2024-05-01T10:00:02Z \x1b[31mERROR: could not connect\x1b[0m",
+        "math_utils.py:3: error: Missing return statement",
+        "1 failed, 10 passed in 0.5s",
+        "done",
+    ]
+)
+
+
+def test_compact_log_keeps_errors_and_collapses_repeats():
+    compacted = compact_log(CI_LOG, 1000)
+    assert "Collecting package" not in compacted
+    assert "ZeroDivisionError: division by zero" in compacted
+    assert '  File "math_utils.py", line 3, in divide' in compacted
+    assert "math_utils.py:3: error: Missing return statement" in compacted
+    assert "1 failed, 10 passed" in compacted
+    assert "tests/test_math.py::test_divide FAILED" in compacted
+    assert "DeprecationWarning" not in compacted
+    assert "ERROR: could not connect  [x2]" in compacted
+    assert "\x1b[" not in compacted
+    assert estimate_tokens(compacted) < estimate_tokens(CI_LOG) // 10
+
+
+def test_compact_log_respects_budget_and_keeps_tail():
+    compacted = compact_log(CI_LOG, 10)
+    assert len(compacted) <= len("(truncated)\n") + 40
+    assert compacted.endswith("1 failed, 10 passed in 0.5s")
+
+
+def test_plan_prompt_leaves_the_rest_for_repo_context():
+    budget = TokenBudget("m", input_tokens=4000, output_tokens=1000)
+    plan = plan_prompt(
+        budget,
+        issue_body="x" * 100_000,
+        reviewer_comment="short",
+        ci_failures=[("tests", CI_LOG)],
+    )
+    assert estimate_tokens(plan.issue_body) <= (4000 - PROMPT_OVERHEAD_TOKENS) * 0.2 + 5
+    assert plan.reviewer_comment == "short"
+    assert plan.ci_block.startswith("## CHECK FAILED: tests")
+    used = sum(estimate_tokens(s) for s in (plan.issue_body, "short", plan.ci_block))
+    assert plan.context_tokens == 4000 - PROMPT_OVERHEAD_TOKENS - used
+
+
+def test_budget_for_model_uses_per_model_settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "llm_context_windows", {"small": 8000})
+    monkeypatch.setattr(settings, "llm_output_tokens", {"small": 2000})
+    budget = budget_for_model("small")
+    assert (budget.input_tokens, budget.output_tokens) == (6000, 2000)
+    assert budget_for_model("big").output_tokens == settings.llm_max_output_tokens
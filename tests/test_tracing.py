@@ -0,0 +1,126 @@
+import json
+import threading
+
+import pytest
+
+from benchmarks.fake_servers import FakeGitHub
+from code_agent.llm_client import openai_complete
+from core import tracing
+from core.github_rest import github_client
+from core.tracing import Tracer
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    fresh = Tracer()
+    monkeypatch.setattr(tracing, "_tracer", fresh)
+    return fresh
+
+
+def test_counters_roll_up_into_open_spans(tracer):
+    with tracer.span("run") as root:
+        with tracer.span("checkout") as checkout:
+            tracer.count("subprocess.calls")
+        with tracer.span("generate") as generate:
+            tracer.count("llm.requests")
+            tracer.count("llm.prompt_tokens", 120)
+
+    assert checkout.parent == "run" and generate.parent == "run"
+    assert checkout.counters == {"subprocess.calls": 1}
+    assert root.counters == {"subprocess.calls": 1, "llm.requests": 1, "llm.prompt_tokens": 120}
+    assert [s.name for s in tracer.finished] == ["checkout", "generate", "run"]
+    summary = tracer.summary(root)
+    assert summary.index("checkout") < summary.index("generate") < summary.index("run")
+
+
+def test_span_records_error(tracer):
+    with pytest.raises(ValueError):
+        with tracer.span("apply"):
+            raise ValueError("boom")
+    assert tracer.finished[0].attrs["error"] == "ValueError"
+
+
+def test_wrap_keeps_parent_span_in_worker_thread(tracer):
+    def work():
+        tracer.count("subprocess.calls")
+
+    with tracer.span("format") as stage:
+        thread = threading.Thread(target=tracer.wrap(work))
+        thread.start()
+        thread.join()
+        # без wrap поток не видит открытых span'ов вызывающего
+        bare = threading.Thread(target=work)
+        bare.start()
+        bare.join()
+
+    assert stage.counters == {"subprocess.calls": 1}
+    assert tracer.totals["subprocess.calls"] == 2
+
+
+def test_export_jsonl_and_chrome(tracer, tmp_path):
+    with tracer.span("run", issue="7"):
+        with tracer.span("push"):
+            tracer.count("subprocess.calls")
+
+    chrome = tmp_path / "trace.json"
+    tracer.export_chrome(str(chrome))
+    events = json.loads(chrome.read_text())["traceEvents"]
+    assert [(e["name"], e["ph"]) for e in events] == [("push", "X"), ("run", "X")]
+    assert events[1]["args"] == {"issue": "7", "subprocess.calls": 1}
+
+    lines = tmp_path / "trace.jsonl"
+    tracer.export_jsonl(str(lines))
+    records = [json.loads(line) for line in lines.read_text().splitlines()]
+    assert [r["name"] for r in records] == ["push", "run"]
+    assert records[0]["parent"] == "run" and records[0]["seconds"] >= 0
+    assert tracer.finished == []
+
+
+def test_traced_flushes_to_trace_file(tracer, tmp_path, monkeypatch):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(tracing, "flush", lambda root=None: tracer.export_jsonl(str(path)))
+
+    @tracing.traced("review_pr", attrs=("pr_number",))
+    def review(token, pr_number):
+        with tracing.span("labels"):
+            return "approved"
+
+    assert review("t", 5) == "approved"
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["name"] for r in records] == ["labels", "review_pr"]
+    assert records[1]["attrs"] == {"pr_number": 5}
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_llm_tokens_from_usage(tracer, fake_openai, stream):
+    fake_openai.usage = {"prompt_tokens": 42, "completion_tokens": 7}
+    with tracer.span("generate") as stage:
+        openai_complete(system="s", user="hello", stream=stream)
+    assert stage.counters == {
+        "llm.requests": 1,
+        "llm.prompt_tokens": 42,
+        "llm.completion_tokens": 7,
+    }
+
+
+def test_llm_tokens_estimated_without_usage(tracer, fake_openai):
+    with tracer.span("generate") as stage:
+        openai_complete(system="s", user="hello")
+    assert stage.counters["llm.usage_estimated"] == 1
+    assert stage.counters["llm.prompt_tokens"] > 0
+
+
+def test_pygithub_requests_are_counted_per_stage(tracer, monkeypatch):
+    github = FakeGitHub("o/r").start()
+    monkeypatch.setenv("GITHUB_API_URL", github.url)
+    try:
+        gh = github_client("t")
+        repo = gh.get_repo("o/r")  # копия requester'а тоже считается
+        with tracer.span("pr") as stage:
+            pr = repo.create_pull(title="t", body="b", head="agent/issue-1", base="main")
+            pr.edit(body="b2")
+            assert [p.number for p in repo.get_pulls(state="open")] == [pr.number]
+    finally:
+        github.stop()
+
+    assert stage.counters == {"github.pygithub": 3}
@@ -0,0 +1,38 @@
+from code_agent.verify import affected_tests, verify_changes
+
+
+def write(root, path, text):
+    target = root / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(text, encoding="utf-8")
+
+
+def test_affected_tests_by_name_import_and_direct_change(tmp_path):
+    write(tmp_path, "math_utils.py", "def add(a, b):\n    return a + b\n")
+    write(tmp_path, "pkg/calc.py", "X = 1\n")
+    write(tmp_path, "tests/test_math_utils.py", "def test_ok():\n    pass\n")
+    write(tmp_path, "tests/test_other.py", "from pkg.calc import X\n")
+    write(tmp_path, "tests/test_unrelated.py", "import os\n")
+
+    assert affected_tests(["math_utils.py", "pkg/calc.py", "README.md"], str(tmp_path)) == [
+        "tests/test_math_utils.py",
+        "tests/test_other.py",
+    ]
+    assert affected_tests(["tests/test_unrelated.py"], str(tmp_path)) == ["tests/test_unrelated.py"]
+
+
+def test_verify_changes_reports_failing_tests(tmp_path):
+    write(tmp_path, "calc.py", "def add(a: int, b: int) -> int:\n    return a - b\n")
+    write(
+        tmp_path,
+        "tests/test_calc.py",
+        "from calc import add\n\n\ndef test_add():\n    assert add(1, 2) == 3\n",
+    )
+
+    failures = verify_changes(["calc.py"], str(tmp_path))
+
+    assert [name for name, _ in failures] == ["local pytest"]
+    assert "assert -1 == 3" in failures[0][1]
+
+    write(tmp_path, "calc.py", "def add(a: int, b: int) -> int:\n    return a + b\n")
+    assert verify_changes(["calc.py"], str(tmp_path)) == []